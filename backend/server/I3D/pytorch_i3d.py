@@ -194,6 +194,9 @@ class InceptionI3d(nn.Module):
         'Predictions',
     )
 
+    # Endpoints whose activations extract_features can return.
+    FEATURE_ENDPOINTS = VALID_ENDPOINTS[:VALID_ENDPOINTS.index('Mixed_5c') + 1]
+
     def __init__(self, num_classes=400, spatial_squeeze=True,
                  final_endpoint='Logits', name='inception_i3d', in_channels=3, dropout_keep_prob=0.5):
         """Initializes I3D model instance.
@@ -355,8 +358,31 @@ class InceptionI3d(nn.Module):
         return logits
         
 
-    def extract_features(self, x):
-        for end_point in self.VALID_ENDPOINTS:
+    def extract_features(self, x, endpoints=('Mixed_5c',)):
+        """Runs the backbone and returns the pooled activations at the given endpoints.
+
+        Only the endpoints up to the last one asked for are run, so the
+        embeddings of earlier endpoints are cheaper than the classifier.
+        Args:
+          x: The clips, of shape (batch, channels, frames, height, width).
+          endpoints: The endpoints whose activations are returned, any of
+              InceptionI3d.FEATURE_ENDPOINTS (default 'Mixed_5c', the input of the
+              logits layer).
+        Returns:
+          A dictionary from each endpoint to its activations averaged over time
+          and space, an embedding of shape (batch, channels).
+        Raises:
+          ValueError: if an endpoint is not recognized or not built.
+        """
+        for end_point in endpoints:
+            if end_point not in self.end_points:
+                raise ValueError('Unknown feature endpoint %s' % end_point)
+
+        features = {}
+        last = max(self.VALID_ENDPOINTS.index(end_point) for end_point in endpoints)
+        for end_point in self.VALID_ENDPOINTS[:last + 1]:
             if end_point in self.end_points:
-                x = self._modules[end_point](x)
-        return self.avg_pool(x)
\ No newline at end of file
+                x = self._modules[end_point](x) # use _modules to work with dataparallel
+                if end_point in endpoints:
+                    features[end_point] = x.mean(dim=(2, 3, 4))
+        return features
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+This file contains the compiled backends the inference engine can run I3D with instead of eager
+PyTorch. Running eagerly, every forward pass goes through Python module by module and every
+Unit3D and MaxPool3dSamePadding works out its padding again; a compiled graph does that work
+once, when it's built, and fuses what it can.
+
+Graphs are specialized to the shape of the clips they're built for. The batcher already pads
+clips to a few frame buckets, and the runner pads batches to a power of two, so only a handful
+of graphs are ever built and each is reused for every batch of that shape.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import io
+import threading
+import warnings
+
+import torch
+
+from registry import module_bytes
+
+BACKENDS = ("eager", "torchscript", "inductor", "onnx")
+
+def batch_bucket(size):
+    """
+    The batch size a batch is padded to: the next power of two.
+
+    Args:
+        size: int - number of clips in the batch
+    """
+    return 1 << (size - 1).bit_length()
+
+
+class CompiledRunner:
+    """
+    Runs a model through a compiled graph built for each shape of batch it's given.
+
+    Args:
+        model: nn.Module - the model, already on its device and in evaluation mode
+        backend: str - how the graphs are built:
+            'torchscript' - traced, frozen and optimized for inference by TorchScript
+            'inductor' - compiled by torch.compile with the inductor backend
+            'onnx' - exported to ONNX and run by ONNX Runtime on the CPU
+    """
+
+    def __init__(self, model, backend):
+        if backend not in BACKENDS[1:]:
+            raise ValueError('Unknown compiled backend %s' % backend)
+
+        self.model = model
+        self.backend = backend
+        self._graphs = {} # (batch, channels, frames, height, width) -> the graph for that shape
+        self._lock = threading.Lock()
+
+        # TorchScript freezes a copy of the weights into every graph and ONNX Runtime loads one
+        # into every session, while torch.compile runs on the model's own
+        self.graph_bytes = 0 # memory taken by the graphs' copies of the weights
+        self._weight_bytes = module_bytes(model)
+
+        # torch.compile builds its own graph per shape, all it needs is room for every bucket
+        if backend == "inductor":
+            self._compiled = torch.compile(model, dynamic=False)
+
+    @property
+    def shapes(self):
+        """
+        Shapes a graph has been built for.
+        """
+        return sorted(self._graphs)
+
+    def __call__(self, batch):
+        """
+        Run a batch through the graph built for its shape, building the graph if it's the first
+        batch of that shape.
+
+        Args:
+            batch: torch.Tensor - clips of shape (batch, channels, frames, height, width)
+        """
+        size = batch.shape[0]
+        padded = batch_bucket(size)
+        if padded != size:
+            batch = torch.cat([batch, batch[-1:].expand(padded - size, *batch.shape[1:])])
+
+        shape = tuple(batch.shape)
+        graph = self._graphs.get(shape)
+        if graph is None:
+            with self._lock:
+                graph = self._graphs.get(shape) or self._build(batch)
+                self._graphs[shape] = graph
+
+        return graph(batch)[:size]
+
+    def _build(self, batch):
+        """
+        Build the graph for batches shaped like the given one.
+        """
+        # build outside of inference mode, whose tensors can't be traced or exported. The padding
+        # is baked into the graph as constants, which is the point, so those warnings are muted
+        with torch.inference_mode(False), torch.no_grad(), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            example = torch.zeros(batch.shape, dtype=batch.dtype, device=batch.device)
+
+            if self.backend == "torchscript":
+                traced = torch.jit.trace(self.model, example, check_trace=False)
+                graph = torch.jit.optimize_for_inference(torch.jit.freeze(traced.eval()))
+                self.graph_bytes += self._weight_bytes
+                return graph
+
+            if self.backend == "inductor":
+                self._raise_recompile_limit()
+                return self._compiled
+
+            return self._export_onnx(example)
+
+    def _raise_recompile_limit(self):
+        """
+        Make sure torch.compile keeps a graph for every shape instead of falling back to eager
+        once it has compiled a few.
+        """
+        import torch._dynamo
+
+        limit = len(self._graphs) + 1
+        for option in ("recompile_limit", "cache_size_limit"):
+            if hasattr(torch._dynamo.config, option):
+                setattr(torch._dynamo.config, option,
+                        max(getattr(torch._dynamo.config, option), limit))
+
+    def _export_onnx(self, example):
+        """
+        Export the model to ONNX for the example's shape and load it into ONNX Runtime.
+        """
+        try:
+            import onnxruntime
+        except ImportError:
+            raise RuntimeError("The onnx backend needs onnxruntime, install it with "
+                               "`pip install onnxruntime`")
+
+        exported = io.BytesIO()
+        torch.onnx.export(self.model, (example,), exported, input_names=["clips"],
+                          output_names=["logits"], opset_version=17, dynamo=False)
+        session = onnxruntime.InferenceSession(exported.getvalue(),
+                                               providers=["CPUExecutionProvider"])
+        self.graph_bytes += exported.getbuffer().nbytes # the weights make up nearly all of it
+
+        def run(batch):
+            logits, = session.run(None, {"clips": batch.cpu().numpy()})
+            return torch.from_numpy(logits)
+
+        return run
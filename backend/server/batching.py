@@ -0,0 +1,247 @@
+"""
+This file contains the micro-batching scheduler that sits in front of the I3D model. Requests
+that arrive close together are collected for a short window, padded to a common number of frames
+and run through the model as a single batch, after which every caller is handed its own result.
+
+Padding changes predictions: I3D's receptive field reaches into the repeated frames, so a padded
+clip's logits differ from its unpadded ones even once they're cut back to its own time steps.
+Clips are only padded when a batch holds clips of different lengths, unless every batch has to be
+padded to a bucket (compiled backends, whose graphs are built per shape).
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import torch
+
+
+def bucket_length(frames, buckets):
+    """
+    Find the bucket a clip with the given number of frames is padded up to. Clips longer than the
+    largest bucket are rounded up to a multiple of it.
+
+    Args:
+        frames: int - number of frames in the clip
+        buckets: tuple - ascending list of frame counts clips are padded to
+    """
+    for bucket in buckets:
+        if frames <= bucket:
+            return bucket
+    return math.ceil(frames / buckets[-1]) * buckets[-1]
+
+def output_length(frames):
+    """
+    Number of time steps I3D produces for a clip with the given number of frames. The model
+    halves the time axis three times and the final average pool removes one more step.
+
+    Args:
+        frames: int - number of frames fed to the model
+    """
+    return max(math.ceil(frames / 8) - 1, 1)
+
+
+class _Request:
+    """
+    A single clip waiting in the queue, along with the future its caller is waiting on.
+    """
+
+    def __init__(self, clip, options):
+        self.clip = clip
+        self.options = options
+        self.frames = clip.shape[1]
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Collects clips for up to `max_wait_ms` or `max_batch_size` clips, buckets them by frame
+    count and runs each bucket through the engine as one batch on a dedicated thread.
+
+    Args:
+        engine: InferenceEngine - engine the batched forward passes are run on
+        postprocess: callable - turns the logits of one clip into the caller's result, it's
+            called as postprocess(logits, frames, **options) where logits has shape
+            (classes, time) and frames is the clip's original number of frames
+        max_batch_size: int - most clips that are run in a single forward pass
+        max_wait_ms: float - longest the first clip of a batch waits for others to join it
+        buckets: tuple - ascending frame counts that clips are padded up to
+        exact_lengths: bool - run a batch whose clips all have the same length (e.g. a single
+            clip) at that length instead of padding it to its bucket, so its predictions are
+            the clip's own; off for compiled backends, which need a graph per length
+        observe: callable - optional, called as observe(stage, seconds) with how long each clip
+            waited in the queue ('queue'), each batch's forward pass took ('inference') and each
+            clip's postprocessing took ('postprocess')
+    """
+
+    def __init__(self, engine, postprocess, max_batch_size=8, max_wait_ms=10.0,
+                 buckets=(16, 32, 48, 64, 96, 128), exact_lengths=True, observe=None):
+        self.engine = engine
+        self.postprocess = postprocess
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.buckets = tuple(sorted(buckets))
+        self.exact_lengths = exact_lengths
+        self.observe = observe
+
+        # bookkeeping so we can report on how well batching is working
+        self.batches = 0
+        self.clips = 0
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="i3d-batcher", daemon=True)
+
+    def start(self):
+        """
+        Start the thread that runs the batches.
+        """
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the batching thread once the clips already queued have been run.
+        """
+        self._queue.put(None)
+        self._thread.join()
+
+    def submit(self, clip, **options):
+        """
+        Queue a clip for inference and return a future that resolves to the caller's result and
+        the clip's share of its batch's forward pass in milliseconds. The latency is measured per
+        batch rather than read from the engine afterwards, which a later batch may have updated.
+
+        Args:
+            clip: torch.Tensor - a single clip of shape (channels, frames, height, width)
+            options: keyword arguments passed on to the postprocess function for this clip
+        """
+        request = _Request(clip, options)
+        self._queue.put(request)
+        return request.future
+
+    def depth(self):
+        """
+        Number of clips currently waiting to be run.
+        """
+        return self._queue.qsize()
+
+    def stats(self):
+        """
+        Summary of the queue and the batches run so far.
+        """
+        return {
+            "depth": self.depth(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "clips": self.clips,
+            "avg_batch_size": self.clips / self.batches if self.batches else 0.0,
+        }
+
+    def _collect(self):
+        """
+        Block until a clip arrives, then gather more until the batch is full or the first clip
+        has waited long enough. Also reports whether the batcher was asked to stop.
+        """
+        request = self._queue.get()
+        if request is None:
+            return [], True
+
+        batch = [request]
+        deadline = request.enqueued + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # once the window has closed, only take what is already waiting
+            timeout = deadline - time.perf_counter()
+            try:
+                if timeout > 0:
+                    request = self._queue.get(timeout=timeout)
+                else:
+                    request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            # a None in the queue means we're shutting down
+            if request is None:
+                return batch, True
+            batch.append(request)
+
+        return batch, False
+
+    def _loop(self):
+        """
+        Main loop of the batching thread.
+        """
+        while True:
+            batch, stopping = self._collect()
+            self._run_all(batch)
+            if stopping:
+                return
+
+    def _run_all(self, batch):
+        """
+        Run every clip that was collected, one forward pass per bucket.
+        """
+        # group the clips by the length they are padded to
+        groups = {}
+        for request in batch:
+            groups.setdefault(bucket_length(request.frames, self.buckets), []).append(request)
+
+        for frames, requests in groups.items():
+            # clips of a single length don't need padding to share a batch
+            if self.exact_lengths and len({request.frames for request in requests}) == 1:
+                frames = requests[0].frames
+            self._run(frames, requests)
+
+    def _run(self, frames, requests):
+        """
+        Pad a group of clips to the same length, run them as one batch and resolve their futures.
+
+        Args:
+            frames: int - number of frames every clip in the group is padded to
+            requests: list - the requests in the group
+        """
+        started = time.perf_counter()
+        if self.observe is not None:
+            for request in requests:
+                self.observe("queue", started - request.enqueued)
+
+        try:
+            # copy each clip into one batch, repeating its last frame to fill the padding
+            channels, _, height, width = requests[0].clip.shape
+            batch = torch.empty((len(requests), channels, frames, height, width),
+                                dtype=requests[0].clip.dtype)
+            for i, request in enumerate(requests):
+                batch[i, :, :request.frames] = request.clip
+                batch[i, :, request.frames:] = request.clip[:, -1:]
+
+            start = time.perf_counter()
+            logits = self.engine(batch)
+            latency_ms = (time.perf_counter() - start) * 1000 / len(requests)
+            if self.observe is not None:
+                self.observe("inference", time.perf_counter() - started)
+        except Exception as e:
+            for request in requests:
+                request.future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.clips += len(requests)
+
+        # hand each caller the logits that belong to its own frames
+        for i, request in enumerate(requests):
+            try:
+                start = time.perf_counter()
+                clip_logits = logits[i, :, :output_length(request.frames)]
+                result = self.postprocess(clip_logits, request.frames, **request.options)
+                request.future.set_result((result, latency_ms))
+                if self.observe is not None:
+                    self.observe("postprocess", time.perf_counter() - start)
+            except Exception as e:
+                request.future.set_exception(e)
@@ -0,0 +1,98 @@
+"""
+This script benchmarks I3D on the CPU with each backend the inference engine supports: eager
+PyTorch and the compiled TorchScript, torch.compile (inductor) and ONNX Runtime graphs. For each
+backend it reports how long the graph took to build, the per-clip latency once built, and how far
+its logits are from eager's.
+
+To run the benchmark, use the following command from the server directory:
+    python bench_backends.py --frames 16,32,64 --runs 5
+
+Backends whose dependencies aren't installed (e.g. onnxruntime) are reported and skipped.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import argparse
+import statistics
+import time
+
+import torch
+
+from backends import BACKENDS
+from engine import InferenceEngine, configure_threads
+from registry import MODEL_CLASSES, load_model
+
+def bench_backend(model, backend, clips, runs):
+    """
+    Time a backend on each clip, returning the build time, the median latency per clip of each
+    clip length and the logits it produced, or None if the backend couldn't be used.
+    """
+    try:
+        engine = InferenceEngine(model, device="cpu", backend=backend)
+        built = {}
+        for frames, clip in clips.items():
+            start = time.perf_counter()
+            engine(clip)
+            built[frames] = (time.perf_counter() - start) * 1000
+    except Exception as e:
+        print(f"{backend:<12} skipped: {e}")
+        return None
+
+    latencies, logits = {}, {}
+    for frames, clip in clips.items():
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            logits[frames] = engine(clip)
+            times.append((time.perf_counter() - start) * 1000 / clip.shape[0])
+        latencies[frames] = statistics.median(times)
+
+    # the first call of each shape pays for building its graph
+    build_ms = sum(built.values()) - sum(latencies[f] * clips[f].shape[0] for f in clips)
+    return max(build_ms, 0.0), latencies, logits
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark I3D backends on the CPU.")
+    parser.add_argument("--model", default="asl100", choices=sorted(MODEL_CLASSES))
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--frames", default="16,32,64", help="clip lengths, i.e. frame buckets")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=0, help="0 keeps torch's default")
+    parser.add_argument("--random-weights", action="store_true",
+                        help="don't load the archived checkpoint, e.g. when it isn't downloaded")
+    parser.add_argument("--fuse", action="store_true",
+                        help="fold the batch norms and padding into the layers (SLAMM_FUSE)")
+    args = parser.parse_args()
+
+    threads, _ = configure_threads(args.threads)
+    print(f"{args.model} on the CPU with {threads} threads, batch size {args.batch_size}"
+          + (", fused" if args.fuse else ""))
+
+    torch.manual_seed(0)
+    model = load_model(args.model, args.random_weights, args.fuse)
+    clips = {int(frames): torch.randn(args.batch_size, 3, int(frames), 224, 224)
+             for frames in args.frames.split(",")}
+
+    reference = None
+    for backend in args.backends.split(","):
+        result = bench_backend(model, backend, clips, args.runs)
+        if result is None:
+            continue
+        build_ms, latencies, logits = result
+
+        # eager is the reference the compiled graphs must agree with
+        if reference is None and backend == "eager":
+            reference = logits
+        error = (max((logits[f] - reference[f]).abs().max().item() for f in clips)
+                 if reference is not None else float("nan"))
+
+        per_length = "  ".join(f"T={frames}: {ms:7.1f} ms" for frames, ms in latencies.items())
+        print(f"{backend:<12} build {build_ms:9.0f} ms  |  {per_length}  |  "
+              f"max |diff| {error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
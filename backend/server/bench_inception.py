@@ -0,0 +1,100 @@
+"""
+This script benchmarks each of I3D's inception modules, Mixed_3b through Mixed_5c, on the CPU in
+three forms: as trained, with its units fused (batch norms folded into the convolutions, see
+fusion.py), and branch-fused as the server runs it (the 1x1x1 convolutions that share the
+module's input merged into one, and the branches written straight into the module's output).
+Each module is run on the activations it actually sees for a clip of the given length, and the
+report gives the median latency of each form and how far its output is from the trained one's.
+
+To run the benchmark, use the following command from the server directory:
+    python bench_inception.py --frames 64 --runs 5
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import argparse
+import copy
+import statistics
+import time
+
+import torch
+
+from I3D.pytorch_i3d import InceptionModule
+from engine import configure_threads
+from fusion import FusedInceptionModule, fuse_for_inference
+from registry import MODEL_CLASSES, load_model
+
+def module_inputs(model, clip):
+    """
+    The input each inception module of the model receives when it's run on a clip, keyed on the
+    module's name.
+    """
+    inputs, handles = {}, []
+    for name, module in model.named_children():
+        if isinstance(module, InceptionModule):
+            handles.append(module.register_forward_pre_hook(
+                lambda module, args, name=name: inputs.__setitem__(name, args[0].clone())))
+
+    with torch.inference_mode():
+        model(clip)
+    for handle in handles:
+        handle.remove()
+    return inputs
+
+def time_module(module, x, runs):
+    """
+    Median latency of a module on an input, in milliseconds, along with its output.
+    """
+    times = []
+    with torch.inference_mode():
+        output = module(x) # the first run pays for allocation and kernel selection
+        for _ in range(runs):
+            start = time.perf_counter()
+            module(x)
+            times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), output
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark I3D's fused inception modules.")
+    parser.add_argument("--model", default="asl100", choices=sorted(MODEL_CLASSES))
+    parser.add_argument("--frames", type=int, default=64, help="length of the clip")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=0, help="0 keeps torch's default")
+    parser.add_argument("--random-weights", action="store_true",
+                        help="don't load the archived checkpoint, e.g. when it isn't downloaded")
+    args = parser.parse_args()
+
+    threads, _ = configure_threads(args.threads)
+    print(f"{args.model} on the CPU with {threads} threads, {args.batch_size} clips of "
+          f"{args.frames} frames")
+
+    torch.manual_seed(0)
+    model = load_model(args.model, args.random_weights).eval()
+    inputs = module_inputs(model, torch.randn(args.batch_size, 3, args.frames, 224, 224))
+
+    print(f"{'module':<10} {'input shape':<22} {'trained':>10} {'units fused':>12} "
+          f"{'branch fused':>13} {'speedup':>8}  max |diff|")
+    totals = [0.0, 0.0, 0.0]
+    for name, x in inputs.items():
+        module = model._modules[name]
+        forms = (module, fuse_for_inference(copy.deepcopy(module)),
+                 FusedInceptionModule(module).eval())
+
+        results = [time_module(form, x, args.runs) for form in forms]
+        error = max((output - results[0][1]).abs().max().item() for _, output in results[1:])
+        for i, (ms, _) in enumerate(results):
+            totals[i] += ms
+
+        print(f"{name:<10} {'x'.join(map(str, x.shape)):<22} {results[0][0]:>7.1f} ms "
+              f"{results[1][0]:>9.1f} ms {results[2][0]:>10.1f} ms "
+              f"{results[0][0] / results[2][0]:>7.2f}x  {error:.2e}")
+
+    print(f"{'total':<10} {'':<22} {totals[0]:>7.1f} ms {totals[1]:>9.1f} ms "
+          f"{totals[2]:>10.1f} ms {totals[0] / totals[2]:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
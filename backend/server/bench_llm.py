@@ -0,0 +1,96 @@
+"""
+This script benchmarks how long the LLM takes to prefill a summary request, comparing the way
+the server used to ask for summaries (a new chat session with the whole instruction prompt for
+every request) with the long-lived LLMWorker session (instructions evaluated once, only the words
+prefilled per request).
+
+To run the benchmark, use the following command from the server directory:
+    python bench_llm.py --runs 10
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import argparse
+import statistics
+import time
+
+from gpt4all import GPT4All
+
+from llm_worker import LLMWorker, SYSTEM_PROMPT, summary_prompt
+
+# short gloss sequences like the ones users sign
+PHRASES = [
+    "book drink",
+    "computer before chair",
+    "go bed now",
+    "mother help cook",
+    "who you",
+    "thank you help",
+]
+
+def time_request(llm, prompt, max_tokens):
+    """
+    Generate a response and return the time to the first token and the total time, in ms.
+    """
+    start = time.perf_counter()
+    first_token = None
+    for _ in llm.generate(prompt, max_tokens=max_tokens, streaming=True):
+        if first_token is None:
+            first_token = time.perf_counter()
+    end = time.perf_counter()
+    return ((first_token or end) - start) * 1000, (end - start) * 1000
+
+def bench_new_session(llm, runs, max_tokens):
+    """
+    The old approach: a throwaway session with the full instructions for every request.
+    """
+    prefill, total = [], []
+    for i in range(runs):
+        words = PHRASES[i % len(PHRASES)]
+        with llm.chat_session():
+            first, whole = time_request(llm, SYSTEM_PROMPT + "\n" + summary_prompt(words),
+                                        max_tokens)
+        prefill.append(first)
+        total.append(whole)
+    return prefill, total
+
+def bench_worker(llm, runs, max_tokens):
+    """
+    The new approach: one long-lived session with the instructions evaluated up front, rewound
+    to them after every request.
+    """
+    worker = LLMWorker(llm, SYSTEM_PROMPT, max_tokens=max_tokens).start()
+    prefill, total = [], []
+    for i in range(runs):
+        words = PHRASES[i % len(PHRASES)]
+        start = time.perf_counter()
+        worker.generate(summary_prompt(words))
+        prefill.append(worker.last_prefill_ms)
+        total.append((time.perf_counter() - start) * 1000)
+    worker.stop()
+    return prefill, total
+
+def report(name, prefill, total):
+    """
+    Print the median and worst prefill and total times of an approach.
+    """
+    print(f"{name:<14} prefill median {statistics.median(prefill):8.1f} ms  "
+          f"max {max(prefill):8.1f} ms  |  total median {statistics.median(total):8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM prefill for summaries.")
+    parser.add_argument("--model", default="Meta-Llama-3-8B-Instruct.Q4_0.gguf")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-tokens", type=int, default=48)
+    args = parser.parse_args()
+
+    llm = GPT4All(args.model)
+
+    report("new session", *bench_new_session(llm, args.runs, args.max_tokens))
+    report("worker", *bench_worker(llm, args.runs, args.max_tokens))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+This file contains the caches used by the server to avoid repeating expensive work, such as
+asking the LLM to summarize a phrase it has already summarized, or running the model again on a
+video that was already uploaded.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    A thread-safe least-recently-used cache with an optional time to live, which can persist its
+    entries to a JSON file so they survive a restart. Changes are written by a background thread
+    every few seconds rather than by put(), so callers never wait on the disk; close() writes the
+    last of them.
+
+    Args:
+        max_size: int - most entries kept, the least recently used are dropped first
+        ttl_seconds: float - entries older than this are treated as missing, 0 keeps them forever
+        path: str - optional JSON file the entries are loaded from and saved to. Keys and values
+            must be JSON serializable when it's used
+        flush_seconds: float - how often changed entries are written to the file
+    """
+
+    def __init__(self, max_size=1024, ttl_seconds=0, path=None, flush_seconds=5.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.flush_seconds = flush_seconds
+
+        # hit rate counters
+        self.hits = 0
+        self.misses = 0
+
+        # key -> (time it was stored, value), wall clock so it still means something after a restart
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False # whether entries changed since they were last written
+
+        # only one write at a time, the flushing thread's or close()'s
+        self._write_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = None
+
+        if self.path:
+            if os.path.exists(self.path):
+                self._load()
+            self._flusher = threading.Thread(target=self._flush_loop, name="cache-flush",
+                                             daemon=True)
+            self._flusher.start()
+
+    def get(self, key):
+        """
+        Look up a key, returning None if it isn't cached or has expired.
+
+        Args:
+            key: the key to look up
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0], time.time()):
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value):
+        """
+        Store a value, dropping the least recently used entries if the cache is full.
+
+        Args:
+            key: the key to store the value under
+            value: the value to store
+        """
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def flush(self):
+        """
+        Write the entries to the cache file if they changed since they were last written. Only
+        taking a copy of them holds up other callers, the writing happens outside the lock.
+        """
+        if not self.path:
+            return
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                entries = [[key, stored, value] for key, (stored, value) in self._entries.items()]
+                self._dirty = False
+            try:
+                self._save(entries)
+            except OSError:
+                with self._lock:
+                    self._dirty = True # try again on the next flush
+
+    def close(self):
+        """
+        Stop the flushing thread and write the last changes.
+        """
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        """
+        Summary of the cache's size and hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _expired(self, stored, now):
+        """
+        Whether an entry stored at the given time has outlived the TTL.
+        """
+        return self.ttl_seconds > 0 and now - stored > self.ttl_seconds
+
+    def _load(self):
+        """
+        Load the entries saved by a previous run, skipping the ones that have expired since.
+        """
+        try:
+            with open(self.path) as file:
+                saved = json.load(file)
+        except (OSError, ValueError):
+            return # a missing or corrupt cache file just means we start empty
+
+        now = time.time()
+        for key, stored, value in saved[-self.max_size:]:
+            if not self._expired(stored, now):
+                self._entries[key] = (stored, value)
+
+    def _flush_loop(self):
+        """
+        Main loop of the flushing thread, writing changes every flush_seconds until closed.
+        """
+        while not self._closed.wait(self.flush_seconds):
+            self.flush()
+
+    def _save(self, entries):
+        """
+        Write a copy of the entries to the cache file, oldest first. The file is replaced
+        atomically so a crash can't leave it half written.
+
+        Args:
+            entries: list - [key, time stored, value] of each entry
+        """
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump(entries, file)
+        os.replace(temp_path, self.path)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key, so that the work is only done once and every
+    caller waiting on that key gets the same result. Must be used from the event loop.
+    """
+
+    def __init__(self):
+        self.coalesced = 0 # calls that were handed another call's result
+        self._inflight = {} # key -> task doing the work for that key
+
+    async def run(self, key, work):
+        """
+        Do the work for a key, or wait on the call already doing it.
+
+        Args:
+            key: the key identifying the work
+            work: callable - returns a coroutine doing the work, only called if no other call
+                for the key is in flight
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(work())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # shielded so one caller giving up doesn't cancel the work for everyone else
+        return await asyncio.shield(task)
+
+    def __len__(self):
+        return len(self._inflight)
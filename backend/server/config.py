@@ -0,0 +1,168 @@
+"""
+This file holds the configuration for the server. Every value can be selected at startup through
+an environment variable, so the same code can be launched on a GPU machine or a CPU-only node
+without any edits, e.g.:
+    SLAMM_DEVICE=cpu SLAMM_NUM_THREADS=8 uvicorn server:app --host 0.0.0.0 --port <port_number>
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import os
+
+########### Helpers for reading the environment ###########
+
+def env_str(name, default):
+    """
+    Read a string value from the environment.
+    """
+    return os.environ.get(name, default)
+
+def env_int(name, default):
+    """
+    Read an integer value from the environment.
+    """
+    return int(os.environ.get(name, default))
+
+def env_float(name, default):
+    """
+    Read a float value from the environment.
+    """
+    return float(os.environ.get(name, default))
+
+def env_bool(name, default):
+    """
+    Read a boolean value from the environment. Accepts 1/0, true/false, yes/no and on/off.
+    """
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+########### end helpers for reading the environment ###########
+
+
+
+########### Inference engine ###########
+
+DEVICE = env_str("SLAMM_DEVICE", "auto") # 'auto', 'cuda' or 'cpu'
+NUM_THREADS = env_int("SLAMM_NUM_THREADS", 0) # intra-op threads on CPU, 0 keeps torch's default
+NUM_INTEROP_THREADS = env_int("SLAMM_NUM_INTEROP_THREADS", 0) # inter-op threads, 0 keeps default
+USE_BF16 = env_bool("SLAMM_BF16", False) # run the forward pass under bfloat16 autocast
+CHANNELS_LAST = env_bool("SLAMM_CHANNELS_LAST", False) # channels-last-3d layout for the model
+BACKEND = env_str("SLAMM_BACKEND", "eager") # 'eager', 'torchscript', 'inductor' or 'onnx'
+INT8 = env_bool("SLAMM_INT8", False) # serve the int8 checkpoints made by quantize.py, CPU only
+FUSE = env_bool("SLAMM_FUSE", True) # fold batch norms and padding into I3D's layers (fusion.py)
+
+
+
+########### Models ###########
+
+MODELS = tuple(env_str("SLAMM_MODELS", 
+                       "asl100,asl300,asl1000,asl2000").split(",")) # models that may be served
+DEFAULT_MODEL = env_str("SLAMM_DEFAULT_MODEL", "asl100") # used when a request doesn't pick one
+MODEL_PRELOAD = tuple(m for m in env_str("SLAMM_MODEL_PRELOAD", "").split(",")
+                      if m) # loaded at startup besides the default, the rest on first use
+MODEL_MEMORY_MB = env_float("SLAMM_MODEL_MEMORY_MB", 256) # budget for resident models, 0 no limit
+
+
+
+########### Micro-batching ###########
+
+BATCH_MAX_SIZE = env_int("SLAMM_BATCH_MAX_SIZE", 8) # most clips run in a single forward pass
+BATCH_MAX_WAIT_MS = env_float("SLAMM_BATCH_MAX_WAIT_MS", 10.0) # longest a clip waits for others
+FRAME_BUCKETS = tuple(int(b) for b in env_str("SLAMM_FRAME_BUCKETS", 
+                                              "16,32,48,64,96,128").split(",")) # padded lengths
+
+
+
+########### Video decoding ###########
+
+DECODE_THREADS = env_int("SLAMM_DECODE_THREADS", 0) # threads per upload decode, 0 lets FFmpeg pick
+MAX_FRAMES = env_int("SLAMM_MAX_FRAMES", 64) # most frames of a video fed to I3D, 0 keeps them all
+SAMPLING = env_str("SLAMM_SAMPLING", "uniform") # 'uniform', 'fps' or 'center' temporal sampling
+
+
+
+########### Session buffers ###########
+
+SESSION_DB = env_str("SLAMM_SESSION_DB", "") # SQLite file shared by workers, empty keeps memory
+SESSION_TTL_SECONDS = env_float("SLAMM_SESSION_TTL_SECONDS", 900) # idle time before a session ends
+SESSION_MAX_SESSIONS = env_int("SLAMM_SESSION_MAX_SESSIONS", 10000) # most sessions buffered at once
+SESSION_MAX_WORDS = env_int("SLAMM_SESSION_MAX_WORDS", 64) # most words buffered per session
+
+
+
+########### Request stages ###########
+
+DECODE_WORKERS = env_int("SLAMM_DECODE_WORKERS", 4) # threads decoding and preprocessing uploads
+DECODE_CONCURRENCY = env_int("SLAMM_DECODE_CONCURRENCY", 8) # most uploads decoding at once
+INFERENCE_CONCURRENCY = env_int("SLAMM_INFERENCE_CONCURRENCY", 32) # most clips queued for I3D
+LLM_CONCURRENCY = env_int("SLAMM_LLM_CONCURRENCY", 4) # most summaries queued for the LLM
+
+
+
+########### LLM ###########
+
+LLM = env_str("SLAMM_LLM", "gpt4all") # 'gpt4all', or 'stub' to echo the words back offline
+LLM_STUB_TOKEN_MS = env_float("SLAMM_LLM_STUB_TOKEN_MS", 0) # time the stub takes per token
+LLM_MAX_TOKENS = env_int("SLAMM_LLM_MAX_TOKENS", 48) # token budget for a one-sentence summary
+
+
+
+########### Predictions ###########
+
+TOP_K_MAX = env_int("SLAMM_TOP_K_MAX", 10) # most alternative glosses a request can ask for
+
+
+
+########### Embeddings ###########
+
+EMBED_ENDPOINTS = tuple(env_str("SLAMM_EMBED_ENDPOINTS", 
+                                "Mixed_5c").split(",")) # endpoints /embed returns by default
+
+
+
+########### Gloss index ###########
+
+GLOSS_INDEX = env_str("SLAMM_GLOSS_INDEX", "gloss_index.npz") # .npz file, empty keeps it in memory
+GLOSS_INDEX_ENDPOINT = env_str("SLAMM_GLOSS_INDEX_ENDPOINT", 
+                               "Mixed_5c") # endpoint a new index embeds clips at
+
+
+
+########### Caches ###########
+
+PREDICTION_CACHE_SIZE = env_int("SLAMM_PREDICTION_CACHE_SIZE", 1024) # most upload predictions kept
+SUMMARY_CACHE_SIZE = env_int("SLAMM_SUMMARY_CACHE_SIZE", 4096) # most LLM summaries kept
+SUMMARY_CACHE_TTL_SECONDS = env_float("SLAMM_SUMMARY_CACHE_TTL_SECONDS", 0) # 0 never expires them
+SUMMARY_CACHE_PATH = env_str("SLAMM_SUMMARY_CACHE_PATH", "") # JSON file kept across restarts
+SUMMARY_CACHE_FLUSH_SECONDS = env_float("SLAMM_SUMMARY_CACHE_FLUSH_SECONDS",
+                                        5.0) # how often new summaries are written to the file
+
+
+
+########### Live stream recognition ###########
+
+LIVE_WINDOW = env_int("SLAMM_LIVE_WINDOW", 64) # frames in each window run through I3D
+LIVE_STRIDE = env_int("SLAMM_LIVE_STRIDE", 16) # frames between the starts of consecutive windows
+LIVE_MIN_CONFIDENCE = env_float("SLAMM_LIVE_MIN_CONFIDENCE", 0.0) # glosses below this aren't sent
+
+
+
+########### Startup ###########
+
+WARMUP = env_bool("SLAMM_WARMUP", True) # run synthetic clips through I3D before becoming ready
+WARMUP_FRAMES = tuple(int(f) for f in env_str("SLAMM_WARMUP_FRAMES", "").split(",")
+                      if f) # lengths warmed up, empty warms every bucket requests can reach
+
+
+
+########### Admin ###########
+
+ADMIN_TOKEN = env_str("SLAMM_ADMIN_TOKEN", "") # token the /admin routes need, empty disables them
+PROFILE_DIR = env_str("SLAMM_PROFILE_DIR", "profiles") # where profiler captures are written
+PROFILE_SAMPLE_INTERVAL_MS = env_float("SLAMM_PROFILE_SAMPLE_INTERVAL_MS", 
+                                       5.0) # time between samples of the Python stack
+PROFILE_MAX_CAPTURES = env_int("SLAMM_PROFILE_MAX_CAPTURES", 50) # most captures kept on disk
@@ -0,0 +1,130 @@
+"""
+This script computes I3D embeddings of a collection of videos in batches: each video's activations
+at the chosen endpoints, averaged over time and space, the same embeddings the server's /embed
+route returns. They're saved to a .npz file holding the videos' names ('names'), the frames used
+from each ('frames') and an array of shape (videos, channels) per endpoint, for retrieval,
+caching or training lightweight heads without running the backbone again.
+
+To embed every video in a directory, use the following command from the server directory:
+    python embed.py <path_to_videos> --model asl100 --endpoints Mixed_5c --output embeddings.npz
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+import torch
+
+from I3D.pytorch_i3d import InceptionI3d
+from engine import InferenceEngine, configure_threads, resolve_device
+from fusion import fuse_for_inference
+from registry import MODEL_CLASSES, load_model
+from video import load_clip
+
+# extensions of the videos found in directories
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+
+def list_videos(paths):
+    """
+    Every video given, looking inside directories for files with a video extension.
+
+    Args:
+        paths: list of str - videos and directories of videos
+    """
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            videos.extend(sorted(file for file in glob.glob(os.path.join(path, "*"))
+                                 if file.lower().endswith(VIDEO_EXTENSIONS)))
+        else:
+            videos.append(path)
+    return videos
+
+def embed_videos(engine, videos, endpoints, max_frames=64, batch_size=8, log=print):
+    """
+    Embed videos in batches of clips with the same number of frames, so no clip is padded.
+
+    Args:
+        engine: InferenceEngine - runs the model
+        videos: list of str - paths of the videos
+        endpoints: tuple of str - endpoints to embed at
+        max_frames: int - most frames of a video used, as on the server
+        batch_size: int - most clips run at once
+        log: callable - called with a message as batches finish
+
+    Returns the index of each video that could be decoded, the frames used from each, and the
+    embeddings of those videos at each endpoint, in the same order.
+    """
+    embedded = {} # index of the video -> (frames used, {endpoint: embedding})
+    pending = {} # frames -> [(index, clip)] waiting to fill a batch
+
+    def run(group):
+        features = engine.features(torch.stack([clip for _, clip in group]), endpoints)
+        for row, (index, clip) in enumerate(group):
+            embedded[index] = (clip.shape[1], {name: features[name][row].cpu().numpy()
+                                               for name in endpoints})
+        log(f"Embedded {len(embedded)}/{len(videos)} videos")
+
+    for index, path in enumerate(videos):
+        clip = load_clip(path, max_frames)
+        if clip is None:
+            log(f"No frames extracted from {path}, skipping it")
+            continue
+        group = pending.setdefault(clip.shape[1], [])
+        group.append((index, clip))
+        if len(group) == batch_size:
+            run(pending.pop(clip.shape[1]))
+
+    for group in pending.values():
+        run(group)
+
+    order = sorted(embedded)
+    return (order, [embedded[i][0] for i in order],
+            {name: np.stack([embedded[i][1][name] for i in order]) if order
+             else np.zeros((0, 0), dtype=np.float32) for name in endpoints})
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute I3D embeddings of videos.")
+    parser.add_argument("videos", nargs="+", help="videos, or directories of videos")
+    parser.add_argument("--model", default="asl100", choices=sorted(MODEL_CLASSES))
+    parser.add_argument("--endpoints", default="Mixed_5c",
+                        help="comma separated endpoints, e.g. Mixed_4f,Mixed_5c")
+    parser.add_argument("--output", default="embeddings.npz")
+    parser.add_argument("--max-frames", type=int, default=64, help="frame budget per video")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--device", default="auto", help="'auto', 'cuda' or 'cpu'")
+    parser.add_argument("--threads", type=int, default=0, help="0 keeps torch's default")
+    parser.add_argument("--random-weights", action="store_true",
+                        help="don't load the archived checkpoint, e.g. when it isn't downloaded")
+    args = parser.parse_args()
+
+    endpoints = tuple(e.strip() for e in args.endpoints.split(",") if e.strip())
+    if not endpoints or any(e not in InceptionI3d.FEATURE_ENDPOINTS for e in endpoints):
+        parser.error("endpoints must be some of " + ", ".join(InceptionI3d.FEATURE_ENDPOINTS))
+    videos = list_videos(args.videos)
+    if not videos:
+        parser.error("no videos found")
+
+    configure_threads(args.threads)
+    model = fuse_for_inference(load_model(args.model, args.random_weights))
+    engine = InferenceEngine(model, device=resolve_device(args.device))
+
+    start = time.perf_counter()
+    order, frames, embeddings = embed_videos(engine, videos, endpoints, args.max_frames,
+                                             args.batch_size)
+    elapsed = time.perf_counter() - start
+
+    names = np.array([os.path.splitext(os.path.basename(videos[i]))[0] for i in order])
+    np.savez(args.output, names=names, frames=np.array(frames, dtype=np.int64), **embeddings)
+    print(f"Saved the embeddings of {len(order)} videos at {', '.join(endpoints)} to "
+          f"{args.output} in {elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+This file contains the inference engine used to execute the I3D model for the server. It hides
+the differences between running on a CUDA device and running on a commodity CPU node, so the
+routes in server.py never need to know where the model actually lives.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import time
+import torch
+import torch.nn as nn
+
+from backends import CompiledRunner
+
+
+def resolve_device(device):
+    """
+    Turn the configured device into the one we'll actually use. 'auto' picks CUDA when it's
+    available and falls back to the CPU otherwise.
+
+    Args:
+        device: str - 'auto', 'cuda' or 'cpu'
+    """
+    if device == "auto":
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    return device
+
+def configure_threads(num_threads=0, num_interop_threads=0):
+    """
+    Size the thread pools torch uses on the CPU. A value of 0 keeps torch's default.
+
+    Note that the inter-op pool can only be sized once, before any parallel work has run, so this
+    should be called as early as possible during startup.
+
+    Args:
+        num_threads: int - threads used inside a single operator (e.g. one convolution)
+        num_interop_threads: int - threads used to run independent operators concurrently
+    """
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
+    if num_interop_threads > 0:
+        try:
+            torch.set_num_interop_threads(num_interop_threads)
+        except RuntimeError:
+            pass # the pool was already started, keep whatever size it has
+
+    return torch.get_num_threads(), torch.get_num_interop_threads()
+
+
+class InferenceEngine:
+    """
+    Executes forward passes of a loaded model on the configured device and keeps track of how
+    long each clip takes.
+
+    Args:
+        model: nn.Module - the model, with its weights already loaded
+        device: str - either 'cuda' or 'cpu'
+        bf16: bool - run the forward pass under bfloat16 autocast
+        channels_last: bool - use the channels-last-3d memory layout for weights and inputs
+        backend: str - 'eager' to run the model as is, or a compiled backend (see backends.py):
+            'torchscript', 'inductor' or 'onnx'
+        profiler: Profiler - optional, profiles the forward passes it's armed for (see
+            profiling.py)
+        name: str - name of the model, labels what the profiler captures
+    """
+
+    def __init__(self, model, device="cpu", bf16=False, channels_last=False, backend="eager",
+                 profiler=None, name="i3d"):
+        # traced and exported graphs are built in float32, only torch.compile handles autocast
+        if bf16 and backend in ("torchscript", "onnx"):
+            raise ValueError(f"The {backend} backend doesn't support bf16")
+
+        self.device = torch.device(device)
+        self.bf16 = bf16
+        self.channels_last = channels_last
+        self.backend = backend
+        self.profiler = profiler
+        self.name = name
+
+        # latency bookkeeping, all in milliseconds per clip
+        self.last_latency_ms = 0.0
+        self.total_latency_ms = 0.0
+        self.clips = 0
+
+        # move the model over and put it in evaluation mode
+        model = model.to(self.device)
+        if self.channels_last:
+            model = model.to(memory_format=torch.channels_last_3d)
+        model.eval()
+
+        # keep a reference to the bare model so its attributes are always reachable
+        self.model = model
+        if backend != "eager":
+            self.runner = CompiledRunner(model, backend)
+        else:
+            self.runner = nn.DataParallel(model) if self.device.type == "cuda" else model
+
+    @property
+    def input_dtype(self):
+        """
+        The dtype clips should be prepared in. Under bf16 autocast the first convolution casts
+        its input to bfloat16 anyway, so clips can be built in it from the start.
+        """
+        return torch.bfloat16 if self.bf16 else torch.float32
+
+    def __call__(self, batch):
+        """
+        Run the model on a batch of clips and return the per-frame logits as float32.
+
+        Args:
+            batch: torch.Tensor - clips of shape (batch, channels, frames, height, width)
+        """
+        start = time.perf_counter()
+
+        batch = batch.to(self.device, non_blocking=True)
+        if self.channels_last:
+            batch = batch.contiguous(memory_format=torch.channels_last_3d)
+
+        # no autograd bookkeeping at all, and optionally reduced precision
+        with torch.inference_mode(), torch.autocast(device_type=self.device.type,
+                                                    dtype=torch.bfloat16,
+                                                    enabled=self.bf16):
+            if self.profiler is not None and self.profiler.active \
+                    and self.profiler.should_capture():
+                # compiled graphs don't run the model's modules, so their stages can't be marked
+                model = self.model if self.backend == "eager" else None
+                with self.profiler.capture(model, batch, self.name):
+                    logits = self.runner(batch)
+            else:
+                logits = self.runner(batch)
+        logits = logits.float()
+
+        # wait on the device so the latency we report is the real one
+        if self.device.type == "cuda":
+            torch.cuda.synchronize()
+
+        # record the latency of each clip in the batch
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.last_latency_ms = elapsed_ms / batch.shape[0]
+        self.total_latency_ms += elapsed_ms
+        self.clips += batch.shape[0]
+
+        return logits
+
+    def features(self, batch, endpoints=("Mixed_5c",)):
+        """
+        Run the model's backbone on a batch of clips and return the pooled embedding at each of
+        the given endpoints as float32 (see InceptionI3d.extract_features). It always runs
+        eagerly, since compiled graphs only produce logits, and isn't counted in the latency
+        stats.
+
+        Args:
+            batch: torch.Tensor - clips of shape (batch, channels, frames, height, width)
+            endpoints: iterable of str - endpoints of the model, e.g. 'Mixed_4f' or 'Mixed_5c'
+        """
+        batch = batch.to(self.device, non_blocking=True)
+        if self.channels_last:
+            batch = batch.contiguous(memory_format=torch.channels_last_3d)
+
+        with torch.inference_mode(), torch.autocast(device_type=self.device.type,
+                                                    dtype=torch.bfloat16,
+                                                    enabled=self.bf16):
+            features = self.model.extract_features(batch, tuple(endpoints))
+        return {endpoint: embedding.float() for endpoint, embedding in features.items()}
+
+    def warm_up(self, lengths, size=224):
+        """
+        Run a synthetic clip of each length through the model, so kernel selection and memory
+        allocation happen before the first real request instead of during it. The warm-up isn't
+        counted in the latency stats.
+
+        Args:
+            lengths: iterable of int - clip lengths, in frames, to warm up
+            size: int - height and width of the synthetic clips
+
+        Returns how long each length took, in milliseconds.
+        """
+        stats = (self.last_latency_ms, self.total_latency_ms, self.clips)
+        timings = {}
+        for frames in lengths:
+            start = time.perf_counter()
+            self(torch.zeros((1, 3, frames, size, size), dtype=self.input_dtype))
+            timings[frames] = (time.perf_counter() - start) * 1000
+        self.last_latency_ms, self.total_latency_ms, self.clips = stats
+
+        return timings
+
+    def stats(self):
+        """
+        Summary of the engine's configuration and latency so far.
+        """
+        return {
+            "device": self.device.type,
+            "bf16": self.bf16,
+            "channels_last": self.channels_last,
+            "backend": self.backend,
+            "threads": torch.get_num_threads() if self.device.type == "cpu" else None,
+            "clips": self.clips,
+            "last_latency_ms": self.last_latency_ms,
+            "avg_latency_ms": self.total_latency_ms / self.clips if self.clips else 0.0,
+        }
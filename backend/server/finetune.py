@@ -0,0 +1,341 @@
+"""
+This script fine-tunes I3D on a WLASL split file, e.g. to train the head of a new vocabulary, on
+the CPU in minutes. Only the last few endpoints of the model are tuned, as with
+InceptionI3d.forward(pretrained=True, n_tune_layers=k), but the frozen endpoints before them
+aren't run again every epoch: they're run once over the dataset and their output activations
+are stored in a memory-mapped cache on disk, in float16 or in int8 with a scale per channel.
+Every epoch then only runs the tunable tail on batches read straight from the cache.
+
+The frozen endpoints run in evaluation mode, so their batch norms use their running statistics
+and their activations are the same every epoch. The price of caching is that clips can't be
+augmented differently each epoch; every clip is its first --frames frames, sampled uniformly and
+repeating the last frame of short videos.
+
+To train the head of a vocabulary with the asl100 backbone, tuning Mixed_5b onwards, use the
+following command from the server directory, where --video-dir holds the WLASL videos named
+<video id>.mp4:
+    python finetune.py --split-file I3D/preprocess/nslt_100.json --video-dir <path>
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import argparse
+import copy
+import json
+import os
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from I3D.pytorch_i3d import InceptionI3d
+from engine import configure_threads
+from fusion import fuse_for_inference
+from quantize import load_split
+from registry import MODEL_CLASSES, find_weights, load_model
+from video import load_clip
+
+CACHE_DTYPES = ("fp16", "int8")
+
+def split_endpoints(tune_layers, cache_dtype="fp16"):
+    """
+    The endpoints that are frozen and the ones that are tuned, split the way
+    InceptionI3d.forward does for n_tune_layers.
+
+    Args:
+        tune_layers: int - number of trailing VALID_ENDPOINTS to tune, at least 1
+        cache_dtype: str - how the frozen activations are cached. The int8 cache only holds
+            the non-negative output of a frozen endpoint, so it can't cache the raw clip, whose
+            values run from -1 to 1, when every endpoint is tuned
+    """
+    if not 1 <= tune_layers <= len(InceptionI3d.VALID_ENDPOINTS):
+        raise ValueError("tune_layers must be between 1 and %d" % len(InceptionI3d.VALID_ENDPOINTS))
+    if cache_dtype == "int8" and tune_layers == len(InceptionI3d.VALID_ENDPOINTS):
+        raise ValueError("the int8 cache needs at least one frozen endpoint, use fp16 to tune "
+                         "every endpoint")
+    return (InceptionI3d.VALID_ENDPOINTS[:-tune_layers],
+            InceptionI3d.VALID_ENDPOINTS[-tune_layers:])
+
+def fixed_length(clip, frames):
+    """
+    Trim a clip of shape (channels, frames, height, width) to a number of frames, or pad it by
+    repeating its last frame, so every clip in the cache has the same shape.
+    """
+    if clip.shape[1] >= frames:
+        return clip[:, :frames]
+    padding = clip[:, -1:].expand(-1, frames - clip.shape[1], -1, -1)
+    return torch.cat([clip, padding], dim=1)
+
+def run_prefix(model, x, endpoints):
+    """
+    Run a batch of clips through the given endpoints of the model, returning their activations.
+    """
+    for end_point in endpoints:
+        if end_point in model.end_points:
+            x = model._modules[end_point](x) # use _modules to work with dataparallel
+    return x
+
+def run_tail(model, x, endpoints):
+    """
+    Run activations of the frozen endpoints through the tuned ones and the logits layer,
+    returning the per-frame logits of shape (batch, classes, time).
+    """
+    x = run_prefix(model, x, endpoints)
+    x = model.logits(model.dropout(model.avg_pool(x)))
+    return x.squeeze(3).squeeze(3)
+
+
+class ActivationCache:
+    """
+    The activations of the frozen endpoints for every clip of a subset, memory-mapped from disk
+    so only the batches being trained on are ever read into memory.
+
+    Args:
+        path: str - prefix of the cache's files, as written by build()
+    """
+
+    def __init__(self, path):
+        with open(path + ".json") as file:
+            self.meta = json.load(file)
+        count = self.meta["count"]
+        self.activations = np.load(path + ".activations.npy", mmap_mode="r")[:count]
+        self.labels = np.load(path + ".labels.npy")[:count]
+        self.scales = (np.load(path + ".scales.npy", mmap_mode="r")[:count]
+                       if self.meta["dtype"] == "int8" else None)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def batch(self, indices):
+        """
+        The float32 activations and labels of the given clips.
+
+        Args:
+            indices: array of int - which clips, read in ascending order to keep reads sequential
+        """
+        indices = np.sort(indices)
+        x = torch.from_numpy(self.activations[indices].astype(np.float32))
+        if self.scales is not None:
+            x *= torch.from_numpy(self.scales[indices].astype(np.float32))[:, :, None, None, None]
+        return x, torch.from_numpy(self.labels[indices].astype(np.int64))
+
+    @staticmethod
+    def build(path, prefix, endpoints, clips, frames, dtype, meta, batch_size=4, log=print):
+        """
+        Run every clip through the frozen endpoints and write their activations to the cache.
+
+        Args:
+            path: str - prefix of the cache's files
+            prefix: InceptionI3d - the model the frozen endpoints are run with, in evaluation mode
+            endpoints: tuple of str - the frozen endpoints
+            clips: list of (video path, label) - the clips of the subset
+            frames: int - number of frames of every clip
+            dtype: str - 'fp16', or 'int8' with a scale per clip and channel
+            meta: dict - describes what the cache was built from, to tell when it's stale
+            batch_size: int - clips run through the frozen endpoints at once
+            log: callable - called with a message as batches are written
+        """
+        activations = scales = None
+        labels = []
+
+        def write(batch, batch_labels):
+            nonlocal activations, scales
+            with torch.inference_mode():
+                x = run_prefix(prefix, torch.stack(batch), endpoints).float()
+
+            # the cache is sized on the first batch, once the activations' shape is known
+            if activations is None:
+                storage = np.float16 if dtype == "fp16" else np.uint8
+                activations = np.lib.format.open_memmap(path + ".activations.npy", mode="w+",
+                                                        dtype=storage,
+                                                        shape=(len(clips), *x.shape[1:]))
+                if dtype == "int8":
+                    scales = np.lib.format.open_memmap(path + ".scales.npy", mode="w+",
+                                                       dtype=np.float32,
+                                                       shape=(len(clips), x.shape[1]))
+
+            rows = slice(len(labels), len(labels) + len(batch))
+            if dtype == "fp16":
+                activations[rows] = x.numpy().astype(np.float16)
+            else:
+                # every endpoint ends in a ReLU or a pooling of one, so 0 to the max is the range
+                scale = x.amax(dim=(2, 3, 4)).clamp(min=1e-8) / 255
+                quantized = (x / scale[:, :, None, None, None]).round().clamp(0, 255)
+                activations[rows] = quantized.to(torch.uint8).numpy()
+                scales[rows] = scale.numpy()
+            labels.extend(batch_labels)
+            log(f"Cached the activations of {len(labels)}/{len(clips)} clips")
+
+        batch, batch_labels = [], []
+        for video, label in clips:
+            clip = load_clip(video, frames)
+            if clip is None:
+                log(f"No frames extracted from {video}, skipping it")
+                continue
+            batch.append(fixed_length(clip, frames))
+            batch_labels.append(label)
+            if len(batch) == batch_size:
+                write(batch, batch_labels)
+                batch, batch_labels = [], []
+        if batch:
+            write(batch, batch_labels)
+        if activations is None:
+            raise RuntimeError(f"None of the clips for {path} could be decoded")
+
+        activations.flush()
+        if scales is not None:
+            scales.flush()
+        np.save(path + ".labels.npy", np.array(labels, dtype=np.int64))
+        with open(path + ".json", "w") as file:
+            json.dump({**meta, "count": len(labels), "dtype": dtype,
+                       "shape": list(activations.shape[1:])}, file, indent=2)
+
+
+def load_cache(path, meta, build, rebuild=False):
+    """
+    Open the cache at a path, building it first if it's missing, was built from something
+    else, or a rebuild was asked for.
+
+    Args:
+        path: str - prefix of the cache's files
+        meta: dict - describes what the cache should have been built from
+        build: callable - builds the cache
+        rebuild: bool - build it even if it's up to date
+    """
+    if not rebuild and os.path.exists(path + ".json"):
+        with open(path + ".json") as file:
+            cached = json.load(file)
+        if all(cached.get(key) == value for key, value in meta.items()):
+            return ActivationCache(path)
+
+    build()
+    return ActivationCache(path)
+
+def evaluate(model, cache, endpoints, batch_size):
+    """
+    Top-1, top-5 and top-10 accuracy of the model on a cached subset, in percent, with the
+    logits max-pooled over time as the server does.
+    """
+    model.eval()
+    correct = [0, 0, 0]
+    with torch.inference_mode():
+        for start in range(0, len(cache), batch_size):
+            x, labels = cache.batch(np.arange(start, min(start + batch_size, len(cache))))
+            ranked = run_tail(model, x, endpoints).amax(dim=2).argsort(dim=1, descending=True)
+            for i, k in enumerate((1, 5, 10)):
+                correct[i] += (ranked[:, :k] == labels[:, None]).any(dim=1).sum().item()
+    return tuple(100.0 * hits / max(len(cache), 1) for hits in correct)
+
+def main():
+    parser = argparse.ArgumentParser(description="Fine-tune I3D's last endpoints on cached "
+                                                 "activations of its frozen ones.")
+    parser.add_argument("--split-file", required=True, help="WLASL split file, e.g. nslt_100.json")
+    parser.add_argument("--video-dir", required=True, help="WLASL videos, named <video id>.mp4")
+    parser.add_argument("--base-model", default="asl100", choices=sorted(MODEL_CLASSES),
+                        help="model whose weights the backbone starts from")
+    parser.add_argument("--random-weights", action="store_true",
+                        help="don't load the archived checkpoint, e.g. when it isn't downloaded")
+    parser.add_argument("--tune-layers", type=int, default=4,
+                        help="trailing VALID_ENDPOINTS tuned, as n_tune_layers in forward")
+    parser.add_argument("--eval-subset", default="val", choices=("val", "test"))
+    parser.add_argument("--frames", type=int, default=64, help="frames of every clip")
+    parser.add_argument("--cache-dir", default="activation_cache")
+    parser.add_argument("--cache-dtype", default="fp16", choices=CACHE_DTYPES)
+    parser.add_argument("--rebuild-cache", action="store_true")
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--threads", type=int, default=0, help="0 keeps torch's default")
+    parser.add_argument("--output", default=None,
+                        help="defaults to finetuned_nslt_<classes>.pt, the best epoch is kept")
+    args = parser.parse_args()
+
+    configure_threads(args.threads)
+    torch.manual_seed(0)
+    try:
+        frozen, tuned = split_endpoints(args.tune_layers, args.cache_dtype)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # the vocabulary is whatever the split file's labels cover
+    with open(args.split_file) as file:
+        num_classes = max(entry["action"][0] for entry in json.load(file).values()) + 1
+    train = load_split(args.split_file, args.video_dir, "train")
+    evaluation = load_split(args.split_file, args.video_dir, args.eval_subset)
+    if not train:
+        parser.error(f"none of the training clips in {args.split_file} are in {args.video_dir}")
+
+    # start from the base model, with a new logits layer if the vocabulary is a different size
+    weights = None if args.random_weights else find_weights(args.base_model)
+    model = load_model(args.base_model, random_weights=weights is None)
+    if num_classes != MODEL_CLASSES[args.base_model]:
+        model.replace_logits(num_classes)
+
+    # run the frozen endpoints once over both subsets, reusing the caches from a previous run
+    os.makedirs(args.cache_dir, exist_ok=True)
+    prefix = fuse_for_inference(copy.deepcopy(model))
+    caches = {}
+    for subset, clips in (("train", train), (args.eval_subset, evaluation)):
+        if not clips:
+            continue
+        boundary = frozen[-1] if frozen else "input"
+        path = os.path.join(args.cache_dir, f"{os.path.basename(args.split_file)}.{subset}."
+                                            f"{boundary}.{args.cache_dtype}")
+        meta = {"weights": weights, "split_file": os.path.abspath(args.split_file),
+                "subset": subset, "frozen": list(frozen), "frames": args.frames,
+                "dtype": args.cache_dtype, "videos": [video for video, _ in clips]}
+        start = time.perf_counter()
+        caches[subset] = load_cache(path, meta, lambda: ActivationCache.build(
+            path, prefix, frozen, clips, args.frames, args.cache_dtype, meta,
+            batch_size=max(args.batch_size // 4, 1)), args.rebuild_cache)
+        size_mb = caches[subset].activations.nbytes / 2**20
+        print(f"{subset}: {len(caches[subset])} clips of {caches[subset].meta['shape']} "
+              f"activations, {size_mb:.1f} MB, ready in {time.perf_counter() - start:.1f} s")
+    del prefix
+
+    # only the tuned endpoints and the logits layer are trained
+    for parameter in model.parameters():
+        parameter.requires_grad = False
+    tail = [model._modules[e] for e in tuned if e in model.end_points] + [model.logits]
+    parameters = [p for module in tail for p in module.parameters()]
+    for parameter in parameters:
+        parameter.requires_grad = True
+    optimizer = torch.optim.Adam(parameters, lr=args.lr, eps=1e-3, weight_decay=1e-7)
+
+    output = args.output or f"finetuned_nslt_{num_classes}.pt"
+    best = -1.0
+    for epoch in range(1, args.epochs + 1):
+        start = time.perf_counter()
+        model.train()
+        total_loss = 0.0
+        order = np.random.permutation(len(caches["train"]))
+        for i in range(0, len(order), args.batch_size):
+            x, labels = caches["train"].batch(order[i:i + args.batch_size])
+            loss = F.cross_entropy(run_tail(model, x, tuned).amax(dim=2), labels)
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * len(labels)
+
+        report = f"epoch {epoch:3d}  loss {total_loss / len(order):.4f}"
+        accuracy = None
+        if args.eval_subset in caches:
+            accuracy = evaluate(model, caches[args.eval_subset], tuned, args.batch_size)
+            report += (f"  {args.eval_subset} top1 {accuracy[0]:6.2f}  top5 {accuracy[1]:6.2f}"
+                       f"  top10 {accuracy[2]:6.2f}")
+        print(f"{report}  ({time.perf_counter() - start:.1f} s)")
+
+        # keep the best epoch, or the last one without an evaluation subset
+        score = accuracy[0] if accuracy is not None else epoch
+        if score > best:
+            best = score
+            torch.save(model.state_dict(), output)
+
+    print(f"Saved the fine-tuned model to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+This file contains the conversion that turns a trained I3D model into an equivalent one that's
+cheaper to run for inference. Run eagerly, every Unit3D works out its 'same' padding with NumPy,
+pads its input into a new tensor, then runs its convolution, batch norm and ReLU one after the
+other, and every MaxPool3dSamePadding pads and pools the same way.
+
+Once converted, each Unit3D's batch norm is folded into its convolution's weights and bias, and
+its ReLU runs in place on the convolution's output. 'Same' padding that's symmetric is left to
+the convolution or pooling itself, which pads as it goes instead of copying its input; padding
+that depends on the input's size (the strided layers) is worked out once per input shape and
+cached. The converted model gives the same logits, up to float rounding, and is for inference
+only: its batch norms are gone, so it can't be trained.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from I3D.pytorch_i3d import InceptionModule, MaxPool3dSamePadding, Unit3D
+
+def same_padding(kernel, stride, shape):
+    """
+    Split the 'same' padding Unit3D and MaxPool3dSamePadding use for an input shape into the
+    symmetric padding a convolution or pooling can apply itself, and the extra padding at the
+    end of each dimension that has to be added beforehand.
+
+    Args:
+        kernel: tuple - kernel size along time, height and width
+        stride: tuple - stride along time, height and width
+        shape: tuple - size of the input along time, height and width
+
+    Returns the symmetric padding of each dimension, and the extra padding in F.pad's order
+    (last dimension first) or None if there isn't any.
+    """
+    symmetric, extra = [], []
+    for k, s, size in zip(kernel, stride, shape):
+        pad = max(k - s, 0) if size % s == 0 else max(k - size % s, 0)
+        symmetric.append(pad // 2)
+        extra.append(pad - 2 * (pad // 2)) # the back gets the odd one out
+    if not any(extra):
+        return tuple(symmetric), None
+    return tuple(symmetric), tuple(p for e in reversed(extra) for p in (0, e))
+
+def fold_batch_norm(conv, bn):
+    """
+    A copy of a convolution with a batch norm, in evaluation mode, folded into its weights and
+    bias.
+
+    Args:
+        conv: nn.Conv3d - the convolution
+        bn: nn.BatchNorm3d - the batch norm applied to its output
+    """
+    fused = nn.Conv3d(conv.in_channels, conv.out_channels, conv.kernel_size, stride=conv.stride,
+                      padding=0, bias=True).to(conv.weight.device)
+
+    with torch.no_grad():
+        # bn(y) = (y - mean) * gamma / sqrt(var + eps) + beta, which scales each output channel
+        scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+        bias = conv.bias if conv.bias is not None else torch.zeros_like(bn.running_mean)
+        fused.weight.copy_(conv.weight * scale.view(-1, 1, 1, 1, 1))
+        fused.bias.copy_((bias - bn.running_mean) * scale + bn.bias)
+    return fused
+
+
+class FusedUnit3D(nn.Module):
+    """
+    A Unit3D with its batch norm folded into its convolution, for inference.
+
+    Args:
+        unit: Unit3D - the trained unit, its convolution is copied
+    """
+
+    def __init__(self, unit):
+        super(FusedUnit3D, self).__init__()
+        self._kernel_shape = tuple(unit.conv3d.kernel_size)
+        self._stride = tuple(unit.conv3d.stride)
+        self._relu = unit._activation_fn is not None
+        self.name = unit.name
+
+        if unit._use_batch_norm:
+            self.conv3d = fold_batch_norm(unit.conv3d, unit.bn)
+        else:
+            self.conv3d = unit.conv3d
+
+        # unstrided layers pad the same whatever the input's size, so that's left to the
+        # convolution; the strided ones look their padding up per input shape
+        self._pads = {} # (t, h, w) -> (symmetric padding, extra padding)
+        self._static = all(s == 1 for s in self._stride) and all(k % 2 for k in self._kernel_shape)
+        if self._static:
+            self.conv3d.padding = same_padding(self._kernel_shape, self._stride,
+                                               self._kernel_shape)[0]
+
+    def forward(self, x, out=None):
+        """
+        Args:
+            x: torch.Tensor - input of shape (batch, channels, frames, height, width)
+            out: torch.Tensor - optional, where the ReLU's output is written, e.g. a slice of a
+                larger tensor; only for units with a ReLU
+        """
+        if self._static:
+            x = self.conv3d(x)
+        else:
+            shape = tuple(x.shape[2:])
+            padding, extra = self._pads.get(shape) or self._pads.setdefault(
+                shape, same_padding(self._kernel_shape, self._stride, shape))
+            if extra is not None:
+                x = F.pad(x, extra)
+            x = F.conv3d(x, self.conv3d.weight, self.conv3d.bias, self._stride, padding)
+
+        if out is not None:
+            return torch.clamp_min(x, 0, out=out)
+
+        # the convolution's output is ours alone, so it can be overwritten
+        return F.relu(x, inplace=True) if self._relu else x
+
+
+class FusedMaxPool3d(nn.Module):
+    """
+    A MaxPool3dSamePadding that leaves its symmetric padding to the pooling and caches the rest
+    per input shape, for inference.
+
+    MaxPool3dSamePadding pads with zeros while the pooling's own padding never wins the max, the
+    same thing whenever the input isn't negative. Every pooling in I3D follows a ReLU, so that's
+    always the case there.
+
+    Args:
+        pool: MaxPool3dSamePadding - the pooling being replaced
+    """
+
+    def __init__(self, pool):
+        super(FusedMaxPool3d, self).__init__()
+        self._kernel_shape = tuple(pool.kernel_size)
+        self._stride = tuple(pool.stride)
+        self._pads = {} # (t, h, w) -> (symmetric padding, extra padding)
+
+    def forward(self, x):
+        shape = tuple(x.shape[2:])
+        padding, extra = self._pads.get(shape) or self._pads.setdefault(
+            shape, same_padding(self._kernel_shape, self._stride, shape))
+        if extra is not None:
+            x = F.pad(x, extra)
+        return F.max_pool3d(x, self._kernel_shape, self._stride, padding)
+
+
+class FusedInceptionModule(nn.Module):
+    """
+    An InceptionModule with its units fused, for inference. The three 1x1x1 convolutions that
+    read the module's input (b0, b1a and b2a) are merged into a single wider one whose output is
+    split between the branches, and each branch's ReLU writes its output straight into its slice
+    of the module's output instead of it being concatenated afterwards.
+
+    Args:
+        module: InceptionModule - the trained module, its units are copied
+    """
+
+    def __init__(self, module):
+        super(FusedInceptionModule, self).__init__()
+        self.name = module.name
+
+        b0, b1a, b2a = (FusedUnit3D(unit) for unit in (module.b0, module.b1a, module.b2a))
+        self.b1b = FusedUnit3D(module.b1b)
+        self.b2b = FusedUnit3D(module.b2b)
+        self.b3a = FusedMaxPool3d(module.b3a)
+        self.b3b = FusedUnit3D(module.b3b)
+
+        # the merged convolution, whose output channels are b0's, then b1a's, then b2a's
+        units = (b0, b1a, b2a)
+        self.b012a = nn.Conv3d(b0.conv3d.in_channels, sum(u.conv3d.out_channels for u in units),
+                               kernel_size=1, bias=True).to(b0.conv3d.weight.device)
+        with torch.no_grad():
+            self.b012a.weight.copy_(torch.cat([u.conv3d.weight for u in units]))
+            self.b012a.bias.copy_(torch.cat([u.conv3d.bias for u in units]))
+
+        # where each branch's output starts and ends in the module's output
+        widths = (b0.conv3d.out_channels, self.b1b.conv3d.out_channels,
+                  self.b2b.conv3d.out_channels, self.b3b.conv3d.out_channels)
+        self._bounds = [(sum(widths[:i]), sum(widths[:i + 1])) for i in range(len(widths))]
+        self._reduced = b0.conv3d.out_channels # b0's share of the merged convolution
+
+    def forward(self, x):
+        reduced = self.b012a(x)
+
+        # b0 is done once activated, b1a and b2a's outputs go on to their 3x3x3 convolutions
+        branches = F.relu(reduced[:, self._reduced:], inplace=True)
+        b1a, b2a = branches.split([self.b1b.conv3d.in_channels, self.b2b.conv3d.in_channels],
+                                  dim=1)
+
+        # traced and compiled graphs can't see writes made through out=, and concatenate
+        # efficiently by themselves anyway
+        if torch.jit.is_tracing() or torch.compiler.is_compiling():
+            return torch.cat([F.relu(reduced[:, :self._reduced]), self.b1b(b1a), self.b2b(b2a),
+                              self.b3b(self.b3a(x))], dim=1)
+
+        # the output is laid out like the input, and in the dtype the convolutions run in
+        (batch, _, t, h, w) = reduced.shape
+        channels_last = (not x.is_contiguous()
+                         and x.is_contiguous(memory_format=torch.channels_last_3d))
+        out = torch.empty((batch, self._bounds[-1][1], t, h, w), dtype=reduced.dtype,
+                          device=reduced.device,
+                          memory_format=(torch.channels_last_3d if channels_last
+                                         else torch.contiguous_format))
+        (b0, b1, b2, b3) = (out[:, start:end] for start, end in self._bounds)
+
+        torch.clamp_min(reduced[:, :self._reduced], 0, out=b0)
+        self.b1b(b1a, out=b1)
+        self.b2b(b2a, out=b2)
+        self.b3b(self.b3a(x), out=b3)
+        return out
+
+
+def fuse_for_inference(model):
+    """
+    Convert a trained model for inference, in place: every InceptionModule is replaced by a
+    FusedInceptionModule, every other Unit3D by a FusedUnit3D and every MaxPool3dSamePadding by
+    a FusedMaxPool3d. The model is put in evaluation mode, which the batch norms are folded
+    in, and returned.
+
+    Args:
+        model: InceptionI3d - the model, with its weights loaded
+    """
+    model.eval()
+
+    def replace(module):
+        for child_name, child in module.named_children():
+            if isinstance(child, InceptionModule):
+                setattr(module, child_name, FusedInceptionModule(child))
+            elif isinstance(child, Unit3D):
+                setattr(module, child_name, FusedUnit3D(child))
+            elif isinstance(child, MaxPool3dSamePadding):
+                setattr(module, child_name, FusedMaxPool3d(child))
+            else:
+                replace(child)
+
+    replace(model)
+
+    # the endpoints are also kept in a dictionary, which has to point at the new modules
+    if hasattr(model, "end_points"):
+        model.end_points = {name: model._modules[name] for name in model.end_points}
+    return model.eval()
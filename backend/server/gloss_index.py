@@ -0,0 +1,372 @@
+"""
+This file contains the gloss index, which recognizes signs by comparing a clip's I3D embedding
+(see InceptionI3d.extract_features) with the embeddings of reference clips of each gloss, rather
+than with the logits layer. Adding a sign to the index is embedding a few clips of it, with no
+retraining or replace_logits, and removing one is dropping its rows; the index is saved to a .npz
+file so the vocabulary it holds survives a restart.
+
+The embeddings are L2 normalized and kept in one float32 matrix, so a lookup is a single matrix
+product for the cosine similarity to every reference clip followed by a partial sort: under a
+millisecond on one CPU core for a few thousand clips, next to the seconds the backbone pass takes.
+
+The index lives in each process's memory. When the server runs several workers, each loads the
+file and a change made through one of them only reaches the others when they notice the file was
+rewritten, which they check before every lookup and change; two changes made at the same moment
+through different workers can still overwrite each other, so larger edits are best made offline
+with this script.
+
+To add a sign from its clips, or every sign of a directory holding a folder of clips per gloss,
+use the following commands from the server directory:
+    python gloss_index.py add <gloss> <videos> --index gloss_index.npz
+    python gloss_index.py build <directory> --index gloss_index.npz
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+
+from embed import embed_videos, list_videos
+from engine import InferenceEngine, configure_threads, resolve_device
+from fusion import fuse_for_inference
+from registry import MODEL_CLASSES, load_model
+
+
+class GlossIndex:
+    """
+    A thread-safe nearest-neighbor index of reference clip embeddings labeled with their gloss.
+
+    Args:
+        model: str - model whose backbone the embeddings come from, e.g. 'asl100'; only
+            embeddings from the same model and endpoint can be compared
+        endpoint: str - endpoint of the model the embeddings are taken at, e.g. 'Mixed_5c'
+        path: str - optional .npz file the index is loaded from if it exists, and saved to
+    """
+
+    def __init__(self, model="asl100", endpoint="Mixed_5c", path=None):
+        self.model = model
+        self.endpoint = endpoint
+        self.path = path
+        self.version = 0 # bumped by every change, so results from an older index can be told apart
+
+        # the normalized embeddings fill the first _count rows of _vectors, which grows by
+        # doubling so adding clips one at a time stays cheap; _labels holds each row's gloss as
+        # an index into glosses
+        self.glosses = []
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._labels = np.zeros(0, dtype=np.int64)
+        self._count = 0
+        self._lock = threading.Lock()
+
+        # changes and writes to the file are made one at a time, and searches keep going while
+        # the file is written; _mtime is the file's modification time when last read or written
+        self._write_lock = threading.RLock()
+        self._mtime = None
+
+        self.refresh()
+
+    def add(self, gloss, embeddings):
+        """
+        Add reference clips of a gloss, which becomes part of the vocabulary if it wasn't.
+
+        Args:
+            gloss: str - the gloss the clips show
+            embeddings: array - one embedding of shape (channels,), or several of shape
+                (clips, channels)
+
+        Returns the number of reference clips the gloss now has.
+        """
+        embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.maximum(norms, 1e-12)
+
+        with self._write_lock:
+            self.refresh()
+            with self._lock:
+                clips = self._add(gloss, embeddings)
+            self._persist()
+            return clips
+
+    def _add(self, gloss, embeddings):
+        """
+        Add normalized reference clips of a gloss. Called with the lock held.
+        """
+        if self._count and embeddings.shape[1] != self._vectors.shape[1]:
+            raise ValueError(f"Embeddings have {embeddings.shape[1]} channels, the index "
+                             f"holds {self._vectors.shape[1]}")
+        if gloss not in self.glosses:
+            self.glosses.append(gloss)
+        label = self.glosses.index(gloss)
+
+        needed = self._count + len(embeddings)
+        if needed > len(self._vectors) or embeddings.shape[1] != self._vectors.shape[1]:
+            capacity = max(needed, 2 * len(self._vectors), 64)
+            vectors = np.zeros((capacity, embeddings.shape[1]), dtype=np.float32)
+            labels = np.zeros(capacity, dtype=np.int64)
+            if self._count:
+                vectors[:self._count] = self._vectors[:self._count]
+                labels[:self._count] = self._labels[:self._count]
+            self._vectors, self._labels = vectors, labels
+
+        self._vectors[self._count:needed] = embeddings
+        self._labels[self._count:needed] = label
+        self._count = needed
+        self.version += 1
+        return int((self._labels[:self._count] == label).sum())
+
+    def remove(self, gloss):
+        """
+        Remove a gloss and all of its reference clips from the vocabulary.
+
+        Args:
+            gloss: str - the gloss to remove
+
+        Returns the number of reference clips removed, 0 if the gloss wasn't in the index.
+        """
+        with self._write_lock:
+            self.refresh()
+            with self._lock:
+                removed = self._remove(gloss)
+            if removed:
+                self._persist()
+            return removed
+
+    def _remove(self, gloss):
+        """
+        Remove a gloss and its reference clips. Called with the lock held.
+        """
+        if gloss not in self.glosses:
+            return 0
+        label = self.glosses.index(gloss)
+        keep = self._labels[:self._count] != label
+        removed = self._count - int(keep.sum())
+
+        # later glosses move down one to fill the gap
+        labels = self._labels[:self._count][keep]
+        self._labels[:len(labels)] = labels - (labels > label)
+        self._vectors[:len(labels)] = self._vectors[:self._count][keep]
+        self._count = len(labels)
+        del self.glosses[label]
+        self.version += 1
+        return removed
+
+    def search(self, embedding, k=1):
+        """
+        The k glosses whose reference clips are most similar to an embedding, most similar first.
+        Each gloss is scored by the cosine similarity of its nearest reference clip.
+
+        Args:
+            embedding: array - embedding of shape (channels,) of the clip being recognized
+            k: int - most glosses returned
+
+        Returns a list of (gloss, cosine similarity) pairs, empty if the index is.
+        """
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        self.refresh()
+        with self._lock:
+            if not self._count:
+                return []
+            if query.shape[0] != self._vectors.shape[1]:
+                raise ValueError(f"Embedding has {query.shape[0]} channels, the index holds "
+                                 f"{self._vectors.shape[1]}")
+            similarities = self._vectors[:self._count] @ query
+
+            # each gloss's nearest clip, then only the best k glosses are sorted
+            scores = np.full(len(self.glosses), -np.inf, dtype=np.float32)
+            np.maximum.at(scores, self._labels[:self._count], similarities)
+            k = min(k, len(scores))
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            return [(self.glosses[label], float(scores[label])) for label in best]
+
+    def __len__(self):
+        with self._lock:
+            return self._count
+
+    def counts(self):
+        """
+        Number of reference clips of each gloss in the index.
+        """
+        with self._lock:
+            clips = np.bincount(self._labels[:self._count], minlength=len(self.glosses))
+            return {gloss: int(count) for gloss, count in zip(self.glosses, clips)}
+
+    def stats(self):
+        """
+        Summary of the index's vocabulary and size.
+        """
+        with self._lock:
+            return {
+                "model": self.model,
+                "endpoint": self.endpoint,
+                "glosses": len(self.glosses),
+                "clips": self._count,
+                "channels": self._vectors.shape[1] if self._count else 0,
+                "version": self.version,
+            }
+
+    def save(self, path=None):
+        """
+        Write the index to a .npz file.
+
+        Args:
+            path: str - optional, where to save it instead of the index's own path
+        """
+        with self._write_lock:
+            self._write(path or self.path)
+
+    def refresh(self):
+        """
+        Reload the index if its file was rewritten since it was last read or written here, e.g.
+        by another server worker or by this script.
+
+        Returns whether the index was reloaded.
+        """
+        if not self.path:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+
+        with self._write_lock:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return False # reloaded while we waited for the lock
+            with np.load(self.path) as saved:
+                loaded = (str(saved["model"]), str(saved["endpoint"]),
+                          [str(gloss) for gloss in saved["glosses"]],
+                          saved["vectors"].astype(np.float32), saved["labels"].astype(np.int64))
+            with self._lock:
+                self.model, self.endpoint, self.glosses, self._vectors, self._labels = loaded
+                self._count = len(self._labels)
+                self.version += 1
+            self._mtime = mtime
+            return True
+
+    def _persist(self):
+        """
+        Save a change made to the index if it has a path. Called with the write lock held.
+        """
+        if self.path:
+            self._write(self.path)
+
+    def _write(self, path):
+        """
+        Write the index to a .npz file, replaced atomically so a crash can't leave it half
+        written. Only copying the arrays holds up searches, the writing happens outside the lock.
+        Called with the write lock held.
+        """
+        with self._lock:
+            snapshot = {"vectors": self._vectors[:self._count].copy(),
+                        "labels": self._labels[:self._count].copy(),
+                        "glosses": np.array(self.glosses, dtype=str),
+                        "model": self.model, "endpoint": self.endpoint}
+
+        temp_path = path + ".tmp.npz" # np.savez appends .npz to names without it
+        np.savez(temp_path, **snapshot)
+        os.replace(temp_path, path)
+        if path == self.path:
+            self._mtime = os.stat(path).st_mtime_ns # our own write doesn't need reloading
+
+
+def embed_glosses(glosses, model, endpoint, max_frames=64, batch_size=8, device="auto",
+                  random_weights=False):
+    """
+    Embed the reference clips of each gloss with a model's backbone.
+
+    Args:
+        glosses: dict - gloss -> list of paths of its videos
+        model: str - the model whose backbone embeds the clips
+        endpoint: str - the endpoint the clips are embedded at
+        max_frames: int - most frames of a video used, as on the server
+        batch_size: int - most clips run at once
+        device: str - 'auto', 'cuda' or 'cpu'
+        random_weights: bool - don't load the archived checkpoint
+
+    Returns gloss -> array of shape (clips, channels), leaving out videos that couldn't be
+    decoded.
+    """
+    engine = InferenceEngine(fuse_for_inference(load_model(model, random_weights)),
+                             device=resolve_device(device))
+    videos = [(gloss, path) for gloss, paths in glosses.items() for path in paths]
+    order, _, embeddings = embed_videos(engine, [path for _, path in videos], (endpoint,),
+                                        max_frames, batch_size)
+
+    embedded = {}
+    for row, i in enumerate(order):
+        embedded.setdefault(videos[i][0], []).append(embeddings[endpoint][row])
+    return {gloss: np.stack(rows) for gloss, rows in embedded.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the gloss index used for kNN "
+                                                 "recognition.")
+    parser.add_argument("--index", default="gloss_index.npz", help="the index's .npz file")
+    parser.add_argument("--model", default="asl100", choices=sorted(MODEL_CLASSES),
+                        help="backbone of a new index, an existing one keeps its own")
+    parser.add_argument("--endpoint", default="Mixed_5c",
+                        help="endpoint of a new index, an existing one keeps its own")
+    parser.add_argument("--max-frames", type=int, default=64, help="frame budget per video")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--device", default="auto", help="'auto', 'cuda' or 'cpu'")
+    parser.add_argument("--threads", type=int, default=0, help="0 keeps torch's default")
+    parser.add_argument("--random-weights", action="store_true",
+                        help="don't load the archived checkpoint, e.g. when it isn't downloaded")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="add reference clips of a gloss")
+    add.add_argument("gloss")
+    add.add_argument("videos", nargs="+", help="videos, or directories of videos")
+    build = commands.add_parser("build", help="add every folder of a directory as a gloss")
+    build.add_argument("directory", help="holds a folder of videos named after each gloss")
+    remove = commands.add_parser("remove", help="remove glosses and their clips")
+    remove.add_argument("glosses", nargs="+")
+    commands.add_parser("list", help="list the glosses and their number of clips")
+    args = parser.parse_args()
+
+    index = GlossIndex(args.model, args.endpoint, path=args.index)
+
+    if args.command in ("add", "build"):
+        if args.command == "add":
+            glosses = {args.gloss: list_videos(args.videos)}
+        else:
+            glosses = {folder: list_videos([os.path.join(args.directory, folder)])
+                       for folder in sorted(os.listdir(args.directory))
+                       if os.path.isdir(os.path.join(args.directory, folder))}
+        glosses = {gloss: videos for gloss, videos in glosses.items() if videos}
+        if not glosses:
+            parser.error("no videos found")
+
+        configure_threads(args.threads)
+        start = time.perf_counter()
+        embedded = embed_glosses(glosses, index.model, index.endpoint, args.max_frames,
+                                 args.batch_size, args.device, args.random_weights)
+        for gloss, embeddings in embedded.items():
+            clips = index.add(gloss, embeddings)
+            print(f"Added {len(embeddings)} clips of {gloss}, which now has {clips}")
+        print(f"Embedded {sum(map(len, embedded.values()))} clips in "
+              f"{time.perf_counter() - start:.1f} s")
+
+    elif args.command == "remove":
+        for gloss in args.glosses:
+            print(f"Removed {index.remove(gloss)} clips of {gloss}")
+
+    stats = index.stats()
+    print(f"{args.index}: {stats['glosses']} glosses, {stats['clips']} clips of {stats['model']} "
+          f"embeddings at {stats['endpoint']}")
+    if args.command == "list":
+        for gloss, clips in index.counts().items():
+            print(f"  {gloss:<24} {clips} clips")
+
+
+if __name__ == "__main__":
+    main()
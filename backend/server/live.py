@@ -0,0 +1,117 @@
+"""
+This file contains the pieces used to recognize signs from a live stream of frames sent over a
+WebSocket. Incoming frames are decoded and resized into a ring buffer, and every `stride` frames
+the most recent window is handed to the model, so the delay before a sign is recognized is
+bounded by the stride rather than by the length of a recorded clip.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import av
+import cv2
+import numpy as np
+
+from video import normalize_frames
+
+LIVE_FORMATS = ("raw", "image", "h264")
+
+
+class LiveDecoder:
+    """
+    Turns the binary messages of a live stream into BGR frames.
+
+    Args:
+        format: str - how the frames are sent:
+            'raw' - each message is one uncompressed BGR frame of size x size x 3 bytes
+            'image' - each message is one encoded image, e.g. a JPEG or PNG
+            'h264' - messages are consecutive chunks of an H.264 Annex B byte stream
+        size: int - height and width of raw frames
+    """
+
+    def __init__(self, format="raw", size=224):
+        if format not in LIVE_FORMATS:
+            raise ValueError('Unknown live stream format %s' % format)
+
+        self.format = format
+        self.size = size
+        self._codec = av.CodecContext.create("h264", "r") if format == "h264" else None
+
+    def decode(self, data):
+        """
+        Decode one message, returning the list of frames it contained (possibly none, e.g. for
+        an H.264 chunk that doesn't complete a frame).
+
+        Args:
+            data: bytes - the message
+        """
+        if self.format == "raw":
+            if len(data) != self.size * self.size * 3:
+                raise ValueError(f"raw frames must be {self.size}x{self.size}x3 bytes")
+            return [np.frombuffer(data, dtype=np.uint8).reshape(self.size, self.size, 3)]
+
+        if self.format == "image":
+            frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                raise ValueError("message is not an image we can decode")
+            return [frame]
+
+        # the parser splits the byte stream into packets, keeping partial ones for the next chunk
+        frames = []
+        try:
+            for packet in self._codec.parse(data):
+                for frame in self._codec.decode(packet):
+                    frames.append(frame.to_ndarray(format="bgr24"))
+        except av.error.FFmpegError as e:
+            raise ValueError(f"couldn't decode H.264 chunk: {e}")
+        return frames
+
+
+class FrameRing:
+    """
+    A fixed-size ring buffer holding the most recent resized frames of a live stream.
+
+    Args:
+        window: int - number of frames held, i.e. the length of the clips given to the model
+        size: int - height and width the frames are resized to
+    """
+
+    def __init__(self, window=64, size=224):
+        self.window = window
+        self.size = size
+        self.frames = np.empty((window, size, size, 3), dtype=np.uint8)
+        self.count = 0 # frames pushed since the stream started
+
+    @property
+    def full(self):
+        """
+        Whether a whole window of frames has been received.
+        """
+        return self.count >= self.window
+
+    def push(self, frame):
+        """
+        Add a frame, overwriting the oldest one once the buffer is full.
+
+        Args:
+            frame: np.ndarray - BGR frame of any size
+        """
+        slot = self.frames[self.count % self.window]
+        if frame.shape == slot.shape:
+            slot[...] = frame
+        else:
+            cv2.resize(frame, dsize=(self.size, self.size), dst=slot)
+        self.count += 1
+
+    def clip(self, dtype):
+        """
+        The frames currently held, oldest first, normalized into a clip for the model of shape
+        (channels, frames, height, width).
+
+        Args:
+            dtype: torch.dtype - the model's input dtype
+        """
+        held = min(self.count, self.window)
+        order = (self.count - held + np.arange(held)) % self.window
+        return normalize_frames(self.frames[order], dtype)
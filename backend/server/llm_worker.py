@@ -0,0 +1,255 @@
+"""
+This file contains the long-lived worker that owns the LLM used to summarize the predicted words
+into a sentence.
+
+Opening a new chat session for every summary makes the model re-process the same long system and
+instruction prompt each time. The worker instead evaluates that prefix once, and after every
+summary rewinds the model's context to the end of it: the next request only prefills its own
+short list of words, and never sees the words of the requests before it, so the same words
+always get the same summary whoever asked before. The GPT4All bindings don't expose a way to
+snapshot and restore the model's state, so the rewind moves the session's position in the
+context back and trims its history. Those are internals of the bindings, tested with gpt4all
+2.8.2 (pinned in requirements.txt); models that don't have them (e.g. StubLLM, or other bindings),
+or whose rewind fails, get a fresh chat session for every request instead, re-evaluating the
+prefix each time.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import time
+from contextlib import ExitStack, contextmanager
+
+# instructions shared by every summary, evaluated once per session
+SYSTEM_PROMPT = """
+You are a model loaded in the backend of a server, with the sole responsibility of the following:
+
+Each message you receive is a new, independent list of words generated by interpreting American
+Sign Language (ASL) into English text. Summarize the words into a single, coherent sentence.
+Please only use the words provided in the list and do not add any additional information or
+context. The sentence should be simple, understandable, and concise.
+
+Respond only with the sentence. Do not include any other words, explanations, or code.
+"""
+
+def summary_prompt(translations):
+    """
+    The part of the prompt that is specific to a request: the list of words to summarize.
+
+    Args:
+        translations: str - the predicted words, separated by spaces
+    """
+    return "Here is the list of words: " + translations
+
+
+class StubLLM:
+    """
+    Stands in for GPT4All when the server has to run offline, e.g. under a load test. It has
+    the same interface, and "summarizes" the words by streaming them back one at a time.
+
+    Args:
+        token_ms: float - time each token takes to generate, to mimic a real model's throughput
+    """
+
+    def __init__(self, token_ms=0.0):
+        self.token_ms = token_ms
+
+    @contextmanager
+    def chat_session(self, system_prompt=None):
+        yield
+
+    def generate(self, prompt, max_tokens=200, streaming=False):
+        """
+        Generate the response to a prompt: the list of words it ends with.
+        """
+        words = prompt.split(":", 1)[-1].split()[:max_tokens]
+        tokens = [(" " if i else "") + word for i, word in enumerate(words)]
+
+        def stream():
+            for token in tokens:
+                if self.token_ms:
+                    time.sleep(self.token_ms / 1000)
+                yield token
+
+        return stream() if streaming else "".join(stream())
+
+
+class LLMWorker:
+    """
+    Keeps a chat session open on the LLM with the system prompt already evaluated, and puts the
+    conversation back to the system prompt alone after every request. It isn't thread safe, so
+    every call should come from the same thread (the server's LLM stage).
+
+    Args:
+        llm: GPT4All - the loaded model
+        system_prompt: str - the instructions every summary shares, evaluated once per session
+        max_tokens: int - most tokens generated per request
+        log: callable - called with a message if rewinding fails and sessions are replaced instead
+    """
+
+    def __init__(self, llm, system_prompt, max_tokens=48, log=print):
+        self.llm = llm
+        self.system_prompt = system_prompt
+        self.max_tokens = max_tokens
+        self.log = log
+
+        # bookkeeping on the sessions and how long prefill takes
+        self.sessions = 0
+        self.requests = 0
+        self.prefix_ms = 0.0 # time the system prompt took to evaluate when the session opened
+        self.total_prefill_ms = 0.0
+        self.last_prefill_ms = 0.0
+
+        # bookkeeping on how fast tokens are generated once prefill is done
+        self.tokens = 0
+        self.total_generation_ms = 0.0
+        self.last_tokens_per_second = 0.0
+
+        self._session = None
+        self._prefix = None # position in the model's context where the system prompt ends
+        self._rewind_error = None # why rewinding was given up on, if it was
+
+    @property
+    def rewinds(self):
+        """
+        Whether the session is rewound to the system prompt after every request, rather than
+        replaced by a new one.
+        """
+        return self._prefix is not None
+
+    def start(self):
+        """
+        Open the session and have the model evaluate the system prompt right away, so the
+        first real request doesn't pay for it. Nothing is added to the conversation or counted
+        as a request.
+        """
+        self._open()
+        return self
+
+    def stop(self):
+        """
+        Close the session.
+        """
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+        self._prefix = None
+
+    def generate(self, prompt, on_token=None, max_tokens=None):
+        """
+        Generate a response to a prompt after the system prompt alone.
+
+        Args:
+            prompt: str - the request's own part of the prompt, e.g. the list of words
+            on_token: callable - optional, called with each token as soon as it's generated
+            max_tokens: int - optional, overrides the worker's token budget for this request
+        """
+        if self._session is None:
+            self._open()
+
+        start = time.perf_counter()
+        first_token = None
+        tokens = []
+        try:
+            for token in self.llm.generate(prompt, max_tokens=max_tokens or self.max_tokens,
+                                           streaming=True):
+                # the time until the first token is how long the prompt took to prefill
+                if first_token is None:
+                    first_token = time.perf_counter()
+                tokens.append(token)
+                if on_token is not None:
+                    on_token(token)
+        finally:
+            self._reset()
+
+        end = time.perf_counter()
+        self.requests += 1
+        self.last_prefill_ms = ((first_token or end) - start) * 1000
+        self.total_prefill_ms += self.last_prefill_ms
+
+        # the first token comes out of prefill, the rest are decoded one by one after it
+        generation_ms = (end - (first_token or end)) * 1000
+        self.tokens += len(tokens)
+        self.total_generation_ms += generation_ms
+        self.last_tokens_per_second = ((len(tokens) - 1) * 1000 / generation_ms
+                                       if generation_ms > 0 else 0.0)
+
+        return "".join(tokens).strip()
+
+    def stats(self):
+        """
+        Summary of the sessions and how long prefill has taken.
+        """
+        return {
+            "requests": self.requests,
+            "sessions_opened": self.sessions,
+            "rewinds": self.rewinds,
+            "rewind_error": self._rewind_error,
+            "prefix_ms": self.prefix_ms,
+            "last_prefill_ms": self.last_prefill_ms,
+            "avg_prefill_ms": self.total_prefill_ms / self.requests if self.requests else 0.0,
+            "tokens": self.tokens,
+            "tokens_per_second": (self.tokens * 1000 / self.total_generation_ms
+                                  if self.total_generation_ms else 0.0),
+        }
+
+    def _open(self):
+        """
+        Close the current session, if any, and open a fresh one with the system prompt. With
+        GPT4All the system prompt is evaluated straight away, the way the bindings do on a
+        session's first turn, and the point in the context where it ends is kept to rewind to.
+        """
+        self.stop()
+        self._session = ExitStack()
+        self._session.enter_context(self.llm.chat_session(self.system_prompt))
+        self.sessions += 1
+
+        history = getattr(self.llm, "_history", None)
+        model = getattr(self.llm, "model", None)
+        if self._rewind_error is not None or not isinstance(history, list) \
+                or not hasattr(model, "prompt_model"):
+            return # evaluated on the first request instead, in a session of its own
+
+        try:
+            start = time.perf_counter()
+            model.prompt_model(self.system_prompt, "%1%2", lambda token_id, response: True,
+                               n_predict=0, reset_context=True, special=True)
+            self.prefix_ms = (time.perf_counter() - start) * 1000
+            prefix = model.context.n_past
+        except Exception as e:
+            # the bindings changed under us, so the session may be half set up; start over
+            # with a plain one
+            self._give_up_rewinding(e)
+            self._open()
+            return
+        self._prefix = prefix
+
+        # the bindings evaluate the system prompt again whenever it's the only message, so
+        # history after it marks it as evaluated; only the current turn is ever formatted
+        history[1:] = [{"role": "user", "content": ""}, {"role": "assistant", "content": ""}]
+
+    def _reset(self):
+        """
+        Put the conversation back to the system prompt alone once a request is done, so the
+        next one doesn't see its words.
+        """
+        if self._prefix is None:
+            self.stop() # the next request gets a session of its own
+            return
+        try:
+            self.llm.model.context.n_past = self._prefix
+            del self.llm._history[3:]
+        except Exception as e:
+            self._give_up_rewinding(e)
+            self.stop()
+
+    def _give_up_rewinding(self, error):
+        """
+        Stop rewinding the session after the bindings' internals didn't behave as expected, so
+        every later request gets a fresh chat session instead.
+        """
+        self._rewind_error = f"{type(error).__name__}: {error}"
+        self._prefix = None
+        self.log(f"Can't rewind the LLM session ({self._rewind_error}), opening a new session "
+                 + "for every summary instead")
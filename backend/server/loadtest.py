@@ -0,0 +1,412 @@
+"""
+This script load tests /predict_video on a running server, so its throughput and latency can be
+measured before a deploy. Clips are either synthesized (a moving shape over a textured
+background, at the length, resolution and frame rate asked for) or replayed from a directory of
+WLASL videos, and sent the way the frontend sends them: a sentence of clips with buffer=1 under
+one session, finished by a clip with buffer=0 that has the LLM summarize it.
+
+Load is applied either at a fixed concurrency (that many users sending sentences back to back)
+or at a fixed arrival rate (new sentences started at random at that many per second, however
+slow the server gets). The report gives the p50, p95 and p99 latency, throughput and errors of
+the buffered clips and of the finishing ones.
+
+To load test a server that's already running:
+    python loadtest.py --url http://127.0.0.1:8000 --concurrency 8 --duration 60
+
+To start a server with a stub in place of the LLM, so the test runs offline, then test it:
+    python loadtest.py --launch --rate 2 --duration 60 --video-dir <path_to_WLASL_videos>
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import requests
+
+def synthesize_video(frames, width, height, fps, seed):
+    """
+    Encode an mp4 of a filled circle moving across a random textured background, standing in
+    for a signer's hand. Each seed gives a different video, so uploads aren't byte-identical and
+    don't hit the server's prediction cache.
+
+    Args:
+        frames: int - length of the video, in frames
+        width: int - width of the video, in pixels
+        height: int - height of the video, in pixels
+        fps: float - frame rate of the video
+        seed: int - seed of the background, colour and path of the circle
+    """
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8),
+                                  (0, 0), sigmaX=max(width, height) / 40)
+    colour = tuple(int(c) for c in rng.integers(0, 256, 3))
+    start, end = rng.random(2), rng.random(2)
+    radius = max(min(width, height) // 8, 1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "clip.mp4")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+        for i in range(frames):
+            position = start + (end - start) * i / max(frames - 1, 1)
+            frame = background.copy()
+            cv2.circle(frame, (int(position[0] * width), int(position[1] * height)), radius,
+                       colour, thickness=-1)
+            writer.write(frame)
+        writer.release()
+
+        with open(path, "rb") as file:
+            return file.read()
+
+def load_videos(args):
+    """
+    The encoded videos the clips are picked from: every .mp4 in the video directory, or a set
+    of synthesized ones.
+    """
+    if args.video_dir:
+        paths = sorted(glob.glob(os.path.join(args.video_dir, "*.mp4")))[:args.videos or None]
+        videos = []
+        for path in paths:
+            with open(path, "rb") as file:
+                videos.append(file.read())
+        return videos
+
+    return [synthesize_video(args.frames, args.width, args.height, args.fps, seed)
+            for seed in range(args.videos or 32)]
+
+def percentile(values, q):
+    """
+    The q-th percentile of a list of values, 0 if it's empty.
+    """
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+class Results:
+    """
+    Collects the outcome of every request sent, from any thread.
+    """
+
+    def __init__(self):
+        self.latencies = {"buffer=1": [], "buffer=0": []} # successful requests, in seconds
+        self.errors = {"buffer=1": Counter(), "buffer=0": Counter()} # failures by cause
+        self.sentences = 0
+        self.lag = [] # how late each sentence started, when driven at an arrival rate
+        self._lock = threading.Lock()
+
+    def record(self, kind, seconds, error=None):
+        """
+        Record a request's latency, or why it failed.
+
+        Args:
+            kind: str - 'buffer=1' for a buffered clip, 'buffer=0' for a finishing one
+            seconds: float - time until the whole response was received
+            error: str - optional, the HTTP status or exception that made the request fail
+        """
+        with self._lock:
+            if error is None:
+                self.latencies[kind].append(seconds)
+            else:
+                self.errors[kind][error] += 1
+
+    def started(self, lag):
+        """
+        Record that a sentence started the given number of seconds after it was scheduled to.
+        """
+        with self._lock:
+            self.lag.append(lag)
+
+    def finished(self):
+        """
+        Record that every clip of a sentence was answered.
+        """
+        with self._lock:
+            self.sentences += 1
+
+    def report(self, elapsed):
+        """
+        Summary of every request sent over the given number of seconds.
+        """
+        with self._lock:
+            kinds = {kind: {"requests": len(self.latencies[kind]) + sum(self.errors[kind].values()),
+                            "errors": dict(self.errors[kind]),
+                            "p50_ms": percentile(self.latencies[kind], 50) * 1000,
+                            "p95_ms": percentile(self.latencies[kind], 95) * 1000,
+                            "p99_ms": percentile(self.latencies[kind], 99) * 1000}
+                     for kind in self.latencies}
+            every = self.latencies["buffer=1"] + self.latencies["buffer=0"]
+            total = sum(kind["requests"] for kind in kinds.values())
+            failed = total - len(every)
+
+            report = {"elapsed_s": elapsed, "requests": total, "sentences": self.sentences,
+                      "throughput_rps": len(every) / elapsed if elapsed else 0.0,
+                      "sentences_per_s": self.sentences / elapsed if elapsed else 0.0,
+                      "error_rate": failed / total if total else 0.0,
+                      "p50_ms": percentile(every, 50) * 1000,
+                      "p95_ms": percentile(every, 95) * 1000,
+                      "p99_ms": percentile(every, 99) * 1000,
+                      "by_kind": kinds}
+            if self.lag:
+                report["start_lag_p99_ms"] = percentile(self.lag, 99) * 1000
+            return report
+
+
+class LoadTest:
+    """
+    Sends sentences of clips to the server and records how each request went.
+
+    Args:
+        args: Namespace - the command line arguments
+        videos: list of bytes - the encoded videos clips are picked from
+    """
+
+    def __init__(self, args, videos):
+        self.args = args
+        self.videos = videos
+        self.results = Results()
+        self.deadline = time.perf_counter() + args.duration
+        self._sent = 0 # requests started so far, to stop after --requests of them
+        self._lock = threading.Lock()
+        self._local = threading.local() # each thread keeps its own HTTP connection
+
+    def running(self):
+        """
+        Whether there's time and request budget left to start another request.
+        """
+        if time.perf_counter() >= self.deadline:
+            return False
+        with self._lock:
+            if self.args.requests and self._sent >= self.args.requests:
+                return False
+            self._sent += 1
+            return True
+
+    def send_clip(self, session_id, buffer):
+        """
+        Upload a random clip the way the frontend does and record how it went. Returns whether
+        the request succeeded.
+        """
+        if not hasattr(self._local, "http"):
+            self._local.http = requests.Session()
+
+        kind = f"buffer={buffer}"
+        data = {"buffer": buffer, "session_id": session_id}
+        if self.args.model:
+            data["model"] = self.args.model
+
+        start = time.perf_counter()
+        try:
+            response = self._local.http.post(
+                self.args.url.rstrip("/") + "/predict_video", data=data,
+                files={"file": ("clip.mp4", random.choice(self.videos), "video/mp4")},
+                timeout=self.args.timeout)
+            error = None if response.status_code == 200 else str(response.status_code)
+        except requests.RequestException as e:
+            error = type(e).__name__
+        self.results.record(kind, time.perf_counter() - start, error)
+        return error is None
+
+    def sentence(self):
+        """
+        Send one sentence: buffered clips under a new session, then the clip that finishes it.
+        With --words 0 clips are only ever buffered.
+        """
+        session_id = f"loadtest-{uuid.uuid4().hex}"
+        words = self.args.words
+        for i in range(max(words, 1)):
+            finishing = words > 0 and i == words - 1
+            if not self.running() or not self.send_clip(session_id, 0 if finishing else 1):
+                return
+        self.results.finished()
+
+    def run_concurrency(self, users):
+        """
+        Keep a fixed number of users sending sentences back to back until the test is over.
+        """
+        def user():
+            while time.perf_counter() < self.deadline and not self.exhausted():
+                self.sentence()
+
+        threads = [threading.Thread(target=user, daemon=True) for _ in range(users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run_rate(self, rate, max_inflight):
+        """
+        Start sentences at random (Poisson) arrivals at the given rate until the test is over,
+        regardless of how many are still waiting on the server.
+        """
+        def arrive(scheduled):
+            self.results.started(time.perf_counter() - scheduled)
+            self.sentence()
+
+        with ThreadPoolExecutor(max_workers=max_inflight) as pool:
+            scheduled = time.perf_counter()
+            while not self.exhausted():
+                scheduled += random.expovariate(rate)
+                if scheduled >= self.deadline:
+                    break
+                time.sleep(max(scheduled - time.perf_counter(), 0))
+                pool.submit(arrive, scheduled)
+
+    def exhausted(self):
+        """
+        Whether every request asked for with --requests has been started.
+        """
+        with self._lock:
+            return bool(self.args.requests) and self._sent >= self.args.requests
+
+
+def launch_server(args):
+    """
+    Start a server from this directory in the background, with the stub LLM unless the real one
+    was asked for. Its prediction cache is turned off unless asked for, as the same few videos
+    are sent over and over.
+    """
+    port = args.url.rstrip("/").rsplit(":", 1)[-1]
+    env = {**os.environ, "SLAMM_LLM": args.llm}
+    if not args.prediction_cache:
+        env["SLAMM_PREDICTION_CACHE_SIZE"] = "0"
+    log = open(args.server_log, "w") if args.server_log else subprocess.DEVNULL
+    return subprocess.Popen([sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1",
+                             "--port", port], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=env, stdout=log, stderr=subprocess.STDOUT)
+
+def wait_ready(url, timeout, server=None):
+    """
+    Wait for the server to report itself ready, returning whether it did in time.
+    """
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server is not None and server.poll() is not None:
+            return False # the server we launched exited
+        try:
+            if requests.get(url.rstrip("/") + "/health/ready", timeout=5).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    return False
+
+def prediction_cache_stats(url):
+    """
+    The server's prediction cache hits and coalesced uploads so far, from /status.
+    """
+    try:
+        cache = requests.get(url.rstrip("/") + "/status", timeout=5).json()["prediction_cache"]
+        return {"hits": cache["hits"], "coalesced": cache["coalesced"]}
+    except (requests.RequestException, ValueError, KeyError):
+        return {"hits": 0, "coalesced": 0}
+
+def print_report(report):
+    """
+    Print the report as a table.
+    """
+    print(f"{report['requests']} requests in {report['sentences']} sentences over "
+          f"{report['elapsed_s']:.1f} s: {report['throughput_rps']:.2f} requests/s, "
+          f"{report['sentences_per_s']:.2f} sentences/s, "
+          f"{report['error_rate']:.1%} errors")
+    print(f"{'':<10} {'requests':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  errors")
+    for kind, stats in report["by_kind"].items():
+        print(f"{kind:<10} {stats['requests']:>8} {stats['p50_ms']:>9.1f} "
+              f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}  {stats['errors'] or '-'}")
+    print(f"{'all':<10} {report['requests']:>8} {report['p50_ms']:>9.1f} "
+          f"{report['p95_ms']:>9.1f} {report['p99_ms']:>9.1f}")
+    if "start_lag_p99_ms" in report:
+        print(f"p99 lag starting sentences on schedule: {report['start_lag_p99_ms']:.1f} ms")
+
+    # answers that skipped decoding and inference make the server look faster than it is
+    reused = report["prediction_cache"]
+    if reused["hits"] or reused["coalesced"]:
+        print(f"Warning: {reused['hits']} clips were answered from the prediction cache and "
+              f"{reused['coalesced']} shared an identical upload's prediction")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /predict_video.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--launch", action="store_true",
+                        help="start a server on --url's port for the test and stop it after")
+    parser.add_argument("--llm", default="stub", choices=("stub", "gpt4all"),
+                        help="LLM of the launched server, the stub runs offline")
+    parser.add_argument("--server-log", default=None, help="file the launched server logs to")
+    parser.add_argument("--prediction-cache", action="store_true",
+                        help="keep the launched server's prediction cache on")
+    parser.add_argument("--ready-timeout", type=float, default=600,
+                        help="longest to wait for the server to be ready, in seconds")
+
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=4, help="users sending back to back")
+    load.add_argument("--rate", type=float, default=0, help="sentences started per second")
+    parser.add_argument("--max-inflight", type=int, default=64,
+                        help="most sentences in flight at once with --rate")
+    parser.add_argument("--duration", type=float, default=30, help="length of the test, seconds")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many, 0 no limit")
+    parser.add_argument("--words", type=int, default=3,
+                        help="clips per sentence, the last finishes it; 0 only buffers clips")
+    parser.add_argument("--model", default=None, help="vocabulary to ask for, e.g. asl300")
+    parser.add_argument("--timeout", type=float, default=120, help="per request, in seconds")
+
+    parser.add_argument("--video-dir", default=None, help="replay the .mp4 videos in here")
+    parser.add_argument("--videos", type=int, default=0,
+                        help="distinct videos to use, 0 for all of them or 32 synthesized")
+    parser.add_argument("--frames", type=int, default=64, help="length of synthesized videos")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=float, default=25)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    videos = load_videos(args)
+    if not videos:
+        parser.error(f"no .mp4 videos found in {args.video_dir}")
+    print(f"Using {len(videos)} videos of {np.mean([len(v) for v in videos]) / 1024:.0f} KB "
+          f"on average")
+
+    server = launch_server(args) if args.launch else None
+    try:
+        if not wait_ready(args.url, args.ready_timeout, server):
+            sys.exit(f"The server at {args.url} didn't become ready")
+
+        before = prediction_cache_stats(args.url)
+        test = LoadTest(args, videos)
+        start = time.perf_counter()
+        if args.rate:
+            print(f"Starting {args.rate} sentences/s for {args.duration:.0f} s")
+            test.run_rate(args.rate, args.max_inflight)
+        else:
+            print(f"Running {args.concurrency} users for {args.duration:.0f} s")
+            test.run_concurrency(args.concurrency)
+        report = test.results.report(time.perf_counter() - start)
+        after = prediction_cache_stats(args.url)
+        report["prediction_cache"] = {key: after[key] - before[key] for key in after}
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
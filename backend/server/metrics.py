@@ -0,0 +1,178 @@
+"""
+This file contains the metrics the server exposes for monitoring and capacity planning, rendered
+in the Prometheus text format by the /metrics route.
+
+Counters and histograms are updated by the server as requests go through it. Values the server
+already keeps track of elsewhere (queue depths, cache hit counts, model memory) are instead read
+through a callback whenever the metrics are scraped, so they're never out of date and cost
+nothing in between.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import math
+import threading
+
+# upper bounds of the latency histograms' buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def format_labels(labels):
+    """
+    Render a set of labels, e.g. {stage="decode"}.
+
+    Args:
+        labels: tuple - (name, value) pairs
+    """
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+def format_value(value):
+    """
+    Render a sample's value the way Prometheus expects it.
+    """
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """
+    A named metric with a value per combination of label values.
+
+    Args:
+        name: str - name of the metric, e.g. slamm_requests_total
+        help: str - description of the metric
+        kind: str - Prometheus type of the metric: counter, gauge or histogram
+        collect: callable - optional, returns the current values as a list of (labels, value)
+            pairs where labels is a dict of label name -> value, or a single value for a metric
+            without labels. Used for values that are kept track of elsewhere
+    """
+
+    def __init__(self, name, help, kind, collect=None):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.collect = collect
+
+        self._values = {} # labels -> value
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """
+        Add to the value of the metric for the given labels.
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value, **labels):
+        """
+        Set the value of the metric for the given labels.
+        """
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+    def samples(self):
+        """
+        The (suffix, labels, value) of each sample of the metric.
+        """
+        if self.collect is not None:
+            collected = self.collect()
+            if not isinstance(collected, list):
+                return [("", (), collected)]
+            return [("", tuple(sorted(labels.items())), value) for labels, value in collected]
+
+        with self._lock:
+            return [("", labels, value) for labels, value in sorted(self._values.items())]
+
+    def render(self):
+        """
+        Render the metric in the Prometheus text format.
+        """
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines)
+
+
+class Histogram(Metric):
+    """
+    A metric counting observations into cumulative buckets, along with their count and sum.
+
+    Args:
+        name: str - name of the metric, e.g. slamm_stage_seconds
+        help: str - description of the metric
+        buckets: tuple - ascending upper bounds of the buckets
+    """
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        super(Histogram, self).__init__(name, help, "histogram")
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, **labels):
+        """
+        Record an observation for the given labels.
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((labels, (list(counts), total))
+                            for labels, (counts, total) in self._values.items())
+
+        samples = []
+        for labels, (counts, total) in values:
+            for bound, count in zip(self.buckets, counts):
+                bucket_labels = labels + (("le", format_value(bound)),)
+                samples.append(("_bucket", bucket_labels, count))
+            samples.append(("_count", labels, counts[-1]))
+            samples.append(("_sum", labels, total))
+        return samples
+
+
+class Metrics:
+    """
+    The collection of every metric the server exposes.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help, collect=None):
+        """
+        Add a counter, a value that only ever goes up.
+        """
+        return self._add(Metric(name, help, "counter", collect))
+
+    def gauge(self, name, help, collect=None):
+        """
+        Add a gauge, a value that can go up and down.
+        """
+        return self._add(Metric(name, help, "gauge", collect))
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        """
+        Add a histogram of observations.
+        """
+        return self._add(Histogram(name, help, buckets))
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text format.
+        """
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
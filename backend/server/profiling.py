@@ -0,0 +1,282 @@
+"""
+This file contains the on-demand profiler used to find out where the time goes inside I3D when
+the server is slow. An admin arms it for the next few requests, or for a fraction of them, and
+the forward pass of each request it captures is written out as:
+    <capture>.trace.json - a Chrome trace from torch.profiler, open it in chrome://tracing or
+        https://ui.perfetto.dev
+    <capture>.endpoints.json - time spent in each of I3D's VALID_ENDPOINTS stages, broken down
+        by the operators run inside it
+    <capture>.stacks.txt - Python stacks of the batching thread sampled during the forward pass,
+        in the collapsed format flamegraph.pl and speedscope read
+
+Only the latest captures are kept, the files of older ones are deleted as new ones are written,
+so a profiler left armed for a fraction of requests can't fill the disk. Nothing is installed
+while the profiler isn't armed; the engine only checks a flag before each
+forward pass, so leaving the profiler in place costs nothing.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from torch.profiler import ProfilerActivity, profile, record_function
+
+from I3D.pytorch_i3d import InceptionI3d
+
+def endpoint_modules(model):
+    """
+    The (first, last) module run for each of the model's VALID_ENDPOINTS stages, keyed on the
+    stage's name. The Logits stage spans the final pooling and the logits layer.
+
+    Args:
+        model: InceptionI3d - the model, float32 or int8
+    """
+    modules = {name: (model._modules[name], model._modules[name])
+               for name in InceptionI3d.VALID_ENDPOINTS if name in model._modules}
+    if getattr(model, "logits", None) is not None:
+        modules["Logits"] = (model.avg_pool, model.logits)
+    return modules
+
+def endpoint_breakdown(events):
+    """
+    Total time of each stage and of the operators run inside it, in milliseconds, from the
+    events of a profile recorded with the stages marked.
+
+    Args:
+        events: EventList - the events of a torch.profiler profile
+    """
+    breakdown = {}
+    for event in events:
+        if event.name not in InceptionI3d.VALID_ENDPOINTS:
+            continue
+
+        operators = Counter()
+        pending = list(event.cpu_children)
+        while pending:
+            child = pending.pop()
+            operators[child.name] += child.self_cpu_time_total / 1000
+            pending.extend(child.cpu_children)
+
+        stage = breakdown.setdefault(event.name, {"total_ms": 0.0, "operators_ms": Counter()})
+        stage["total_ms"] += event.cpu_time_total / 1000
+        stage["operators_ms"].update(operators)
+
+    # stages in the order they run, operators slowest first
+    return {name: {"total_ms": breakdown[name]["total_ms"],
+                   "operators_ms": dict(breakdown[name]["operators_ms"].most_common())}
+            for name in InceptionI3d.VALID_ENDPOINTS if name in breakdown}
+
+
+class StackSampler:
+    """
+    Samples the Python stack of a thread at a fixed interval from a thread of its own, counting
+    how often each stack is seen.
+
+    Args:
+        thread_id: int - ident of the thread to sample
+        interval_ms: float - time between samples
+    """
+
+    def __init__(self, thread_id, interval_ms):
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000
+        self.stacks = Counter() # collapsed stack -> number of times it was sampled
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="profile-sampler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        """
+        Write the sampled stacks in the collapsed format, one "frame;frame;... count" per line.
+        """
+        with open(path, "w") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+    def _loop(self):
+        """
+        Main loop of the sampling thread.
+        """
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:"
+                             f"{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+class Profiler:
+    """
+    Profiles the forward passes of the models it's armed for, writing what it captures to a
+    directory. A forward pass runs a whole batch, so a capture covers every clip in it.
+
+    Args:
+        directory: str - where captures are written, created if needed
+        sample_interval_ms: float - time between samples of the Python stack
+        max_captures: int - most captures kept, the oldest one's files are deleted beyond it
+        log: callable - called with a message whenever a capture is written
+    """
+
+    def __init__(self, directory="profiles", sample_interval_ms=5.0, max_captures=50, log=print):
+        self.directory = directory
+        self.sample_interval_ms = sample_interval_ms
+        self.max_captures = max(max_captures, 1)
+        self.log = log
+
+        # whether a forward pass could be captured, the only thing checked while disarmed
+        self.active = False
+
+        self.remaining = 0 # forward passes still to capture
+        self.fraction = 0.0 # chance of capturing any other forward pass
+        self.captures = [] # summary of each capture kept, oldest first
+        self.written = 0 # captures written in all, including the ones since deleted
+        self._lock = threading.Lock()
+
+    def arm(self, requests=0, fraction=0.0):
+        """
+        Capture the forward passes of the next number of requests, and/or of a random fraction of
+        all of them until disarmed. Requests batched together share their capture.
+
+        Args:
+            requests: int - forward passes to capture, whatever their model
+            fraction: float - chance between 0 and 1 of capturing each forward pass
+        """
+        if requests < 0 or not 0.0 <= fraction <= 1.0:
+            raise ValueError("requests must be at least 0 and fraction between 0 and 1")
+
+        with self._lock:
+            self.remaining = requests
+            self.fraction = fraction
+            self.active = requests > 0 or fraction > 0
+
+    def disarm(self):
+        """
+        Stop capturing forward passes.
+        """
+        self.arm(0, 0.0)
+
+    def should_capture(self):
+        """
+        Decide whether to capture the forward pass about to run. Only called while active.
+        """
+        with self._lock:
+            if self.remaining > 0:
+                self.remaining -= 1
+                self.active = self.remaining > 0 or self.fraction > 0
+                return True
+            return random.random() < self.fraction
+
+    @contextmanager
+    def capture(self, model, batch, label):
+        """
+        Profile the forward pass run inside the context and write it out.
+
+        Args:
+            model: nn.Module - the model being run, whose stages are marked in the profile; None
+                for compiled graphs, which don't run the model's modules
+            batch: torch.Tensor - the batch being run
+            label: str - names the capture, e.g. the model's name
+        """
+        activities = [ProfilerActivity.CPU]
+        if batch.device.type == "cuda":
+            activities.append(ProfilerActivity.CUDA)
+
+        handles = self._mark_stages(model) if model is not None else []
+        sampler = StackSampler(threading.get_ident(), self.sample_interval_ms)
+        start = time.perf_counter()
+        try:
+            with profile(activities=activities, record_shapes=True) as prof, sampler:
+                yield
+        finally:
+            for handle in handles:
+                handle.remove()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self._write(prof, sampler, label, tuple(batch.shape), elapsed_ms)
+
+    def stats(self):
+        """
+        Summary of what the profiler is armed for and the captures written so far.
+        """
+        with self._lock:
+            return {"active": self.active, "remaining": self.remaining,
+                    "fraction": self.fraction, "directory": os.path.abspath(self.directory),
+                    "written": self.written, "max_captures": self.max_captures,
+                    "captures": list(self.captures)}
+
+    def _mark_stages(self, model):
+        """
+        Mark each of the model's stages as a range in the profile, with hooks on the first and
+        last module of the stage. Returns the hooks' handles so they can be removed.
+        """
+        handles = []
+        for name, (first, last) in endpoint_modules(model).items():
+            ranges = [] # a stage isn't re-entered, but keep a stack to be safe
+
+            def enter(module, inputs, name=name, ranges=ranges):
+                ranges.append(record_function(name))
+                ranges[-1].__enter__()
+
+            def exit(module, inputs, output, ranges=ranges):
+                if ranges:
+                    ranges.pop().__exit__(None, None, None)
+
+            handles.append(first.register_forward_pre_hook(enter))
+            handles.append(last.register_forward_hook(exit))
+        return handles
+
+    def _write(self, prof, sampler, label, shape, elapsed_ms):
+        """
+        Write out a capture's Chrome trace, stage breakdown and sampled stacks.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            self.written += 1
+            number = self.written
+        prefix = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{number:04d}-"
+                                              f"{label}-{'x'.join(map(str, shape))}")
+
+        prof.export_chrome_trace(prefix + ".trace.json")
+        stages = endpoint_breakdown(prof.events())
+        with open(prefix + ".endpoints.json", "w") as file:
+            json.dump({"label": label, "shape": shape, "elapsed_ms": elapsed_ms,
+                       "stages": stages}, file, indent=2)
+        sampler.write(prefix + ".stacks.txt")
+
+        summary = {"label": label, "shape": shape, "elapsed_ms": elapsed_ms,
+                   "files": [prefix + suffix
+                             for suffix in (".trace.json", ".endpoints.json", ".stacks.txt")],
+                   "stages_ms": {name: stage["total_ms"] for name, stage in stages.items()}}
+        with self._lock:
+            self.captures.append(summary)
+            dropped = self.captures[:-self.max_captures]
+            del self.captures[:-self.max_captures]
+        for old in dropped:
+            for path in old["files"]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        self.log(f"Profiled a {'x'.join(map(str, shape))} batch of {label} in "
+                 f"{elapsed_ms:.0f} ms, written to {prefix}.*")
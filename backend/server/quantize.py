@@ -0,0 +1,274 @@
+"""
+This file contains the post-training quantization pipeline that turns a trained I3D checkpoint
+into an int8 model for the server's CPU path, along with a report comparing the int8 model's
+accuracy and latency with the float32 one.
+
+Every Unit3D's convolution, with its batch norm and ReLU folded in, runs in int8; the 'same'
+padding, pooling and concatenation between them stay in float32, and so does the final logits
+layer. The activation ranges are calibrated on WLASL clips from the split file, and the int8
+checkpoint is saved next to the float32 one so the server can find it.
+
+To quantize the asl100 model and report on it, use the following command from the server
+directory, where --video-dir holds the WLASL videos named <video id>.mp4:
+    python quantize.py --model asl100 --video-dir <path_to_WLASL_videos>
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import argparse
+import copy
+import json
+import os
+import re
+import statistics
+import time
+import warnings
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+import torch.ao.quantization as quantization
+
+from I3D.pytorch_i3d import InceptionI3d, Unit3D
+from registry import MODEL_CLASSES, find_weights, load_model, module_bytes
+from video import load_clip
+
+# quantized kernels to use, x86 picks the fastest of fbgemm and onednn for each operator
+QUANTIZED_ENGINE = "x86"
+
+
+class QuantizedUnit3D(nn.Module):
+    """
+    A Unit3D whose convolution, batch norm and ReLU run as a single int8 convolution. Its input
+    is padded in float32 and quantized, and its output dequantized, so it can stand in for the
+    Unit3D anywhere in the model.
+
+    Args:
+        unit: Unit3D - the unit being replaced, its layers are reused
+    """
+
+    def __init__(self, unit):
+        super(QuantizedUnit3D, self).__init__()
+        self._kernel_shape = unit._kernel_shape
+        self._stride = unit._stride
+        self.name = unit.name
+
+        self.quant = quantization.QuantStub()
+        self.conv3d = unit.conv3d
+        self.bn = unit.bn if unit._use_batch_norm else nn.Identity()
+        self.relu = nn.ReLU() if unit._activation_fn is not None else nn.Identity()
+        self.dequant = quantization.DeQuantStub()
+
+    # 'same' padding is worked out exactly as Unit3D does it
+    compute_pad = Unit3D.compute_pad
+
+    def fuse(self):
+        """
+        Fold the batch norm and ReLU into the convolution.
+        """
+        layers = ["conv3d"]
+        if isinstance(self.bn, nn.BatchNorm3d):
+            layers.append("bn")
+        if isinstance(self.relu, nn.ReLU):
+            layers.append("relu")
+        if len(layers) > 1:
+            quantization.fuse_modules(self, [layers], inplace=True)
+
+    def forward(self, x):
+        (batch, channel, t, h, w) = x.size()
+        pad_t = self.compute_pad(0, t)
+        pad_h = self.compute_pad(1, h)
+        pad_w = self.compute_pad(2, w)
+        x = F.pad(x, (pad_w // 2, pad_w - pad_w // 2, pad_h // 2, pad_h - pad_h // 2,
+                      pad_t // 2, pad_t - pad_t // 2))
+
+        return self.dequant(self.relu(self.bn(self.conv3d(self.quant(x)))))
+
+
+def prepare_int8(model):
+    """
+    Copy a float32 model and get it ready for calibration: every Unit3D but the logits is
+    replaced by a QuantizedUnit3D with its layers fused and observers on its activations.
+
+    Args:
+        model: InceptionI3d - the float32 model, it isn't modified
+    """
+    torch.backends.quantized.engine = QUANTIZED_ENGINE
+    model = copy.deepcopy(model).cpu().eval()
+
+    def replace_units(module):
+        for child_name, child in module.named_children():
+            if isinstance(child, Unit3D) and child_name != "logits":
+                unit = QuantizedUnit3D(child).eval()
+                unit.fuse()
+                unit.qconfig = quantization.get_default_qconfig(QUANTIZED_ENGINE)
+                setattr(module, child_name, unit)
+            else:
+                replace_units(child)
+
+    replace_units(model)
+
+    # the observers warn about settings torch is deprecating, which we leave at their defaults
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return quantization.prepare(model)
+
+def convert_int8(model):
+    """
+    Turn a calibrated model into the int8 model.
+
+    Args:
+        model: InceptionI3d - a model from prepare_int8 that clips have been run through
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return quantization.convert(model)
+
+def load_int8(num_classes, weights):
+    """
+    Load an int8 checkpoint saved by this script.
+
+    Args:
+        num_classes: int - number of glosses the model predicts
+        weights: str - path to the int8 checkpoint
+    """
+    i3d = InceptionI3d(400, in_channels=3)
+    i3d.replace_logits(num_classes)
+
+    # build the int8 structure, the scales and zero points come from the checkpoint
+    model = convert_int8(prepare_int8(i3d))
+    model.load_state_dict(torch.load(weights, map_location="cpu"))
+    return model
+
+def int8_path(weights):
+    """
+    Where the int8 checkpoint of a float32 checkpoint is saved.
+    """
+    return os.path.splitext(weights)[0] + ".int8.pt"
+
+def archived_accuracy(weights):
+    """
+    The top-1, top-5 and top-10 accuracy the float32 checkpoint was archived with, as recorded
+    in its file name, e.g. ..._top1=65.89_top5=84.11_top10=89.92.pt.
+    """
+    found = re.search(r"top1=(\d+\.?\d*)_top5=(\d+\.?\d*)_top10=(\d+\.?\d*)",
+                      os.path.basename(weights))
+    return tuple(float(value) for value in found.groups()) if found else None
+
+def load_split(split_file, video_dir, subset, count=0):
+    """
+    List the (video path, label) of each clip of a subset of the split file whose video is
+    present, keeping the first count of them (all of them for 0).
+
+    Args:
+        split_file: str - a WLASL split file such as I3D/preprocess/nslt_100.json
+        video_dir: str - directory holding the videos, named <video id>.mp4
+        subset: str - 'train', 'val' or 'test'
+        count: int - most clips listed, 0 for all of them
+    """
+    with open(split_file) as file:
+        split = json.load(file)
+
+    clips = [(os.path.join(video_dir, video_id + ".mp4"), entry["action"][0])
+             for video_id, entry in sorted(split.items()) if entry["subset"] == subset]
+    clips = [(path, label) for path, label in clips if os.path.exists(path)]
+    return clips[:count] if count else clips
+
+def evaluate(model, clips, max_frames):
+    """
+    Top-1, top-5 and top-10 accuracy of a model on a list of (video path, label), in percent,
+    with the logits max-pooled over time as the server does.
+    """
+    correct = [0, 0, 0]
+    evaluated = 0
+    with torch.inference_mode():
+        for path, label in clips:
+            clip = load_clip(path, max_frames)
+            if clip is None:
+                continue
+            ranked = model(clip[None]).amax(dim=2)[0].argsort(descending=True)[:10].tolist()
+            for i, k in enumerate((1, 5, 10)):
+                correct[i] += label in ranked[:k]
+            evaluated += 1
+
+    return tuple(100.0 * hits / max(evaluated, 1) for hits in correct)
+
+def time_model(model, frames, runs):
+    """
+    Median latency of a model on a single clip of the given length, in milliseconds.
+    """
+    clip = torch.randn(1, 3, frames, 224, 224)
+    times = []
+    with torch.inference_mode():
+        model(clip) # the first run pays for allocation and kernel selection
+        for _ in range(runs):
+            start = time.perf_counter()
+            model(clip)
+            times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize I3D to int8 and report on it.")
+    parser.add_argument("--model", default="asl100", choices=sorted(MODEL_CLASSES))
+    parser.add_argument("--video-dir", required=True, help="WLASL videos, named <video id>.mp4")
+    parser.add_argument("--split-file", default=None,
+                        help="defaults to I3D/preprocess/nslt_<classes>.json, which is only "
+                             "shipped for asl100")
+    parser.add_argument("--calibration-clips", type=int, default=64,
+                        help="training clips the activation ranges are calibrated on")
+    parser.add_argument("--eval-subset", default="test", choices=("train", "val", "test"))
+    parser.add_argument("--eval-clips", type=int, default=0, help="0 evaluates every clip")
+    parser.add_argument("--max-frames", type=int, default=64, help="frame budget per clip")
+    parser.add_argument("--frames", type=int, default=64, help="clip length latency is timed on")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", default=None, help="defaults to next to the checkpoint")
+    args = parser.parse_args()
+
+    num_classes = MODEL_CLASSES[args.model]
+    weights = find_weights(args.model)
+    split_file = args.split_file or f"I3D/preprocess/nslt_{num_classes}.json"
+    if weights is None:
+        parser.error(f"no checkpoint found for {args.model}")
+    if not os.path.exists(split_file):
+        parser.error(f"split file {split_file} not found, pass the WLASL split file of "
+                     f"{args.model} with --split-file")
+
+    fp32 = load_model(args.model).eval()
+
+    # calibrate the activation ranges on training clips, then convert
+    calibration = load_split(split_file, args.video_dir, "train", args.calibration_clips)
+    if not calibration:
+        parser.error(f"none of the training clips in {split_file} are in {args.video_dir}")
+    print(f"Calibrating on {len(calibration)} clips")
+    prepared = prepare_int8(fp32)
+    with torch.inference_mode():
+        for path, _ in calibration:
+            clip = load_clip(path, args.max_frames)
+            if clip is not None:
+                prepared(clip[None])
+    int8 = convert_int8(prepared)
+
+    output = args.output or int8_path(weights)
+    torch.save(int8.state_dict(), output)
+    print(f"Saved the int8 model to {output}")
+
+    # accuracy and latency of both models
+    evaluation = load_split(split_file, args.video_dir, args.eval_subset, args.eval_clips)
+    print(f"Evaluating on {len(evaluation)} {args.eval_subset} clips, timing {args.frames} "
+          f"frame clips with {torch.get_num_threads()} threads")
+
+    archived = archived_accuracy(weights)
+    if archived:
+        print(f"{'archived':<10} {'':>9}  {'':>11}  top1 {archived[0]:6.2f}  "
+              f"top5 {archived[1]:6.2f}  top10 {archived[2]:6.2f}")
+    for name, model in (("float32", fp32), ("int8", int8)):
+        top1, top5, top10 = evaluate(model, evaluation, args.max_frames)
+        print(f"{name:<10} {module_bytes(model) / 2**20:6.1f} MB  "
+              f"{time_model(model, args.frames, args.runs):8.1f} ms  top1 {top1:6.2f}  "
+              f"top5 {top5:6.2f}  top10 {top10:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+This file contains the registry of the I3D models the server can serve, one per vocabulary size
+(asl100, asl300, asl1000 and asl2000). Models are loaded the first time a request asks for them
+and kept resident while they're in use, with the least recently used idle ones unloaded whenever
+the resident models would go over the memory budget, so serving the larger vocabularies doesn't
+multiply the memory a node needs.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import glob
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import torch
+
+from I3D.pytorch_i3d import InceptionI3d
+from fusion import fuse_for_inference
+
+# name of each model -> number of glosses in its vocabulary, the first entries of the WLASL
+# class list
+MODEL_CLASSES = {
+    "asl100": 100,
+    "asl300": 300,
+    "asl1000": 1000,
+    "asl2000": 2000,
+}
+
+def find_weights(name, root="I3D/archived", int8=False):
+    """
+    Find the checkpoint of a model, the .pt file saved next to its archived training config.
+    Returns None if it isn't there.
+
+    Args:
+        name: str - name of the model, e.g. 'asl100'
+        root: str - directory holding a folder of archived files per model
+        int8: bool - find the int8 checkpoint made by quantize.py (.int8.pt) instead
+    """
+    checkpoints = sorted(path for path in glob.glob(os.path.join(root, name, "*.pt"))
+                         if path.endswith(".int8.pt") == int8)
+    return checkpoints[-1] if checkpoints else None
+
+def load_model(name, random_weights=False, fuse=False, device="cpu"):
+    """
+    Build a model, loading its archived weights unless random ones were asked for, and
+    optionally fold its batch norms and padding into its layers the way the server does.
+
+    Args:
+        name: str - name of the model, e.g. 'asl100'
+        random_weights: bool - keep the random initialization instead of loading the checkpoint
+        fuse: bool - convert the model with fuse_for_inference
+        device: str - the device the weights are loaded onto
+    """
+    i3d = InceptionI3d(400, in_channels=3)
+    i3d.replace_logits(MODEL_CLASSES[name])
+    if not random_weights:
+        weights = find_weights(name)
+        if weights is None:
+            raise FileNotFoundError(f"No checkpoint found for {name}")
+        i3d.load_state_dict(torch.load(weights, map_location=device))
+    return fuse_for_inference(i3d) if fuse else i3d
+
+def module_bytes(module):
+    """
+    Memory taken by the weights and buffers of a module, in bytes. The state dict is used rather
+    than the parameters so that the packed weights of quantized layers are counted too.
+
+    Args:
+        module: nn.Module - the module
+    """
+    tensors = [tensor for tensor in module.state_dict().values()
+               if isinstance(tensor, torch.Tensor)]
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+class ResidentModel:
+    """
+    A model loaded by the registry, along with the engine and batching queue serving it.
+
+    Args:
+        name: str - name of the model
+        engine: InferenceEngine - executes the model
+        batcher: MicroBatcher - batches the clips sent to the engine, already started
+    """
+
+    def __init__(self, name, engine, batcher):
+        self.name = name
+        self.engine = engine
+        self.batcher = batcher
+        self.weight_bytes = module_bytes(engine.model)
+        self.leases = 0 # requests currently using the model, it can't be unloaded while > 0
+        self.loaded_at = time.time()
+
+    @property
+    def bytes(self):
+        """
+        Memory taken by the model: its weights, plus the copies of them kept by the graphs a
+        compiled backend has built so far, which grow as it sees new shapes.
+        """
+        return self.weight_bytes + getattr(self.engine.runner, "graph_bytes", 0)
+
+    def stats(self):
+        """
+        Summary of the model, its engine and its batching queue.
+        """
+        return {"memory_mb": self.bytes / 2**20, "leases": self.leases,
+                "engine": self.engine.stats(), "batcher": self.batcher.stats()}
+
+
+class ModelRegistry:
+    """
+    Loads models on demand and keeps the recently used ones resident within a memory budget.
+
+    Models are leased for the duration of a request with acquire() and release(). A leased model
+    is never unloaded, so if every resident model is in use the budget can be exceeded for a
+    while; the excess is unloaded as soon as those models are released.
+
+    Args:
+        load: callable - loads a model given its name, returning a ResidentModel
+        names: iterable of str - models that may be served
+        memory_budget_mb: float - most memory the resident models may take, 0 for no limit
+        root: str - directory holding a folder of archived files per model
+        int8: bool - serve the int8 checkpoints made by quantize.py instead of the float32 ones
+        log: callable - called with a message whenever a model is loaded or unloaded
+    """
+
+    def __init__(self, load, names, memory_budget_mb=0, root="I3D/archived", int8=False,
+                 log=print):
+        self.load = load
+        self.memory_budget = memory_budget_mb * 2**20
+        self.root = root
+        self.int8 = int8
+        self.log = log
+
+        # only models whose checkpoint is actually there can be served
+        self.names = [name for name in names
+                      if name in MODEL_CLASSES and find_weights(name, root, int8) is not None]
+
+        # bookkeeping on how often we've had to load and unload models
+        self.loads = 0
+        self.unloads = 0
+
+        self._resident = OrderedDict() # name -> ResidentModel, least recently used first
+        self._lock = threading.Lock() # guards the bookkeeping
+        self._load_lock = threading.Lock() # one model is loaded at a time
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def acquire(self, name, load=True):
+        """
+        Lease a model, loading it first if it isn't resident. Loading blocks, so it shouldn't be
+        done on the event loop.
+
+        Args:
+            name: str - name of the model
+            load: bool - whether to load the model if it isn't resident; if not, None is
+                returned instead
+        """
+        if name not in self.names:
+            raise KeyError(f"Unknown model {name}")
+
+        model = self._lease(name)
+        if model is not None or not load:
+            return model
+
+        with self._load_lock:
+            # another request may have loaded it while we were waiting
+            model = self._lease(name)
+            if model is not None:
+                return model
+
+            # make room for the new model before loading it, its checkpoint's size is a good
+            # estimate of the memory it will take
+            self._unload_idle(os.path.getsize(find_weights(name, self.root, self.int8)))
+
+            start = time.perf_counter()
+            model = self.load(name)
+            self.log(f"Loaded model {name} ({model.bytes / 2**20:.0f} MB) in "
+                     f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+            with self._lock:
+                model.leases += 1
+                self._resident[name] = model
+                self.loads += 1
+            return model
+
+    def release(self, model):
+        """
+        Hand back a model leased with acquire(), unloading idle models if we're over budget.
+
+        Args:
+            model: ResidentModel - the leased model
+        """
+        with self._lock:
+            model.leases -= 1
+        self._unload_idle(0)
+
+    def resident(self):
+        """
+        Names of the models currently loaded, least recently used first.
+        """
+        with self._lock:
+            return list(self._resident)
+
+    def stats(self):
+        """
+        Summary of the resident models and the memory they take.
+        """
+        with self._lock:
+            return {
+                "available": self.names,
+                "memory_mb": sum(model.bytes for model in self._resident.values()) / 2**20,
+                "memory_budget_mb": self.memory_budget / 2**20,
+                "loads": self.loads,
+                "unloads": self.unloads,
+                "resident": {name: model.stats() for name, model in self._resident.items()},
+            }
+
+    def stop(self):
+        """
+        Stop the batching queue of every resident model.
+        """
+        with self._lock:
+            models = list(self._resident.values())
+            self._resident.clear()
+        for model in models:
+            model.batcher.stop()
+
+    def _lease(self, name):
+        """
+        Lease a model if it's resident, marking it as the most recently used.
+        """
+        with self._lock:
+            model = self._resident.get(name)
+            if model is not None:
+                model.leases += 1
+                self._resident.move_to_end(name)
+            return model
+
+    def _unload_idle(self, incoming):
+        """
+        Unload the least recently used models that aren't leased until the resident models,
+        plus the given number of incoming bytes, fit in the budget.
+
+        Args:
+            incoming: int - bytes about to be taken by a model being loaded
+        """
+        if not self.memory_budget:
+            return
+
+        unloaded = []
+        with self._lock:
+            used = sum(model.bytes for model in self._resident.values()) + incoming
+            for name, model in list(self._resident.items()):
+                if used <= self.memory_budget:
+                    break
+                if model.leases == 0:
+                    del self._resident[name]
+                    used -= model.bytes
+                    unloaded.append(model)
+                    self.unloads += 1
+
+        # nothing is queued on an idle model, so its batcher stops straight away
+        for model in unloaded:
+            model.batcher.stop()
+            self.log(f"Unloaded model {model.name} to stay within the memory budget")
+        if unloaded and torch.cuda.is_available():
+            torch.cuda.empty_cache() # hand the freed memory back rather than keep it cached
@@ -12,24 +12,134 @@ Version: 1.0
 
 # import of all necessary packages for interpret
 import torch
-from fastapi import FastAPI, File, Form, UploadFile
+from fastapi import (Depends, FastAPI, File, Form, HTTPException, Request, Response, UploadFile,
+                     WebSocket, WebSocketDisconnect)
+from fastapi.responses import PlainTextResponse, StreamingResponse
+import asyncio
+import json
 import os
 from colorama import Fore
-import cv2
-from I3D.pytorch_i3d import InceptionI3d
-import os
-import torch.nn as nn
-import numpy as np
 import torch.nn.functional as F
 from I3D.pytorch_i3d import InceptionI3d
-from gpt4all import GPT4All
+from engine import InferenceEngine, configure_threads, resolve_device
+from batching import MicroBatcher, bucket_length
+from video import read_frames, decode_frames, preprocess_frames
+from sessions import create_session_store
+from stages import Stage
+from cache import LRUCache, SingleFlight
+import hashlib
+from llm_worker import LLMWorker, StubLLM, SYSTEM_PROMPT, summary_prompt
+from live import LiveDecoder, FrameRing
+from startup import Startup
+from registry import MODEL_CLASSES, ModelRegistry, ResidentModel, find_weights, load_model
+from quantize import load_int8
+from metrics import Metrics
+from profiling import Profiler
+from gloss_index import GlossIndex
+import secrets
+import time
+from contextlib import asynccontextmanager
+import config
 
 # load the environment variables for CUDA device necessary
 os.environ["CUDA_DEVICE_ORDER"] = "PCI_BUS_ID"
 os.environ["CUDA_VISIBLE_DEVICES"] = '0'
 
-i3d = None # model itself so we can reference it throughout the entire server
+registry = None # I3D models for each vocabulary size, loaded on demand
 llm = None # LLM model so we can reference it throughout the entire server
+llm_worker = None # long-lived session on the LLM that summaries are generated in
+sessions = None # buffered words of each user until they finish their sentence
+summary_cache = None # LLM summaries of the gloss sequences we've already seen
+prediction_cache = None # predictions for the videos we've already seen, keyed by their content
+inflight_predictions = SingleFlight() # identical uploads being predicted right now
+gloss_index = None # reference clip embeddings of the glosses kNN recognition can predict
+
+# dtype clips are prepared in, the same for every model's engine (see InferenceEngine)
+INPUT_DTYPE = torch.bfloat16 if config.USE_BF16 else torch.float32
+
+# stages a request moves through, each with its own threads and concurrency limit
+decode_stage = Stage("decode", limit=config.DECODE_CONCURRENCY, workers=config.DECODE_WORKERS)
+inference_stage = Stage("inference", limit=config.INFERENCE_CONCURRENCY) # run by the batcher
+llm_stage = Stage("llm", limit=config.LLM_CONCURRENCY, workers=1) # GPT4All isn't thread safe
+model_stage = Stage("models", limit=config.INFERENCE_CONCURRENCY, workers=1) # loads models
+embed_stage = Stage("embed", limit=config.INFERENCE_CONCURRENCY, workers=1) # backbone passes
+session_stage = Stage("sessions", limit=config.INFERENCE_CONCURRENCY, 
+                      workers=1) # the session stores serialize their writes anyway
+STAGES = (decode_stage, inference_stage, llm_stage, model_stage, embed_stage, session_stage)
+
+########### Metrics exposed on /metrics ###########
+
+metrics = Metrics()
+request_seconds = metrics.histogram("slamm_request_seconds", 
+                                    "Time to answer a request, by route")
+requests_total = metrics.counter("slamm_requests_total", "Requests answered, by route and status")
+stage_seconds = metrics.histogram("slamm_stage_seconds", 
+                                  "Time spent in each stage of handling a clip: upload, decode, "
+                                  + "preprocess, queue, inference, postprocess and llm")
+frames_total = metrics.counter("slamm_frames_total", 
+                               "Frames of uploaded videos that were decoded and used")
+llm_tokens_per_second = metrics.histogram("slamm_llm_tokens_per_second", 
+                                          "Token throughput of each summary once prefilled",
+                                          buckets=(1, 2, 5, 10, 20, 50, 100, 200))
+
+def resident_models():
+    """
+    The models currently loaded, empty until the registry has been created.
+    """
+    return registry.stats()["resident"] if registry is not None else {}
+
+def cache_stats():
+    """
+    Stats of each cache, keyed on its name.
+    """
+    caches = {"prediction": prediction_cache, "summary": summary_cache}
+    return {name: cache.stats() for name, cache in caches.items() if cache is not None}
+
+metrics.gauge("slamm_stage_active", "Requests being worked on in each stage",
+              lambda: [({"stage": stage.name}, stage.active) for stage in STAGES])
+metrics.gauge("slamm_stage_waiting", "Requests waiting for room in each stage",
+              lambda: [({"stage": stage.name}, stage.waiting) for stage in STAGES])
+metrics.gauge("slamm_batcher_queue_depth", "Clips waiting in each model's batching queue",
+              lambda: [({"model": name}, model["batcher"]["depth"])
+                       for name, model in resident_models().items()])
+metrics.counter("slamm_batches_total", "Batches run through each model",
+                lambda: [({"model": name}, model["batcher"]["batches"])
+                         for name, model in resident_models().items()])
+metrics.counter("slamm_clips_total", "Clips run through each model",
+                lambda: [({"model": name}, model["batcher"]["clips"])
+                         for name, model in resident_models().items()])
+metrics.gauge("slamm_model_memory_bytes", "Memory taken by each resident model",
+              lambda: [({"model": name}, model["memory_mb"] * 2**20)
+                       for name, model in resident_models().items()])
+metrics.gauge("slamm_model_memory_budget_bytes", "Memory the resident models may take",
+              lambda: config.MODEL_MEMORY_MB * 2**20)
+metrics.counter("slamm_cache_hits_total", "Lookups that were found in each cache",
+                lambda: [({"cache": name}, stats["hits"]) for name, stats in cache_stats().items()])
+metrics.counter("slamm_cache_misses_total", "Lookups that weren't found in each cache",
+                lambda: [({"cache": name}, stats["misses"]) 
+                         for name, stats in cache_stats().items()])
+metrics.gauge("slamm_cache_hit_ratio", "Fraction of lookups found in each cache",
+              lambda: [({"cache": name}, stats["hit_rate"]) 
+                       for name, stats in cache_stats().items()])
+metrics.gauge("slamm_cache_entries", "Entries held by each cache",
+              lambda: [({"cache": name}, stats["size"]) for name, stats in cache_stats().items()])
+metrics.counter("slamm_predictions_coalesced_total", 
+                "Uploads that shared the prediction of an identical upload in flight",
+                lambda: inflight_predictions.coalesced)
+metrics.counter("slamm_llm_tokens_total", "Tokens generated by the LLM",
+                lambda: llm_worker.tokens if llm_worker is not None else 0)
+metrics.counter("slamm_llm_generation_seconds_total", 
+                "Time the LLM spent generating tokens after prefill",
+                lambda: llm_worker.total_generation_ms / 1000 if llm_worker is not None else 0)
+metrics.gauge("slamm_sessions", "Sessions with words buffered",
+              lambda: len(sessions) if sessions is not None else 0)
+metrics.gauge("slamm_ready", "Whether both models are loaded", lambda: int(startup.ready))
+
+def observe_stage(stage, seconds):
+    """
+    Record how long a clip spent in a stage.
+    """
+    stage_seconds.observe(seconds, stage=stage)
 
 ########### Methods for debugging and loading model ###########
 
@@ -39,102 +149,199 @@ def log(message):
     """
     print(f"[server.py] {message}" + Fore.RESET)
 
-def load_I3D_model():
+# the models load in the background, requests are only accepted once both are ready
+startup = Startup(("i3d", "llm"), log=log)
+
+# profiles the forward passes of the requests an admin asks for, idle otherwise
+profiler = Profiler(config.PROFILE_DIR, sample_interval_ms=config.PROFILE_SAMPLE_INTERVAL_MS,
+                    max_captures=config.PROFILE_MAX_CAPTURES, log=log)
+
+def load_I3D_model(name, device):
     """ 
-    Loads the I3D model from WLASL for communication with the frontend.
+    Loads an I3D model from WLASL for communication with the frontend.
+
+    Args:
+        name: str - which model to load, e.g. 'asl100' for the 100 gloss vocabulary
+        device: str - the device the model will run on, either 'cuda' or 'cpu'
+
+    Returns the model, along with the engine and batching queue serving it.
     """
-    global i3d
-    num_classes = 100 # number of classes we're using for the model
-    weights = (os.getcwd() + 
-              '/I3D/archived/asl100/FINAL_nslt_100_iters=896_top1=65.89_top5=84.11_top10=89.92.pt')
+    num_classes = MODEL_CLASSES[name] # number of classes we're using for the model
+    weights = find_weights(name, int8=config.INT8)
 
+    if config.INT8:
+        # the int8 model made by quantize.py, whose kernels only run on the CPU
+        if device != "cpu" or config.USE_BF16:
+            raise RuntimeError("SLAMM_INT8 needs SLAMM_DEVICE=cpu and SLAMM_BF16 off")
+        i3d = load_int8(num_classes, weights)
+    else:
+        # load the Inception 3D Model with its weights on the device we're running on, folding
+        # the batch norms into the convolutions if asked to, the logits stay the same
+        i3d = load_model(name, fuse=config.FUSE, device=device)
 
-    # loading the Inception 3D Model
-    i3d = InceptionI3d(400, in_channels=3)
+    # wrap the model in the engine, which also sets it to evaluation mode, ready for use
+    engine = InferenceEngine(i3d, device=device, bf16=config.USE_BF16, 
+                             channels_last=config.CHANNELS_LAST, backend=config.BACKEND,
+                             profiler=profiler, name=name)
 
-    # load the model weights
-    i3d.replace_logits(num_classes)
-    i3d.load_state_dict(torch.load(weights)) 
-    i3d.cuda()
-    i3d = nn.DataParallel(i3d)
+    # put the batching queue in front of the engine
+    batcher = MicroBatcher(engine, interpret_logits, max_batch_size=config.BATCH_MAX_SIZE,
+                           max_wait_ms=config.BATCH_MAX_WAIT_MS, 
+                           buckets=config.FRAME_BUCKETS, exact_lengths=config.BACKEND == "eager",
+                           observe=observe_stage).start()
 
-    # set to evaluation mode, ready for use
-    i3d.eval()
+    return ResidentModel(name, engine, batcher)
 
-def run_on_tensor(ip_tensor):
+def run_on_tensor(model, ip_tensor, k=1, windows=False):
     """
-    This function was adapted from: 
-        https://github.com/alanjeremiah/WLASL-Recognition-and-Translation/blob/main/WLASL/I3D/run.py
-    
-    Run the model on the input tensor.
+    Queue the input tensor to be run through the model. Clips that arrive close together are
+    batched into a single forward pass by the batcher.
+
+    Args:
+        model: ResidentModel - the leased model to run
+        ip_tensor: torch.Tensor - clip of shape (channels, frames, height, width)
+        k: int - number of most likely glosses to predict
+        windows: bool - also predict the most likely gloss of each window of the clip
+
+    Returns a future that resolves to the predictions made by interpret_logits, along with the
+    clip's inference latency in milliseconds.
     """
-    ip_tensor = ip_tensor[None, :]
-    
-    t = ip_tensor.shape[2] 
-    ip_tensor.cuda()
-    per_frame_logits = i3d(ip_tensor)
+    return model.batcher.submit(ip_tensor, k=k, windows=windows)
+
+@asynccontextmanager
+async def leased_model(name):
+    """
+    Lease a model for the duration of a request, so it isn't unloaded while in use. Models that
+    aren't resident are loaded off the event loop.
+
+    Args:
+        name: str - name of the model
+    """
+    model = registry.acquire(name, load=False)
+    if model is None:
+        model = await model_stage.run(registry.acquire, name)
+    try:
+        yield model
+    finally:
+        registry.release(model)
 
-    # get the predictions for the video 
-    predictions = F.upsample(per_frame_logits, t, mode='linear')
+def resolve_model(name):
+    """
+    The model a request asked for, or the default one. Unknown models are rejected.
 
-    predictions = predictions.transpose(2, 1)
-    out_labels = np.argsort(predictions.cpu().detach().numpy()[0])
-    arr = predictions.cpu().detach().numpy()[0] 
+    Args:
+        name: str - the requested model, None for the default
+    """
+    name = name or config.DEFAULT_MODEL
+    if name not in registry:
+        raise HTTPException(status_code=400, detail=f"Unknown model {name}, available models "
+                                                    + "are " + ", ".join(registry.names))
+    return name
 
-    # information from the model regarding the prediction
-    log(f"Confidence in prediction: {float(max(F.softmax(torch.from_numpy(arr[0]), dim=0)))}")
-    log(f"Prediction: {wlasl_dict[out_labels[0][-1]]}")
-    
-    # return the predictions, no matter the confidence
-    return (wlasl_dict[out_labels[0][-1]], float(max(F.softmax(torch.from_numpy(arr[0]), dim=0))))
+def interpret_logits(per_frame_logits, t, k=1, windows=False):
+    """
+    Turn the logits the model produced for a single clip into its k most likely glosses. The
+    logits are max-pooled over time on the device, as in WLASL's evaluation, so a single softmax
+    and top-k are enough and only the k results are copied back.
 
-def load_frames(video_path):
-    """ 
-    This function was adapted from: 
-        https://github.com/alanjeremiah/WLASL-Recognition-and-Translation/blob/main/WLASL/I3D/run.py
+    Args:
+        per_frame_logits: torch.Tensor - logits of shape (classes, time) for one clip
+        t: int - number of frames in the clip
+        k: int - number of glosses to return
+        windows: bool - also return the most likely gloss of each window of frames, i.e. of
+            each time step of the logits
 
-    Load RGB frames from a video file to be processed by the model.
+    Returns the (gloss, confidence) pairs of the k most likely glosses, most likely first, and
+    the (gloss, confidence, first frame, last frame) of each window, or None.
     """
+    k = min(k, per_frame_logits.shape[0])
+    probabilities = F.softmax(per_frame_logits.amax(dim=1), dim=0)
+    top_probabilities, top_classes = probabilities.topk(k)
+    top_k = [(wlasl_dict[label].strip(), confidence)
+             for label, confidence in zip(top_classes.tolist(), top_probabilities.tolist())]
+
+    # information from the model regarding the prediction
+    log(f"Confidence in prediction: {top_k[0][1]}")
+    log(f"Prediction: {top_k[0][0]}")
+
+    if not windows:
+        return top_k, None
+
+    # each time step pools two 8-frame steps of the last inception block, so it roughly sees
+    # the 16 frames starting at 8 times its index
+    window_probabilities, window_classes = F.softmax(per_frame_logits, dim=0).max(dim=0)
+    breakdown = [(wlasl_dict[label].strip(), confidence, min(8 * i, t - 1), min(8 * i + 16, t) - 1)
+                 for i, (label, confidence) in enumerate(zip(window_classes.tolist(),
+                                                             window_probabilities.tolist()))]
+    return top_k, breakdown
 
+def load_frames(video):
+    """ 
+    Load RGB frames from a video to be processed by the model. Frames are preprocessed as soon
+    as they are decoded.
 
-    video = cv2.VideoCapture(video_path) # video itself to be processed
-    frames = [] # frames from the video 
+    Args:
+        video: str, bytes or file-like object - a path to a video on disk, or the encoded video
+            itself held in memory (e.g. an upload), which is decoded without touching the disk
 
-    # loop through the video frame by frame and resize properly
-    while True:
-        ret, frame1 = video.read()
+    Returns the frames as a tensor of shape (channels, frames, height, width), or None if no
+    frames could be extracted, along with a dictionary of information about the preprocessing.
+    """
+    start = time.perf_counter()
+    decode_info = {} # filled in by the decoder as it goes
+    if isinstance(video, str):
+        frames = read_frames(video, max_frames=config.MAX_FRAMES, sampling=config.SAMPLING,
+                             info=decode_info)
+    else:
+        frames = decode_frames(video, threads=config.DECODE_THREADS, max_frames=config.MAX_FRAMES,
+                               sampling=config.SAMPLING, info=decode_info)
 
-        # break if we reach the end of the video 
-        if not ret:
-            break
+    frames_tensor, info = preprocess_frames(frames, capacity=config.MAX_FRAMES or 64, 
+                                            dtype=INPUT_DTYPE, max_frames=config.MAX_FRAMES,
+                                            sampling=config.SAMPLING)
+    info.update(decode_info)
 
-        # resize the frame to correct dimensions
-        w, h, c = frame1.shape
-        sc = 224 / w
-        sx = 224 / h
-        frame = cv2.resize(frame1, dsize=(0, 0), fx=sx, fy=sc)
-        frame = (frame / 255.) * 2 - 1 
+    # decoding and preprocessing are interleaved, the decoding is whatever preprocessing wasn't
+    observe_stage("preprocess", info["preprocess_ms"] / 1000)
+    observe_stage("decode", time.perf_counter() - start - info["preprocess_ms"] / 1000)
+    frames_total.inc(info["frames_decoded"], kind="decoded")
+    frames_total.inc(info["frames_used"], kind="used")
 
-        # add frame to the list of frames
-        frames.append(frame)
+    log(f"Decoded {info['frames_decoded']} frames and used {info['frames_used']}, preprocessed at "
+        + f"{info['preprocess_ms_per_frame']:.3f} ms per frame")
+    return frames_tensor, info
 
-    # release video since it's no longer needed
-    video.release()
+# version of the summarization prompt, bump it whenever the prompt changes so summaries cached
+# for the old prompt are no longer used
+PROMPT_VERSION = 2
 
-    # ensure that we have frames to process
-    if len(frames) == 0:
-        return "No frames extracted"
+def summary_key(translations):
+    """
+    Key a summary is cached under: the prompt version and the normalized gloss sequence, so the
+    same phrase is recognized regardless of case or spacing.
 
-    # convert to tensor and pass through model
-    frames_tensor = torch.from_numpy(np.asarray(frames, dtype=np.float32).transpose([3, 0, 1, 2]))
-    text_and_confidence = run_on_tensor(frames_tensor)
+    Args:
+        translations: str - the predicted words, separated by spaces
+    """
+    return f"v{PROMPT_VERSION}:" + " ".join(translations.lower().split())
 
-    # get the predicted text
-    predicted_text = text_and_confidence[0].strip()
-    conf = text_and_confidence[1]
+def summarize(translations, on_token=None):
+    """
+    Ask the LLM to reinterpret the predicted words into a more coherent sentence. This blocks
+    until generation is done, so it should only be called from the LLM stage.
 
-    # return the predicted term
-    return (predicted_text, conf) 
+    Args:
+        translations: str - the predicted words, separated by spaces
+        on_token: callable - optional, called with each token as soon as it's generated
+    """
+    # the instructions are already evaluated in the worker's session, so only the words are new
+    start = time.perf_counter()
+    llm_message = llm_worker.generate(summary_prompt(translations), on_token=on_token)
+    observe_stage("llm", time.perf_counter() - start)
+    llm_tokens_per_second.observe(llm_worker.last_tokens_per_second)
+    log(llm_message)
+
+    return llm_message
 
 def create_WLASL_dictionary():
     """ 
@@ -165,48 +372,169 @@ def create_WLASL_dictionary():
             wlasl_dict[key] = value
 
 
-def init():
+def warmup_lengths():
     """
-    Constructs and initializes necessary aspects for the server to run.
+    The clip lengths to warm the model up on: every bucket a request can be padded to, which
+    skips the larger buckets when clips are capped at a number of frames.
     """
-    # message to be sent at the launch of the LLM model to explain its purpose
-    setup_msg = """
-    You are a model loaded in the backend of a server, with the sole responsibility of the 
-    following:
+    if config.WARMUP_FRAMES:
+        return config.WARMUP_FRAMES
+
+    longest = max(config.MAX_FRAMES or config.FRAME_BUCKETS[-1], config.LIVE_WINDOW)
+    reachable = bucket_length(longest, config.FRAME_BUCKETS)
+    return [bucket for bucket in config.FRAME_BUCKETS if bucket <= reachable]
 
-    Translate provided American Sign Language (ASL) into English text and summarize the message 
-    into a single, coherent sentence. The sentence should be simple, understandable, and concise. 
-    Do not include any other words, reinforcements, or explanations beyond the translated sentence.
+def load_I3D(device):
+    """
+    Create the registry of I3D models and load the class list, then load the models that are
+    kept ready from the start and run them on synthetic clips so the first real requests don't
+    pay for their warm-up.
+
+    Args:
+        device: str - the device the models will run on, either 'cuda' or 'cpu'
     """
-    global llm
+    global registry
 
-    # initialize and load the model if available
-    if torch.cuda.is_available():
-        # load the machine learning model first, as well as dictionary 
-        load_I3D_model()
+    with startup.phase("i3d_dictionary"):
         create_WLASL_dictionary()
-        log(Fore.GREEN + "-"*20 + "Model loaded successfully!" + "-"*20)
-
-        # load the LLM model 
-        llm = GPT4All("Meta-Llama-3-8B-Instruct.Q4_0.gguf") # downloads / loads a 4.66GB LLM
-        with llm.chat_session():
-            msg = setup_msg
-            log(Fore.GREEN + llm.generate(msg, max_tokens=1024))
-    else: # we can't load the model so this is bad
+
+    registry = ModelRegistry(lambda name: load_I3D_model(name, device), config.MODELS,
+                             memory_budget_mb=config.MODEL_MEMORY_MB, int8=config.INT8, log=log)
+    if config.DEFAULT_MODEL not in registry:
+        raise RuntimeError(f"No weights found for the default model {config.DEFAULT_MODEL}")
+
+    for name in dict.fromkeys((config.DEFAULT_MODEL,) + config.MODEL_PRELOAD):
+        if name not in registry:
+            log(Fore.YELLOW + f"Not preloading {name}, its weights weren't found")
+            continue
+
+        with startup.phase(f"{name}_weights"):
+            model = registry.acquire(name)
+        try:
+            if config.WARMUP:
+                with startup.phase(f"{name}_warmup"):
+                    timings = model.engine.warm_up(warmup_lengths())
+                log(f"Warm-up of {name} took " + ", ".join(f"{ms:.0f} ms for {frames} frames"
+                                                         for frames, ms in timings.items()))
+        finally:
+            registry.release(model)
+
+    log(Fore.GREEN + "-"*20 + "Model loaded successfully!" + "-"*20)
+
+def load_LLM():
+    """
+    Load the LLM and open the session summaries are generated in, evaluating the instructions
+    once up front.
+    """
+    global llm, llm_worker
+
+    with startup.phase("llm_weights"):
+        if config.LLM == "stub":
+            llm = StubLLM(token_ms=config.LLM_STUB_TOKEN_MS) # offline stand-in, e.g. load tests
+        else:
+            from gpt4all import GPT4All # only needed when the real LLM is served
+            llm = GPT4All("Meta-Llama-3-8B-Instruct.Q4_0.gguf") # downloads / loads a 4.66GB LLM
+
+    with startup.phase("llm_session"):
+        llm_worker = LLMWorker(llm, SYSTEM_PROMPT, max_tokens=config.LLM_MAX_TOKENS,
+                               log=log).start()
+    log(Fore.GREEN + f"LLM session ready, the system prompt took {llm_worker.prefix_ms:.0f} ms")
+
+def init():
+    """
+    Constructs and initializes necessary aspects for the server to run. I3D and the LLM are
+    loaded concurrently in the background, so the server accepts connections straight away
+    and reports itself ready once they're both loaded.
+    """
+    global sessions, summary_cache, prediction_cache, gloss_index
+
+    # pick the device we'll run on; only fail if CUDA was explicitly asked for and isn't there
+    device = resolve_device(config.DEVICE)
+    if device == "cuda" and not torch.cuda.is_available():
         log(Fore.RED + "-"*20 
-            + "CUDA is not available. Please ensure cuda is available before running the server." 
+            + "CUDA is not available. Please ensure cuda is available or use SLAMM_DEVICE=cpu." 
             + "-"*20)
         exit(1)
 
+    # size the CPU thread pools before any work is done with torch
+    if device == "cpu":
+        threads, interop_threads = configure_threads(config.NUM_THREADS, config.NUM_INTEROP_THREADS)
+        log(Fore.YELLOW + f"Running on the CPU with {threads} intra-op and {interop_threads} "
+            + "inter-op threads")
+
+    # create the store that buffers each user's words
+    sessions = create_session_store(config.SESSION_DB, ttl_seconds=config.SESSION_TTL_SECONDS,
+                                    max_sessions=config.SESSION_MAX_SESSIONS, 
+                                    max_words=config.SESSION_MAX_WORDS)
+
+    # create the cache of predictions for videos that are uploaded more than once
+    prediction_cache = LRUCache(max_size=config.PREDICTION_CACHE_SIZE)
+
+    # create the cache of LLM summaries, reloading the ones from the last run if we keep them
+    summary_cache = LRUCache(max_size=config.SUMMARY_CACHE_SIZE, 
+                             ttl_seconds=config.SUMMARY_CACHE_TTL_SECONDS,
+                             path=config.SUMMARY_CACHE_PATH or None,
+                             flush_seconds=config.SUMMARY_CACHE_FLUSH_SECONDS)
+
+    # load the gloss index kNN recognition searches, or start an empty one for the default model
+    gloss_index = GlossIndex(config.DEFAULT_MODEL, config.GLOSS_INDEX_ENDPOINT,
+                             path=config.GLOSS_INDEX or None)
+    log(f"Gloss index holds {len(gloss_index.glosses)} glosses and {len(gloss_index)} clips")
+
+    # load both models at the same time, in the background
+    startup.load("i3d", lambda: load_I3D(device))
+    startup.load("llm", load_LLM)
+
+def shutdown():
+    """
+    Finish the work that is still queued and stop the batching thread and the stages' threads.
+    """
+    if registry is not None:
+        registry.stop()
+    for stage in STAGES:
+        stage.shutdown()
+    if summary_cache is not None:
+        summary_cache.close() # writes the summaries added since the last flush
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Set up the server when it starts and tear it down when it stops. The models keep loading in
+    the background after init returns, so the server accepts connections straight away.
+    """
+    init()
+    try:
+        yield
+    finally:
+        shutdown()
+
+def require_ready():
+    """
+    Turn requests away with a 503 until the models are loaded.
+    """
+    if not startup.ready:
+        raise HTTPException(status_code=503, detail="The models are still loading")
+
+def require_admin(request: Request):
+    """
+    Only let requests carrying the admin token through, in the X-Admin-Token header. Without a
+    token configured the admin routes don't exist.
+    """
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = request.headers.get("X-Admin-Token", "")
+    if not secrets.compare_digest(token.encode(), config.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
 ########### end methods for debugging and loading model ###########
 
 
 
 ########### FastAPI setup and model loading ###########
 
-# initialize the FastAPI and the rest of the necessary components for the server
-app = FastAPI(redirect_slashes=False)
-init()
+# initialize the FastAPI, the rest of the necessary components are set up by lifespan once it
+# starts
+app = FastAPI(redirect_slashes=False, lifespan=lifespan)
 
 ########### Below are the valid routes through the FastAPI ###########
 
@@ -217,67 +545,638 @@ async def root():
     """
     return {"message": "This is the working backend for SLAMM."}
 
+@app.middleware("http")
+async def record_request(request: Request, call_next):
+    """
+    Time every request and count it by route and status. The time it arrived is kept so the
+    routes can tell how long receiving the upload took.
+    """
+    request.state.received = time.perf_counter()
+    response = await call_next(request)
 
-words = [] # list of the word to be buffered until user needs them 
-confidences = [] # list of the confidence values for the words to be buffered
-@app.post("/predict_video")
-async def predict_video(file: UploadFile = File(...), buffer: int = Form(...)):
-    """ 
-    Receives a video from the frontend and predicts the sign language video.
+    # label by the route's path rather than the URL, so the labels stay few; streamed responses
+    # have only started here, timed_stream times them once they're done
+    path = route_path(request)
+    if not getattr(request.state, "streamed", False):
+        request_seconds.observe(time.perf_counter() - request.state.received, route=path)
+    requests_total.inc(route=path, status=response.status_code)
+    return response
+
+def route_path(request):
+    """
+    The path of the route a request matched, e.g. '/admin/gloss_index/{gloss}', which labels its
+    metrics.
+    """
+    route = request.scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+def timed_stream(request, events):
+    """
+    Wrap the events of a streamed response so the request is timed once the last one is sent, or
+    the client goes away, rather than when the response starts.
 
     Args:
-        file: UploadFile - the video received and to be predicted
+        request: Request - the request being answered
+        events: async generator - the response's events
+    """
+    request.state.streamed = True
+
+    async def timed():
+        try:
+            async for event in events:
+                yield event
+        finally:
+            request_seconds.observe(time.perf_counter() - request.state.received,
+                                    route=route_path(request))
+
+    return timed()
+
+@app.get("/metrics")
+async def metrics_route():
+    """
+    Every metric of the server in the Prometheus text format, to be scraped for monitoring.
+    """
+    return PlainTextResponse(metrics.render(), 
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/health/live")
+async def health_live():
+    """
+    Liveness check, answers as soon as the server is accepting connections.
+    """
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def health_ready(response: Response):
+    """
+    Readiness check, answers 503 until both models are loaded and warmed up, along with what
+    is still loading and how long each startup phase took.
+    """
+    report = startup.stats()
+    if not report["ready"]:
+        response.status_code = 503
+    return report
+
+@app.get("/status")
+async def status():
+    """
+    Report on startup, the resident models with their engines and batching queues, the request
+    stages and the session buffers and caches. Models that are still loading are left out.
+    """
+    report = {"startup": startup.stats(), "sessions": sessions.stats(),
+              "summary_cache": summary_cache.stats(),
+              "prediction_cache": {**prediction_cache.stats(),
+                                   "coalesced": inflight_predictions.coalesced},
+              "gloss_index": gloss_index.stats(),
+              "stages": {stage.name: stage.stats() 
+                         for stage in STAGES}}
+    if startup.ready:
+        report.update({"models": registry.stats(), "llm": llm_worker.stats()})
+    return report
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile_status():
+    """
+    Report what the profiler is armed for and the captures it has written.
     """
-    global words, confidences
+    return profiler.stats()
 
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile_requests(requests: int = Form(0), fraction: float = Form(0.0)):
+    """
+    Arm the profiler to capture the forward passes of upcoming requests, writing a Chrome
+    trace, a breakdown by I3D stage and sampled Python stacks for each (see profiling.py).
+    Arming again replaces what it was armed for.
+
+    Args:
+        requests: int - optional, number of upcoming requests to capture
+        fraction: float - optional, fraction of all requests to capture until disarmed
+    """
+    try:
+        profiler.arm(requests, fraction)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    log(Fore.YELLOW + f"Profiling the next {requests} requests and {fraction:.1%} of the rest")
+    return profiler.stats()
+
+@app.delete("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile_stop():
+    """
+    Disarm the profiler, the captures already written are kept.
+    """
+    profiler.disarm()
+    return profiler.stats()
+
+@app.get("/admin/gloss_index", dependencies=[Depends(require_admin)])
+async def gloss_index_status():
+    """
+    Report the gloss index's model and size, and the number of reference clips of each gloss.
+    """
+    return {**gloss_index.stats(), "counts": gloss_index.counts()}
+
+@app.post("/admin/gloss_index", dependencies=[Depends(require_admin), Depends(require_ready)])
+async def gloss_index_add(file: UploadFile = File(...), gloss: str = Form(...)):
+    """
+    Add a reference clip of a gloss to the gloss index, which kNN recognition can predict from
+    then on. The gloss is added to the index's vocabulary if it wasn't in it, and the index is
+    saved to SLAMM_GLOSS_INDEX.
+
+    Args:
+        file: UploadFile - a video of the gloss being signed
+        gloss: str - the gloss signed in the video
+    """
+    gloss = gloss.strip()
+    if not gloss:
+        raise HTTPException(status_code=400, detail="The gloss can't be empty")
+    name = resolve_model(gloss_index.model)
+
+    frames, _ = await decode_stage.run(load_frames, await file.read())
+    if frames is None:
+        raise HTTPException(status_code=400, detail="No frames extracted")
+    async with leased_model(name) as model:
+        embedding, _ = await embed_stage.run(embed_clip, model.engine, frames, 
+                                             gloss_index.endpoint)
+    clips = await embed_stage.run(gloss_index.add, gloss, embedding) # saving writes to disk
+    log(Fore.YELLOW + f"Added a reference clip of {gloss} to the gloss index, it has {clips}")
+    return {"gloss": gloss, "clips": clips, "index": gloss_index.stats()}
+
+@app.delete("/admin/gloss_index/{gloss}", dependencies=[Depends(require_admin)])
+async def gloss_index_remove(gloss: str):
+    """
+    Remove a gloss and its reference clips from the gloss index.
+
+    Args:
+        gloss: str - the gloss to remove
+    """
+    clips = await embed_stage.run(gloss_index.remove, gloss)
+    if not clips:
+        raise HTTPException(status_code=404, detail=f"{gloss} isn't in the gloss index")
+    log(Fore.YELLOW + f"Removed {gloss} and its {clips} reference clips from the gloss index")
+    return {"gloss": gloss, "clips": clips, "index": gloss_index.stats()}
+
+
+async def predict_video_bytes(video_bytes, name):
+    """
+    Decode an uploaded video and predict the sign in it. The most glosses any request can ask
+    for and the per-window breakdown are always predicted, so the result can be cached and
+    shared by every request for the same video.
+
+    Args:
+        video_bytes: bytes - the encoded video
+        name: str - the model to predict with
+
+    Returns the top-k glosses and the per-window breakdown (both None if no frames could be
+    extracted), and information about the frames used.
+    """
+    # decode and process the video in memory, then wait for the batcher to predict; both run off
+    # the event loop so other requests are served in the meantime
+    frames, info = await decode_stage.run(load_frames, video_bytes)
+    if frames is None:
+        return None, None, info
+    async with leased_model(name) as model:
+        (top_k, windows), latency_ms = await inference_stage.wait(run_on_tensor, model, frames,
+                                                                  k=config.TOP_K_MAX, windows=True)
+    info = {**info, "latency_ms": latency_ms}
+
+    return top_k, windows, info
+
+def embed_clip(engine, frames, endpoint):
+    """
+    Run the backbone on a single clip and return its embedding at an endpoint as a NumPy array,
+    along with how long the backbone took in milliseconds.
+    """
+    start = time.perf_counter()
+    features = engine.features(frames[None], (endpoint,))
+    return features[endpoint][0].cpu().numpy(), (time.perf_counter() - start) * 1000
+
+async def predict_knn_bytes(video_bytes, name):
+    """
+    Decode an uploaded video and recognize the sign in it with the gloss index: the clip's
+    embedding is compared with the reference clips of each gloss instead of being run through
+    the logits layer. The most glosses any request can ask for are always looked up, so the
+    result can be cached and shared like predict_video_bytes'.
+
+    Args:
+        video_bytes: bytes - the encoded video
+        name: str - the model the gloss index was built with
+
+    Returns the top-k glosses (None if no frames could be extracted), no per-window breakdown,
+    and information about the frames used and the time taken.
+    """
+    frames, info = await decode_stage.run(load_frames, video_bytes)
+    if frames is None:
+        return None, None, info
+    async with leased_model(name) as model:
+        embedding, latency_ms = await embed_stage.run(embed_clip, model.engine, frames,
+                                                      gloss_index.endpoint)
+
+    # the lookup may reload the index another worker rewrote, so it stays off the event loop too
+    start = time.perf_counter()
+    top_k = await inference_stage.run(gloss_index.search, embedding, k=config.TOP_K_MAX)
+    lookup_ms = (time.perf_counter() - start) * 1000
+    return top_k, None, {**info, "latency_ms": latency_ms, "lookup_ms": lookup_ms}
+
+async def recognize_upload(file, session_id, name, k=1, windows=False, received=None, knn=False):
+    """
+    Decode an uploaded video, predict the sign in it and buffer the prediction in the session.
+
+    Args:
+        file: UploadFile - the video received and to be predicted
+        session_id: str - the session the prediction belongs to
+        name: str - the model to predict with
+        k: int - number of most likely glosses to return
+        windows: bool - also return the most likely gloss of each window of the video
+        received: float - optional, perf_counter time the request arrived at, to time its upload
+        knn: bool - recognize the sign with the gloss index instead of the logits layer
+
+    Returns the response describing the prediction, and whether a word was predicted at all.
+    """
     # read the video in from uploaded 
     video_bytes = await file.read()
+    if received is not None:
+        observe_stage("upload", time.perf_counter() - received)
+
+    # byte-identical uploads (retries, repeated practice clips) reuse the earlier prediction, and
+    # identical uploads arriving together share a single forward pass
+    # (kNN predictions are keyed on the index's version, so they're redone once it changes)
+    key = f"{name}:{hashlib.blake2b(video_bytes, digest_size=16).hexdigest()}"
+    if knn:
+        key = f"knn{gloss_index.version}:{key}"
+    predict = predict_knn_bytes if knn else predict_video_bytes
+    prediction = prediction_cache.get(key)
+    cached = prediction is not None
+    if not cached:
+        prediction = await inflight_predictions.run(key, lambda: predict(video_bytes, name))
+        # clips without frames and searches of an empty gloss index aren't worth keeping
+        if prediction[0]:
+            prediction_cache.put(key, prediction)
+    elif prediction[0]:
+        log(f"Reusing cached prediction: {prediction[0][0][0]}")
+
+    top_k, breakdown, info = prediction
+    if top_k is None:
+        return {"message": "No frames extracted", "confidence" : 0.0, "session_id" : session_id,
+                "frames_decoded" : info["frames_decoded"], "frames_used" : 0}, False
+    if not top_k:
+        return {"message": "The gloss index is empty", "confidence" : 0.0, 
+                "session_id" : session_id, "frames_decoded" : info["frames_decoded"], 
+                "frames_used" : info["frames_used"]}, False
+
+    # store the most likely word and its confidence, off the event loop since a SQLite store
+    # may wait on other workers' writes
+    predicted_text, conf = top_k[0]
+    await session_stage.run(sessions.append, session_id, predicted_text, conf)
+
+    # a cached prediction didn't run the model for this request, so it took no inference time
+    response = {"message": predicted_text, "confidence" : conf, "model" : name,
+                "session_id" : session_id,
+                "top_k" : [{"gloss": gloss, "confidence": confidence}
+                           for gloss, confidence in top_k[:max(1, min(k, config.TOP_K_MAX))]],
+                "latency_ms" : 0.0 if cached else info["latency_ms"], "cached" : cached,
+                "frames_decoded" : info["frames_decoded"], "frames_used" : info["frames_used"]}
+    if knn:
+        response["lookup_ms"] = 0.0 if cached else info["lookup_ms"]
+    if windows and breakdown is not None:
+        response["windows"] = [{"gloss": gloss, "confidence": confidence, 
+                                "first_frame": first, "last_frame": last}
+                               for gloss, confidence, first, last in breakdown]
+
+    return response, True
+
+def resolve_endpoints(endpoints):
+    """
+    The endpoints a request asked for embeddings at, or the default ones. Unknown endpoints are
+    rejected.
+
+    Args:
+        endpoints: str - comma separated endpoints, e.g. 'Mixed_4f,Mixed_5c', None for the default
+    """
+    names = tuple(e.strip() for e in endpoints.split(",") if e.strip()) if endpoints else ()
+    names = names or config.EMBED_ENDPOINTS
+    unknown = [name for name in names if name not in InceptionI3d.FEATURE_ENDPOINTS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown endpoints {', '.join(unknown)}, "
+                                                    + "valid endpoints are " 
+                                                    + ", ".join(InceptionI3d.FEATURE_ENDPOINTS))
+    return names
+
+def resolve_session(session_id):
+    """
+    The session a request's words are buffered in. Clients that don't have one yet are issued a
+    new one, which every response carries in session_id for them to send back with the rest of
+    the sentence.
+
+    Args:
+        session_id: str - the session the client sent, None if it hasn't been issued one
+    """
+    return session_id or secrets.token_urlsafe(16)
+
+def finish_sentence(session_id):
+    """
+    Take every word buffered in the session, clearing its buffer. It touches the session store,
+    so it's run on the session stage rather than on the event loop.
+
+    Args:
+        session_id: str - the session whose sentence is finished
+
+    Returns the words joined into a string, along with their average confidence.
+    """
+    # create a string of all the words, clearing the session's buffer
+    words, confidences = sessions.pop(session_id)
+    translations = " ".join(words)
+
+    # calculate the average confidence
+    avg_conf = str(sum(confidences) / len(confidences) if confidences else 0.0)
+    log(f"Average value of our confidences: {avg_conf}")
+
+    return translations, avg_conf
+
+async def summarize_cached(translations):
+    """
+    Summarize the words with the LLM, unless we've already summarized this exact phrase.
+
+    Args:
+        translations: str - the predicted words, separated by spaces
+    """
+    key = summary_key(translations)
+    llm_message = summary_cache.get(key)
+    if llm_message is None:
+        llm_message = await llm_stage.run(summarize, translations)
+        summary_cache.put(key, llm_message)
+    else:
+        log(f"Reusing cached summary: {llm_message}")
 
-    # write video to temp file
-    path = f"temp_{file.filename}"
-    print(path)
-    with open(path, "wb") as f:
-        f.write(video_bytes)
+    return llm_message
 
-    # pass to function to process and predict
-    text_and_conf = load_frames(path)
-    predicted_text = text_and_conf[0]
-    conf = text_and_conf[1]
+def server_sent_event(event, data):
+    """
+    Format a server-sent event carrying JSON data.
 
-    # store the words and confidences
-    words.append(predicted_text)
-    confidences.append(conf)
+    Args:
+        event: str - name of the event
+        data: dict - the event's payload
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-    # delete the video
-    os.remove(path)
+@app.post("/predict_video", dependencies=[Depends(require_ready)])
+async def predict_video(request: Request, file: UploadFile = File(...), buffer: int = Form(...),
+                        session_id: str = Form(None), k: int = Form(1), windows: int = Form(0),
+                        model: str = Form(None), knn: int = Form(0)):
+    """ 
+    Receives a video from the frontend and predicts the sign language video.
+
+    Args:
+        file: UploadFile - the video received and to be predicted
+        buffer: int - 1 to buffer the prediction, 0 to finish the sentence and summarize it
+        session_id: str - optional, identifies whose sentence the prediction belongs to. Clients
+            that don't send one are issued one, returned in the response's session_id
+        k: int - optional, number of most likely glosses returned for the clip, so alternatives
+            can be shown without another request
+        windows: int - optional, 1 to also return the most likely gloss of each window of frames
+        model: str - optional, the vocabulary to recognize signs from (asl100, asl300, asl1000
+            or asl2000), the server's default model if not given
+        knn: int - optional, 1 to recognize the sign with the gloss index instead, whose glosses
+            can be added without retraining; model is then the one the index was built with,
+            confidence is a cosine similarity and windows isn't available
+    """
+    # every user buffers their words separately
+    session_id = resolve_session(session_id)
+    name = resolve_model(gloss_index.model if knn == 1 else model)
+
+    prediction, predicted = await recognize_upload(file, session_id, name, k=k, 
+                                                   windows=windows == 1, knn=knn == 1,
+                                                   received=request.state.received)
+    if not predicted:
+        return prediction
 
     # return the predicted text
     if buffer == 1: # if it's one, we're storing words, so just return current prediction
-        return {"message": predicted_text, "confidence" : conf}
+        return prediction
     else: # if it's zero, we're done storing words and return all of them 
-        # create a string of all the words, clear the list
-        translations = " ".join(words)
-        words = []
-
-        # calculate the average confidence
-        avg_conf = str(sum(confidences) / len(confidences))
-        log(f"Average value of our confidences: {avg_conf}")
-        confidences = []
+        translations, avg_conf = await session_stage.run(finish_sentence, session_id)
 
         # ask llm to reinterpret the words into a more coherent sentence
-        to_ask = """
-            You are provided with a list of words generated by interpreting American Sign Language 
-            (ASL) into English text. Your task is to summarize these words into a single, coherent 
-            sentence. Please only use the words provided in the list and do not add any additional 
-            information or context. The sentence should be simple, understandable, and concise.
+        llm_message = await summarize_cached(translations)
+
+        return {"message": translations, "llm_message" : llm_message, "confidence" : avg_conf,
+                "session_id" : session_id}
+
+@app.post("/predict_video_stream", dependencies=[Depends(require_ready)])
+async def predict_video_stream(request: Request, file: UploadFile = File(...), 
+                               buffer: int = Form(...), session_id: str = Form(None),
+                               k: int = Form(1), windows: int = Form(0), 
+                               model: str = Form(None), knn: int = Form(0)):
+    """ 
+    Streaming variant of /predict_video that answers with server-sent events. The prediction
+    for the clip is sent first; when the sentence is finished the gloss list and average
+    confidence follow, then the LLM's summary token by token as it's generated.
+
+    Events:
+        prediction - the response /predict_video would give for a buffered clip
+        glosses - {"message", "confidence"} for the finished sentence
+        token - {"token"} one piece of the summary
+        done - {"llm_message"} the whole summary, the stream ends after it
+        error - {"message"} generation failed, the stream ends after it
+
+    Args:
+        file: UploadFile - the video received and to be predicted
+        buffer: int - 1 to buffer the prediction, 0 to finish the sentence and summarize it
+        session_id: str - optional, identifies whose sentence the prediction belongs to, issued
+            in the prediction event's session_id if not given
+        k: int - optional, number of most likely glosses returned for the clip
+        windows: int - optional, 1 to also return the most likely gloss of each window of frames
+        model: str - optional, the vocabulary to recognize signs from
+        knn: int - optional, 1 to recognize the sign with the gloss index instead
+    """
+    # every user buffers their words separately
+    session_id = resolve_session(session_id)
+    name = resolve_model(gloss_index.model if knn == 1 else model)
+
+    # the prediction and the session's words are taken before streaming starts
+    prediction, predicted = await recognize_upload(file, session_id, name, k=k, 
+                                                   windows=windows == 1, knn=knn == 1,
+                                                   received=request.state.received)
+    finished = predicted and buffer == 0
+    if finished:
+        translations, avg_conf = await session_stage.run(finish_sentence, session_id)
+
+    async def events():
+        yield server_sent_event("prediction", prediction)
+        if not finished:
+            return
+
+        # the words themselves are available right away
+        yield server_sent_event("glosses", {"message": translations, "confidence": avg_conf})
+
+        # an already summarized phrase is sent whole
+        key = summary_key(translations)
+        llm_message = summary_cache.get(key)
+        if llm_message is not None:
+            log(f"Reusing cached summary: {llm_message}")
+            yield server_sent_event("token", {"token": llm_message})
+            yield server_sent_event("done", {"llm_message": llm_message})
+            return
+
+        # otherwise forward tokens from the LLM's thread as it produces them, with None marking
+        # the end of generation
+        loop = asyncio.get_running_loop()
+        tokens = asyncio.Queue()
+        generation = asyncio.ensure_future(llm_stage.run(
+            summarize, translations,
+            on_token=lambda token: loop.call_soon_threadsafe(tokens.put_nowait, token)))
+        generation.add_done_callback(lambda _: tokens.put_nowait(None))
+
+        while (token := await tokens.get()) is not None:
+            yield server_sent_event("token", {"token": token})
+
+        try:
+            llm_message = generation.result()
+        except Exception as e:
+            yield server_sent_event("error", {"message": str(e)})
+            return
+        summary_cache.put(key, llm_message)
+        yield server_sent_event("done", {"llm_message": llm_message})
+
+    return StreamingResponse(timed_stream(request, events()), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.post("/embed", dependencies=[Depends(require_ready)])
+async def embed(file: UploadFile = File(...), model: str = Form(None), 
+                endpoints: str = Form(None)):
+    """
+    Receives a video and returns I3D's embedding of it at each endpoint asked for: the
+    activations there averaged over time and space, which retrieval, caching or lightweight
+    heads can reuse without running the whole classifier.
+
+    Args:
+        file: UploadFile - the video to embed
+        model: str - optional, whose backbone to use (asl100, asl300, asl1000 or asl2000), the
+            server's default model if not given
+        endpoints: str - optional, comma separated endpoints of the model, from Conv3d_1a_7x7 to
+            Mixed_5c; SLAMM_EMBED_ENDPOINTS if not given
+    """
+    name = resolve_model(model)
+    names = resolve_endpoints(endpoints)
+
+    # decode off the event loop, then run the backbone on its own thread
+    frames, info = await decode_stage.run(load_frames, await file.read())
+    if frames is None:
+        return {"message": "No frames extracted", "frames_decoded" : info["frames_decoded"], 
+                "frames_used" : 0}
+    async with leased_model(name) as leased:
+        features = await embed_stage.run(leased.engine.features, frames[None], names)
+
+    return {"model": name, 
+            "embeddings": {endpoint: features[endpoint][0].tolist() for endpoint in names},
+            "frames_decoded" : info["frames_decoded"], "frames_used" : info["frames_used"]}
+
+@app.websocket("/live")
+async def live(websocket: WebSocket, format: str = "raw", session_id: str = None,
+               model: str = None):
+    """
+    Recognizes signs from a continuous stream of frames. The most recent frames are kept in a
+    ring buffer, and every stride frames the latest window is run through the model, with each
+    newly recognized gloss pushed back to the client as soon as it's known.
+
+    Binary messages carry frames, in the format given when connecting (see LiveDecoder). A text
+    message of {"action": "finish"} ends the sentence and summarizes the glosses recognized so
+    far. Messages sent back are JSON:
+        {"event": "gloss", "gloss", "confidence", "frame"} - a newly recognized gloss
+        {"event": "sentence", "message", "llm_message", "confidence"} - the finished sentence
+        {"event": "error", "message"} - a message couldn't be handled
+
+    Args:
+        format: str - 'raw' 224x224 BGR frames, encoded 'image' frames or an 'h264' byte stream
+        session_id: str - optional, identifies whose sentence the glosses belong to
+        model: str - optional, the vocabulary to recognize signs from
+    """
+    await websocket.accept()
+    if not startup.ready:
+        await websocket.send_json({"event": "error", "message": "The models are still loading"})
+        await websocket.close(code=1013) # try again later
+        return
+    session_id = session_id or f"live-{websocket.client.host}-{id(websocket)}"
+
+    try:
+        name = resolve_model(model)
+        decoder = LiveDecoder(format)
+    except HTTPException as e:
+        await websocket.send_json({"event": "error", "message": e.detail})
+        await websocket.close()
+        return
+    except ValueError as e:
+        await websocket.send_json({"event": "error", "message": str(e)})
+        await websocket.close()
+        return
+
+    ring = FrameRing(window=config.LIVE_WINDOW) # most recent frames of the stream
+    since_window = 0 # frames received since the last window was run
+    inflight = None # the window currently being recognized
+    last_gloss = None # most recent gloss sent, so a sign held over several windows is sent once
+
+    async def recognize_window(clip, frame):
+        """
+        Run one window through the model and send its gloss if it's a new one.
+        """
+        nonlocal last_gloss
+        try:
+            async with leased_model(name) as leased:
+                (top_k, _), _ = await inference_stage.wait(run_on_tensor, leased, clip)
+            text, conf = top_k[0]
+            if conf < config.LIVE_MIN_CONFIDENCE or text == last_gloss:
+                return
+            last_gloss = text
+            await session_stage.run(sessions.append, session_id, text, conf)
+            await websocket.send_json({"event": "gloss", "gloss": text, "confidence": conf,
+                                       "frame": frame})
+        except Exception as e:
+            log(Fore.RED + f"Live recognition failed: {e}")
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
 
-            Respond only with the sentence. Do not include any other words, explanations, or code.
+            # text messages are commands
+            if message.get("text") is not None:
+                try:
+                    action = json.loads(message["text"]).get("action")
+                except (ValueError, AttributeError):
+                    action = None
+                if action != "finish":
+                    await websocket.send_json({"event": "error", "message": "unknown command"})
+                    continue
 
-            Here is the list of words: """ + translations
+                # wait for the window in flight so its gloss makes it into the sentence
+                if inflight is not None:
+                    await inflight
+                translations, avg_conf = await session_stage.run(finish_sentence, session_id)
+                llm_message = await summarize_cached(translations) if translations else ""
+                await websocket.send_json({"event": "sentence", "message": translations,
+                                           "llm_message": llm_message, "confidence": avg_conf})
+                last_gloss = None
+                continue
 
-        # ask the llm to generate a response
-        with llm.chat_session():
-            llm_message = llm.generate(to_ask, max_tokens=1024)
-        log(llm_message)
+            # binary messages are frames, decoded off the event loop
+            try:
+                frames = await decode_stage.run(decoder.decode, message["bytes"])
+            except ValueError as e:
+                await websocket.send_json({"event": "error", "message": str(e)})
+                continue
+            for frame in frames:
+                ring.push(frame)
+            since_window += len(frames)
 
-        return {"message": translations, "llm_message" : llm_message, "confidence" : avg_conf}
+            # run the latest window every stride frames, skipping it if the model is still busy
+            # with the previous one so we never fall behind the stream
+            if ring.full and since_window >= config.LIVE_STRIDE:
+                since_window = 0
+                if inflight is None or inflight.done():
+                    clip = await decode_stage.run(ring.clip, INPUT_DTYPE)
+                    inflight = asyncio.ensure_future(recognize_window(clip, ring.count))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if inflight is not None:
+            inflight.cancel()
@@ -0,0 +1,226 @@
+"""
+This file contains the stores that buffer each user's predicted words until they finish signing a
+sentence. Every client gets its own buffer, keyed by a session id, so concurrent users can no
+longer corrupt each other's sentences.
+
+Buffers expire after a period of inactivity and both the number of sessions and the number of
+words per session are bounded, which keeps the memory footprint of a worker fixed. The SQLite
+store keeps the buffers in a local file instead, so they are shared by every uvicorn worker on
+the machine.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class SessionStore:
+    """
+    Keeps the buffered words and confidences of each session in memory.
+
+    Args:
+        ttl_seconds: float - a session is dropped after this long without a new word
+        max_sessions: int - most sessions kept at once, the least recently used go first
+        max_words: int - most words buffered per session, the oldest go first
+    """
+
+    def __init__(self, ttl_seconds=900, max_sessions=10000, max_words=64):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_words = max_words
+
+        # session id -> (last time it was used, list of (word, confidence))
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def append(self, session_id, word, confidence):
+        """
+        Add a predicted word to the end of a session's buffer.
+
+        Args:
+            session_id: str - the session the word belongs to
+            word: str - the predicted word
+            confidence: float - the model's confidence in the word
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+
+            _, entries = self._sessions.pop(session_id, (now, []))
+            entries.append((word, confidence))
+            del entries[:-self.max_words]
+            self._sessions[session_id] = (now, entries)
+
+            # drop the least recently used sessions if we have too many
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def pop(self, session_id):
+        """
+        Take every buffered word from a session, leaving it empty.
+
+        Args:
+            session_id: str - the session to take the words from
+
+        Returns the list of words and the list of their confidences.
+        """
+        with self._lock:
+            self._evict(time.monotonic())
+            _, entries = self._sessions.pop(session_id, (None, []))
+
+        return [word for word, _ in entries], [conf for _, conf in entries]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def stats(self):
+        """
+        Summary of the sessions currently being buffered.
+        """
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "words": sum(len(entries) for _, entries in self._sessions.values()),
+            }
+
+    def _evict(self, now):
+        """
+        Drop the sessions that have been inactive for longer than the TTL. Sessions are kept in
+        order of last use, so we only ever need to look at the front.
+        """
+        while self._sessions:
+            session_id, (last_used, _) = next(iter(self._sessions.items()))
+            if now - last_used <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+
+
+class SqliteSessionStore:
+    """
+    Keeps the buffered words and confidences of each session in a local SQLite database, so
+    every worker process on the machine sees the same buffers.
+
+    Args:
+        path: str - path to the database file, created if it doesn't exist
+        ttl_seconds: float - a session is dropped after this long without a new word
+        max_sessions: int - most sessions kept at once, the least recently used go first
+        max_words: int - most words buffered per session, the oldest go first
+    """
+
+    def __init__(self, path, ttl_seconds=900, max_sessions=10000, max_words=64):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_words = max_words
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS words (
+                                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                session TEXT NOT NULL,
+                                word TEXT NOT NULL,
+                                confidence REAL NOT NULL,
+                                updated REAL NOT NULL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS words_session ON words (session, id)")
+
+    def append(self, session_id, word, confidence):
+        """
+        Add a predicted word to the end of a session's buffer.
+
+        Args:
+            session_id: str - the session the word belongs to
+            word: str - the predicted word
+            confidence: float - the model's confidence in the word
+        """
+        now = time.time() # wall clock, since it's compared across processes
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._evict(now)
+                self._db.execute("UPDATE words SET updated = ? WHERE session = ?",
+                                 (now, session_id))
+                self._db.execute("INSERT INTO words (session, word, confidence, updated) "
+                                 "VALUES (?, ?, ?, ?)", (session_id, word, confidence, now))
+
+                # keep only the newest words of the session
+                self._db.execute("""DELETE FROM words WHERE session = ? AND id NOT IN (
+                                        SELECT id FROM words WHERE session = ?
+                                        ORDER BY id DESC LIMIT ?)""",
+                                 (session_id, session_id, self.max_words))
+
+                # drop the least recently used sessions if we have too many
+                self._db.execute("""DELETE FROM words WHERE session IN (
+                                        SELECT session FROM words GROUP BY session
+                                        ORDER BY MAX(updated) DESC LIMIT -1 OFFSET ?)""",
+                                 (self.max_sessions,))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def pop(self, session_id):
+        """
+        Take every buffered word from a session, leaving it empty.
+
+        Args:
+            session_id: str - the session to take the words from
+
+        Returns the list of words and the list of their confidences.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._evict(time.time())
+                rows = self._db.execute("SELECT word, confidence FROM words WHERE session = ? "
+                                        "ORDER BY id", (session_id,)).fetchall()
+                self._db.execute("DELETE FROM words WHERE session = ?", (session_id,))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+        return [word for word, _ in rows], [conf for _, conf in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(DISTINCT session) FROM words").fetchone()[0]
+
+    def stats(self):
+        """
+        Summary of the sessions currently being buffered.
+        """
+        with self._lock:
+            sessions, words = self._db.execute(
+                "SELECT COUNT(DISTINCT session), COUNT(*) FROM words").fetchone()
+        return {"backend": "sqlite", "sessions": sessions, "words": words}
+
+    def _evict(self, now):
+        """
+        Drop the sessions that have been inactive for longer than the TTL. Every word of a
+        session carries the time the session was last used.
+        """
+        self._db.execute("DELETE FROM words WHERE updated < ?", (now - self.ttl_seconds,))
+
+
+def create_session_store(path=None, ttl_seconds=900, max_sessions=10000, max_words=64):
+    """
+    Create the session store for the server. Buffers are kept in memory unless a path to a
+    SQLite database is given, in which case they're shared by every worker using that file.
+
+    Args:
+        path: str - optional path to the SQLite database
+        ttl_seconds: float - a session is dropped after this long without a new word
+        max_sessions: int - most sessions kept at once
+        max_words: int - most words buffered per session
+    """
+    if path:
+        return SqliteSessionStore(path, ttl_seconds, max_sessions, max_words)
+    return SessionStore(ttl_seconds, max_sessions, max_words)
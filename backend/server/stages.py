@@ -0,0 +1,98 @@
+"""
+This file contains the stages a request moves through on the server. Each stage runs its blocking
+work (decoding, model inference, LLM generation) away from the asyncio event loop and has its own
+concurrency limit, so the loop stays responsive and the stages of different requests overlap.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Stage:
+    """
+    A named step of the request pipeline with its own concurrency limit and, optionally, its own
+    pool of worker threads.
+
+    Args:
+        name: str - name of the stage, used for its threads and its stats
+        limit: int - most requests allowed in the stage at once, the rest wait their turn
+        workers: int - number of threads in the stage's pool, None if the stage's work is already
+            run elsewhere (e.g. by the batching thread) and only needs to be limited
+    """
+
+    def __init__(self, name, limit, workers=None):
+        self.name = name
+        self.limit = limit
+        self.executor = (ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+                         if workers else None)
+
+        # bookkeeping so we can report on how busy the stage is
+        self.active = 0
+        self.waiting = 0
+
+        # created on first use, so it belongs to the event loop the server runs on
+        self._semaphore = None
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run a blocking function on the stage's threads once there's room in the stage.
+
+        Args:
+            fn: callable - the blocking function
+            args, kwargs: arguments passed on to the function
+        """
+        loop = asyncio.get_running_loop()
+        return await self._limited(
+            lambda: loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs)))
+
+    async def wait(self, fn, *args, **kwargs):
+        """
+        Call a function that hands its work off elsewhere and returns a
+        concurrent.futures.Future, then wait on that future once there's room in the stage.
+
+        Args:
+            fn: callable - the function returning the future
+            args, kwargs: arguments passed on to the function
+        """
+        return await self._limited(lambda: asyncio.wrap_future(fn(*args, **kwargs)))
+
+    def shutdown(self):
+        """
+        Stop the stage's threads once their current work is done.
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    def stats(self):
+        """
+        Summary of how busy the stage is.
+        """
+        return {"limit": self.limit, "active": self.active, "waiting": self.waiting}
+
+    async def _limited(self, start):
+        """
+        Wait for room in the stage, then start the work and wait for it to finish.
+
+        Args:
+            start: callable - starts the work and returns an awaitable for its result
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            return await start()
+        finally:
+            self.active -= 1
+            self._semaphore.release()
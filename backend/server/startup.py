@@ -0,0 +1,105 @@
+"""
+This file contains the bookkeeping for starting the server. The models are loaded on background
+threads so the server can accept connections (and answer health checks) right away, and each
+phase of loading is timed so cold-start time can be tracked from one deploy to the next.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Startup:
+    """
+    Loads the components the server needs on background threads and keeps track of which are
+    still loading, which failed and how long each phase of loading took.
+
+    Args:
+        components: iterable of str - names of the components that must load before the server
+            is ready
+        log: callable - called with a message as each phase finishes
+    """
+
+    def __init__(self, components, log=print):
+        self.started = time.perf_counter()
+        self.pending = set(components)
+        self.failed = {} # component -> the error it failed with
+        self.phases = {} # phase -> how long it took, in milliseconds
+        self.ready_after_ms = None # time from startup until every component was loaded
+
+        self._log = log
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        """
+        Whether every component has loaded.
+        """
+        with self._lock:
+            return not self.pending and not self.failed
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Time a phase of loading, e.g. reading a model's weights.
+
+        Args:
+            name: str - name the phase is reported under
+        """
+        start = time.perf_counter()
+        yield
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.phases[name] = elapsed_ms
+        self._log(f"Startup phase {name} took {elapsed_ms:.0f} ms")
+
+    def load(self, component, fn):
+        """
+        Load a component on a background thread.
+
+        Args:
+            component: str - the component being loaded
+            fn: callable - loads the component, raising if it can't be loaded
+        """
+        thread = threading.Thread(target=self._load, args=(component, fn),
+                                  name=f"load-{component}", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        """
+        Summary of what has loaded and how long it took.
+        """
+        with self._lock:
+            return {
+                "ready": not self.pending and not self.failed,
+                "pending": sorted(self.pending),
+                "failed": dict(self.failed),
+                "phases_ms": dict(self.phases),
+                "ready_after_ms": self.ready_after_ms,
+            }
+
+    def _load(self, component, fn):
+        """
+        Run a component's loader, recording whether it succeeded.
+        """
+        try:
+            fn()
+        except Exception as e:
+            with self._lock:
+                self.pending.discard(component)
+                self.failed[component] = str(e)
+            self._log(f"Loading {component} failed: {e}")
+            return
+
+        with self._lock:
+            self.pending.discard(component)
+            ready = not self.pending and not self.failed
+            if ready:
+                self.ready_after_ms = (time.perf_counter() - self.started) * 1000
+        if ready:
+            self._log(f"Server ready after {self.ready_after_ms:.0f} ms")
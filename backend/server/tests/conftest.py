@@ -0,0 +1,73 @@
+"""
+This file holds the setup shared by the server's tests. They're run from the server directory
+with:
+    python -m pytest -q tests
+
+The server is configured to run offline on the CPU: the LLM is the stub, nothing is warmed up
+and the models' weights are random, so the tests don't need the archived checkpoints.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+import torch
+
+# the server's modules import each other as top-level modules, and read their configuration
+# from the environment when they're first imported
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+os.environ.update({"SLAMM_DEVICE": "cpu", "SLAMM_WARMUP": "0", "SLAMM_LLM": "stub",
+                   "SLAMM_MODELS": "asl100", "SLAMM_GLOSS_INDEX": "",
+                   "SLAMM_SUMMARY_CACHE_PATH": "", "SLAMM_SESSION_DB": ""})
+
+def write_video(path, frames=40, size=64, fps=25.0):
+    """
+    Write a short video of moving noise with OpenCV, returning its path.
+
+    Args:
+        path: str - where the video is written, its extension picks the container
+        frames: int - number of frames in the video
+        size: int - height and width of the frames
+        fps: float - frame rate the container records
+    """
+    rng = np.random.default_rng(0)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (size, size))
+    for _ in range(frames):
+        writer.write(rng.integers(0, 256, (size, size, 3), dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+@pytest.fixture
+def video(tmp_path):
+    """
+    Path to a 40 frame mp4 video.
+    """
+    return write_video(tmp_path / "clip.mp4")
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    """
+    A client of the server once its models are loaded, with random weights for asl100.
+    """
+    import registry
+    import server
+    from fastapi.testclient import TestClient
+
+    weights = str(tmp_path_factory.mktemp("weights") / "asl100.pt")
+    torch.save(registry.load_model("asl100", random_weights=True).state_dict(), weights)
+    find_weights = lambda name, root=None, int8=False: weights
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(registry, "find_weights", find_weights)
+        patch.setattr(server, "find_weights", find_weights)
+        with TestClient(server.app) as client:
+            while client.get("/health/ready").status_code != 200:
+                server.time.sleep(0.1)
+            yield client
@@ -0,0 +1,40 @@
+"""
+This file tests the micro-batching scheduler with a stand-in for the engine.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import time
+
+import torch
+
+from batching import MicroBatcher, output_length
+
+class SlowEngine:
+    """
+    Returns zero logits for a batch after sleeping for the next of the given delays.
+    """
+
+    def __init__(self, delays):
+        self.delays = list(delays)
+
+    def __call__(self, batch):
+        time.sleep(self.delays.pop(0))
+        return torch.zeros(batch.shape[0], 10, output_length(batch.shape[2]))
+
+def test_each_clip_gets_its_own_batch_latency():
+    batcher = MicroBatcher(SlowEngine([0.05, 0.3]), lambda logits, frames: frames,
+                           max_wait_ms=0).start()
+    try:
+        first = batcher.submit(torch.zeros(3, 16, 8, 8))
+        first.result()
+        second = batcher.submit(torch.zeros(3, 32, 8, 8))
+
+        # the first clip's latency is its own even once a slower batch has run after it
+        (frames, first_ms), (_, second_ms) = first.result(), second.result()
+        assert frames == 16
+        assert 40 < first_ms < 250 < second_ms
+    finally:
+        batcher.stop()
@@ -0,0 +1,69 @@
+"""
+This file tests the LLM worker with stand-ins for the GPT4All bindings.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from llm_worker import LLMWorker
+
+class FakeModel:
+    """
+    Low-level model of the bindings, whose prompt_model takes the arguments the worker passes
+    unless it's told to reject them, as a bindings release with another signature would.
+    """
+
+    def __init__(self, rejects=False):
+        self.rejects = rejects
+        self.context = SimpleNamespace(n_past=0)
+
+    def prompt_model(self, prompt, template, callback, n_predict=0, reset_context=False,
+                     special=False):
+        if self.rejects:
+            raise TypeError("prompt_model() got an unexpected keyword argument 'special'")
+        self.context.n_past = len(prompt.split())
+
+class FakeGPT4All:
+    """
+    The parts of GPT4All the worker uses: chat_session, generate, _history and model.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._history = None
+        self.sessions = 0
+
+    @contextmanager
+    def chat_session(self, system_prompt=""):
+        self._history = [{"role": "system", "content": system_prompt}]
+        self.sessions += 1
+        yield self
+        self._history = None
+
+    def generate(self, prompt, max_tokens=200, streaming=False):
+        self._history += [{"role": "user", "content": prompt},
+                          {"role": "assistant", "content": prompt.upper()}]
+        self.model.context.n_past += 2
+        return iter([prompt.upper()])
+
+def test_rewinds_to_the_system_prompt():
+    llm = FakeGPT4All(FakeModel())
+    worker = LLMWorker(llm, "be brief", log=lambda message: None).start()
+    assert worker.generate("one") == "ONE" and worker.generate("two") == "TWO"
+    assert worker.rewinds and llm.sessions == 1
+    assert llm.model.context.n_past == 2 and len(llm._history) == 3
+
+def test_falls_back_to_a_session_per_summary_when_the_bindings_change():
+    messages = []
+    llm = FakeGPT4All(FakeModel(rejects=True))
+    worker = LLMWorker(llm, "be brief", log=messages.append).start()
+
+    # the worker still starts and summarizes, opening a session for each summary
+    assert worker.generate("one") == "ONE" and worker.generate("two") == "TWO"
+    assert not worker.rewinds
+    assert worker.stats()["rewind_error"].startswith("TypeError")
+    assert llm.sessions == 3 and len(messages) == 1
@@ -0,0 +1,28 @@
+"""
+This file tests how the model registry accounts for the memory of resident models.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+from types import SimpleNamespace
+
+import torch
+import torch.nn as nn
+
+from backends import CompiledRunner
+from registry import ResidentModel, module_bytes
+
+def test_compiled_graphs_count_towards_model_memory():
+    model = nn.Sequential(nn.Conv3d(3, 8, 3), nn.ReLU()).eval()
+    runner = CompiledRunner(model, "torchscript")
+    resident = ResidentModel("tiny", SimpleNamespace(model=model, runner=runner), batcher=None)
+    weights = module_bytes(model)
+    assert resident.bytes == weights
+
+    # each batch shape gets a graph of its own, with its own copy of the weights
+    with torch.no_grad():
+        for frames in (4, 8, 8):
+            runner(torch.zeros(1, 3, frames, 8, 8))
+    assert resident.bytes == 3 * weights
@@ -0,0 +1,27 @@
+"""
+This file tests the server's routes end to end, see conftest.py for how it's configured.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+def upload(path):
+    """
+    The form files of an upload of the video at a path.
+    """
+    return {"file": ("clip.mp4", open(path, "rb"), "video/mp4")}
+
+def test_knn_with_empty_index_is_not_cached(client, video):
+    # the second, byte-identical upload must be searched again rather than read from the cache
+    for _ in range(2):
+        response = client.post("/predict_video", files=upload(video), data={"buffer": 1, "knn": 1})
+        assert response.status_code == 200
+        assert response.json()["message"] == "The gloss index is empty"
+
+def test_predict_reports_latency_unless_cached(client, video):
+    first = client.post("/predict_video", files=upload(video), data={"buffer": 1}).json()
+    second = client.post("/predict_video", files=upload(video), data={"buffer": 1}).json()
+    assert not first["cached"] and first["latency_ms"] > 0
+    assert second["cached"] and second["latency_ms"] == 0
+    assert second["message"] == first["message"]
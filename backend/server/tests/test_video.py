@@ -0,0 +1,69 @@
+"""
+This file tests decoding and sampling the frames of videos.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import fractions
+import io
+
+import av
+import numpy as np
+import pytest
+
+from video import decode_frames, preprocess_frames, read_frames, recorded_frames
+
+def variable_rate_webm(frames=100):
+    """
+    Encode a webm whose frames slow down after the first 20, so the duration and average frame
+    rate give too low a frame count, and which like every webm doesn't record its frame count.
+    Frame i is a solid gray of level 2 * i, so frames can be told apart once decoded.
+    """
+    output = io.BytesIO()
+    time_base = fractions.Fraction(1, 1000)
+    with av.open(output, "w", format="webm") as container:
+        stream = container.add_stream("libvpx", rate=25)
+        stream.width = stream.height = 64
+        stream.pix_fmt = "yuv420p"
+        stream.codec_context.time_base = time_base
+
+        pts = 0
+        for i in range(frames):
+            frame = av.VideoFrame.from_ndarray(np.full((64, 64, 3), 2 * i, np.uint8),
+                                               format="rgb24")
+            frame.pts, frame.time_base = pts, time_base
+            pts += 100 if i < 20 else 10
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    return output.getvalue()
+
+@pytest.mark.parametrize("from_disk", [False, True])
+def test_unrecorded_frame_count_decodes_whole_video(tmp_path, from_disk):
+    video = variable_rate_webm()
+    assert recorded_frames(io.BytesIO(video)) == 0
+
+    info = {}
+    if from_disk:
+        path = tmp_path / "clip.webm"
+        path.write_bytes(video)
+        frames = read_frames(str(path), max_frames=16, info=info)
+    else:
+        frames = decode_frames(video, max_frames=16, info=info)
+    clip, preprocessed = preprocess_frames(frames, size=32, max_frames=16)
+
+    # every frame is decoded, and the budget is spread up to the last one
+    assert info["frames_decoded"] == 100
+    assert preprocessed["frames_used"] == 16
+    last_level = (clip[0, -1].mean().item() + 1) / 2 * 255
+    assert abs(last_level - 198) < 8
+
+def test_recorded_frame_count_is_sampled_while_decoding(video):
+    info = {}
+    frames = list(read_frames(video, max_frames=10, info=info))
+    assert recorded_frames(video) == 40
+    assert len(frames) == 10
+    assert info["frames_decoded"] == 40
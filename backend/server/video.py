@@ -0,0 +1,274 @@
+"""
+This file contains the methods used to turn a video into the frames the I3D model expects. Videos
+can be read from a file on disk with OpenCV, or decoded directly from the uploaded bytes in memory
+with PyAV, so the server never has to write an upload to disk.
+
+Authors: Zach Eanes and Alex Charlot
+Date: 10/18/2026
+Version: 1.0
+"""
+
+import io
+import time
+
+import av
+import cv2
+import numpy as np
+import torch
+
+
+SAMPLING_STRATEGIES = ("uniform", "fps", "center")
+
+def sample_indices(total, max_frames, sampling="uniform", fps=0.0, target_fps=25.0):
+    """
+    Choose which frames of a video are kept so that at most `max_frames` reach the model.
+
+    Args:
+        total: int - number of frames in the video
+        max_frames: int - frame budget, 0 keeps every frame
+        sampling: str - how frames are spread over the video:
+            'uniform' spaces them evenly from the first frame to the last,
+            'fps' first brings the video down to `target_fps`, then spaces them evenly,
+            'center' places more of them around the middle of the video, where the sign is
+        fps: float - frame rate of the video, only used by 'fps'
+        target_fps: float - frame rate the video is brought down to by 'fps'
+
+    Returns a sorted array of frame indices, or None if every frame is kept.
+    """
+    if sampling not in SAMPLING_STRATEGIES:
+        raise ValueError('Unknown sampling strategy %s' % sampling)
+
+    # drop frames beyond the target rate, e.g. every other frame of a 50 fps video
+    candidates = np.arange(total)
+    if sampling == "fps" and fps > target_fps:
+        candidates = np.unique(np.arange(0, total, fps / target_fps).astype(np.int64))
+
+    # nothing more to do if we're already within budget
+    if max_frames <= 0 or len(candidates) <= max_frames:
+        return None if len(candidates) == total else candidates
+
+    # positions in [0, 1] of the frames we keep
+    positions = np.linspace(0, 1, max_frames)
+    if sampling == "center":
+        # warp evenly spaced points so they bunch up towards the middle
+        u = 2 * positions - 1
+        positions = (np.sign(u) * np.abs(u) ** 1.5 + 1) / 2
+
+    return candidates[np.unique(np.round(positions * (len(candidates) - 1)).astype(np.int64))]
+
+def recorded_frames(source):
+    """
+    Number of frames a video's container records for its video stream, or 0 if it doesn't
+    record one. Containers such as webm, and many variable frame rate uploads, don't; the counts
+    OpenCV reports and those worked out from the duration and frame rate are then only estimates,
+    which are often too low.
+
+    Args:
+        source: str or file-like object - path to the video, or an open PyAV container
+    """
+    if isinstance(source, av.container.InputContainer):
+        return source.streams.video[0].frames if source.streams.video else 0
+    try:
+        with av.open(source, mode="r") as container:
+            return recorded_frames(container)
+    except av.error.FFmpegError:
+        return 0
+
+def read_frames(video_path, max_frames=0, sampling="uniform", info=None):
+    """
+    Read BGR frames from a video file on disk, yielding each frame as soon as it's read.
+
+    Frames that aren't sampled are grabbed without being retrieved, so they're never converted
+    into images. Frames are only sampled here when the container records how many there are;
+    otherwise the whole video is read and preprocess_frames spreads the budget over it, rather
+    than an estimate that's too low cutting off the end of the clip.
+
+    Args:
+        video_path: str - path to the video
+        max_frames: int - frame budget, 0 keeps every frame
+        sampling: str - temporal sampling strategy, see sample_indices
+        info: dict - optional, filled in with the number of frames decoded
+    """
+    info = {} if info is None else info
+    info["frames_decoded"] = 0
+
+    video = cv2.VideoCapture(video_path) # video itself to be processed
+    try:
+        total = recorded_frames(video_path)
+        keep = (sample_indices(total, max_frames, sampling, fps=video.get(cv2.CAP_PROP_FPS))
+                if total else None)
+        last = keep[-1] if keep is not None else None
+        keep = set(keep.tolist()) if keep is not None else None
+
+        index = 0
+        while last is None or index <= last:
+            # stop if we reach the end of the video
+            if not video.grab():
+                break
+            info["frames_decoded"] += 1
+
+            # only turn the frames we keep into images
+            if keep is None or index in keep:
+                ret, frame = video.retrieve()
+                if not ret:
+                    break
+                yield frame
+            index += 1
+    finally:
+        # release video since it's no longer needed
+        video.release()
+
+def decode_frames(source, threads=0, max_frames=0, sampling="uniform", info=None):
+    """
+    Decode BGR frames from a video held in memory, yielding each frame as soon as it's decoded.
+    Nothing is written to disk.
+
+    Frames that aren't sampled still go through the decoder, since later frames depend on them,
+    but are never converted into images. As with read_frames, frames are only sampled here when
+    the container records how many there are, otherwise every frame is decoded and
+    preprocess_frames spreads the budget over them.
+
+    Args:
+        source: bytes or file-like object - the encoded video, e.g. an upload's bytes or its
+            underlying file
+        threads: int - number of decoding threads, 0 lets FFmpeg decide
+        max_frames: int - frame budget, 0 keeps every frame
+        sampling: str - temporal sampling strategy, see sample_indices
+        info: dict - optional, filled in with the number of frames decoded
+    """
+    info = {} if info is None else info
+    info["frames_decoded"] = 0
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+
+    try:
+        container = av.open(source, mode="r")
+    except av.error.FFmpegError:
+        return # not a video we can decode, so there are no frames
+
+    try:
+        if not container.streams.video:
+            return # no video in the upload
+        stream = container.streams.video[0]
+
+        # decode with frame and slice threading where the codec supports it
+        stream.thread_type = "AUTO"
+        stream.codec_context.thread_count = threads
+
+        # sample up front only if the container says how many frames there are, an estimate
+        # from the duration can fall short and cut off the end of the clip
+        fps = float(stream.average_rate or 0)
+        total = recorded_frames(container)
+        keep = sample_indices(total, max_frames, sampling, fps=fps) if total else None
+        last = keep[-1] if keep is not None else None
+        keep = set(keep.tolist()) if keep is not None else None
+
+        # frames come out as BGR so they match what OpenCV gives the model
+        for index, frame in enumerate(container.decode(stream)):
+            if last is not None and index > last:
+                break
+            info["frames_decoded"] += 1
+
+            if keep is None or index in keep:
+                yield frame.to_ndarray(format="bgr24")
+    except av.error.FFmpegError:
+        return # a truncated or corrupt upload, keep whatever was decoded before the error
+    finally:
+        container.close()
+
+# lookup table mapping every uint8 pixel value straight to its normalized value in [-1, 1]
+NORMALIZE_LUT = (np.arange(256, dtype=np.float32) / 255.) * 2 - 1
+
+def normalize_frames(frames, dtype=torch.float32):
+    """
+    Normalize resized uint8 frames to [-1, 1] and transpose them to (channels, frames, height,
+    width) in a single vectorized pass through the lookup table.
+
+    Args:
+        frames: np.ndarray - uint8 frames of shape (frames, height, width, channels)
+        dtype: torch.dtype - dtype of the returned tensor, i.e. the model's input dtype
+    """
+    count, height, width, channels = frames.shape
+    clip = np.empty((channels, count, height, width), dtype=np.float32)
+    np.take(NORMALIZE_LUT, frames.transpose([3, 0, 1, 2]), out=clip, mode="clip")
+    return torch.from_numpy(clip).to(dtype)
+
+def preprocess_frames(frames, size=224, capacity=64, dtype=torch.float32, max_frames=0,
+                      sampling="uniform"):
+    """
+    This function was adapted from:
+        https://github.com/alanjeremiah/WLASL-Recognition-and-Translation/blob/main/WLASL/I3D/run.py
+
+    Resize and normalize frames for the model. Frames are consumed as they're produced, so
+    decoding and preprocessing happen together.
+
+    Each frame is resized straight into one preallocated uint8 buffer. Once every frame is in,
+    normalization and the transpose to (channels, frames, height, width) happen in a single
+    vectorized pass through a lookup table, so the clip is never held as float64 or copied
+    frame by frame.
+
+    Args:
+        frames: iterable - BGR frames of shape (height, width, channels)
+        size: int - height and width the frames are resized to
+        capacity: int - number of frames to allocate room for up front, the buffer grows if a
+            video has more
+        dtype: torch.dtype - dtype of the returned tensor, i.e. the model's input dtype
+        max_frames: int - frame budget, 0 keeps every frame. Decoders sample within the budget
+            already when they know a video's length, this covers videos whose length they don't
+        sampling: str - temporal sampling strategy the budget is spread with, see
+            sample_indices; the video's frame rate isn't known here, so 'fps' is 'uniform'
+
+    Returns the frames as a tensor of shape (channels, frames, height, width), or None if there
+    were no frames, along with a dictionary of information about the preprocessing.
+    """
+    buffer = np.empty((max(capacity, 1), size, size, 3), dtype=np.uint8) # resized frames
+    count = 0 # number of frames in the buffer
+    resize_time = 0.0 # time spent resizing, decoding time isn't counted
+
+    for frame in frames:
+        # double the buffer if the video is longer than we planned for
+        if count == len(buffer):
+            grown = np.empty((2 * len(buffer), size, size, 3), dtype=np.uint8)
+            grown[:count] = buffer
+            buffer = grown
+
+        # resize the frame to correct dimensions, directly into its slot of the buffer
+        start = time.perf_counter()
+        cv2.resize(frame, dsize=(size, size), dst=buffer[count])
+        resize_time += time.perf_counter() - start
+        count += 1
+
+    # ensure that we have frames to process
+    if count == 0:
+        return None, {"frames_used": 0, "preprocess_ms": 0.0, "preprocess_ms_per_frame": 0.0}
+
+    # spread the budget over the frames if we ended up with too many
+    resized = buffer[:count]
+    if 0 < max_frames < count:
+        resized = resized[sample_indices(count, max_frames, sampling)]
+
+    # normalize and transpose to (channels, frames, height, width) in one pass
+    start = time.perf_counter()
+    clip = normalize_frames(resized, dtype)
+    normalize_time = time.perf_counter() - start
+
+    return clip, {"frames_used": len(resized),
+                  "preprocess_ms": (resize_time + normalize_time) * 1000,
+                  "preprocess_ms_per_frame": (resize_time + normalize_time) * 1000 / count}
+
+def load_clip(path, max_frames):
+    """
+    Decode and preprocess a video file the same way the server does an upload, for the scripts
+    that run the model over a dataset.
+
+    Args:
+        path: str - path of the video
+        max_frames: int - frame budget, 0 keeps every frame
+
+    Returns the clip as a tensor of shape (channels, frames, height, width), or None if the
+    video had no frames.
+    """
+    clip, _ = preprocess_frames(read_frames(path, max_frames=max_frames),
+                                capacity=max_frames or 64, max_frames=max_frames)
+    return clip
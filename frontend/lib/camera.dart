@@ -49,6 +49,9 @@ String videoPath = "";
 /// boolean used to check when camera is in use
 bool isRecording = false;
 
+/// session the server buffers this user's words in, issued by the server on the first upload
+String? sessionId;
+
 /// instance of user authentication system
 final auth = FirebaseAuth.instance;
 
@@ -76,6 +79,11 @@ Future<Map<String, String>> uploadVideo(File videoFile, int bufferVal) async {
   // add the buffer flag to the request
   request.fields['buffer'] = bufferVal.toString();
 
+  // send back the session the server issued, so our words aren't mixed with other users'
+  if (sessionId != null) {
+    request.fields['session_id'] = sessionId!;
+  }
+
   // send the request
   var response = await request.send();
 
@@ -85,6 +93,11 @@ Future<Map<String, String>> uploadVideo(File videoFile, int bufferVal) async {
   // decode the response as a json object
   var jsonResponse = json.decode(responseString);
 
+  // keep the session the server issued for the rest of the sentence, and the next ones
+  if (jsonResponse['session_id'] != null) {
+    sessionId = jsonResponse['session_id'];
+  }
+
   // return object to be displayed
   var responseText = Map<String, String>();
 